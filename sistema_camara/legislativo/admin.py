@@ -1,9 +1,180 @@
 from django.contrib import admin
-from .models import Projeto, Voto, Cargo, VereadorProfile, Configuracao
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.functional import cached_property
 
-admin.site.register(VereadorProfile)
-admin.site.register(Cargo)
+from .models import (
+    Projeto, Voto, VotoArquivado, Cargo, VereadorProfile, Configuracao,
+    AtaVotacao, ExecucaoManutencao, ResumoTempoVotacao, EstatisticaVereador, ConexaoVereador,
+    TerminalVotacao,
+)
+
+
+class ContagemEstimadaPaginator(Paginator):
+    """
+    Paginator que, sem filtros aplicados, usa a contagem estimada pelas
+    estatísticas do banco (sqlite_stat1 / pg_class) em vez de COUNT(*).
+    Com filtros, ou sem estatísticas disponíveis, faz a contagem exata.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimativa = self._estimativa(connections[self.object_list.db], self.object_list.model._meta.db_table)
+            if estimativa:
+                return estimativa
+        return super().count
+
+    def _estimativa(self, connection, tabela):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                # Preenchida pelo ANALYZE (comando `manutencao`); a 1ª coluna de stat é o nº de linhas
+                cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+                if cursor.fetchone() is None:
+                    return None
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [tabela])
+                linha = cursor.fetchone()
+                return int(linha[0].split()[0]) if linha else None
+            if connection.vendor == 'postgresql':
+                cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [tabela])
+                linha = cursor.fetchone()
+                return linha[0] if linha and linha[0] > 0 else None
+        return None
+
+
+@admin.register(Voto)
+class VotoAdmin(admin.ModelAdmin):
+    list_display = ('id', 'projeto', 'vereador', 'escolha', 'data_voto')
+    list_select_related = ('projeto', 'vereador')
+    list_filter = ('escolha',)
+    # Buscas exatas usam os índices de projeto e de username
+    search_fields = ('=projeto__id', '=vereador__username')
+    raw_id_fields = ('projeto', 'vereador')
+    ordering = ('-id',)
+    list_per_page = 50
+    paginator = ContagemEstimadaPaginator
+    show_full_result_count = False
+
+
+@admin.register(VotoArquivado)
+class VotoArquivadoAdmin(VotoAdmin):
+    # Só leitura: o arquivo é escrito apenas pelo comando `arquivar_legislaturas`
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+def _contagem_votos(modelo, escolha):
+    votos = (
+        modelo.objects.filter(projeto=OuterRef('pk'), escolha=escolha)
+        .order_by().values('projeto').annotate(total=Count('pk')).values('total')
+    )
+    return Coalesce(Subquery(votos, output_field=IntegerField()), 0)
+
+
+@admin.register(Projeto)
+class ProjetoAdmin(admin.ModelAdmin):
+    list_display = (
+        'id', 'titulo', 'tipo', 'status', 'resultado_final', 'abertura_voto',
+        'total_sim', 'total_nao', 'total_abster',
+    )
+    # Cada filtro tem um índice que começa pelo campo (ver Projeto.Meta); a busca
+    # é só pelo número do projeto: titulo/autor seriam icontains, que nenhum índice atende
+    list_filter = ('status', 'tipo', 'resultado_final', 'arquivado')
+    search_fields = ('=id',)
+    ordering = ('-id',)
+    list_per_page = 50
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # Placar de cada projeto em subconsultas correlacionadas (índice projeto+escolha),
+        # avaliadas só nas linhas da página: o COUNT do paginador as descarta e não
+        # percorre os votos. Sem ordenação por essas colunas, que exigiria todas.
+        return super().get_queryset(request).annotate(**{
+            f'_{nome}': _contagem_votos(Voto, escolha) + _contagem_votos(VotoArquivado, escolha)
+            for nome, escolha in (('sim', 'SIM'), ('nao', 'NAO'), ('abster', 'ABSTER'))
+        })
+
+    @admin.display(description='SIM')
+    def total_sim(self, obj):
+        return obj._sim
 
-admin.site.register(Projeto)
-admin.site.register(Voto)
-admin.site.register(Configuracao)
\ No newline at end of file
+    @admin.display(description='NÃO')
+    def total_nao(self, obj):
+        return obj._nao
+
+    @admin.display(description='ABST.')
+    def total_abster(self, obj):
+        return obj._abster
+
+
+@admin.register(VereadorProfile)
+class VereadorProfileAdmin(admin.ModelAdmin):
+    list_display = ('nome_completo', 'user', 'partido', 'cargo_mesa', 'ativo', 'ausente_na_sessao')
+    list_select_related = ('user', 'cargo_mesa')
+    list_filter = ('ativo', 'ausente_na_sessao', 'cargo_mesa')
+    search_fields = ('nome_completo', 'nome_candidatura', 'partido', '=user__username')
+    raw_id_fields = ('user',)
+    ordering = ('nome_completo',)
+
+
+@admin.register(AtaVotacao)
+class AtaVotacaoAdmin(admin.ModelAdmin):
+    list_display = ('projeto', 'formato', 'sha256', 'gerado_em')
+    list_select_related = ('projeto',)
+    raw_id_fields = ('projeto',)
+
+
+@admin.register(ResumoTempoVotacao)
+class ResumoTempoVotacaoAdmin(admin.ModelAdmin):
+    list_display = ('projeto', 'total_votos', 'latencia_p50_ms', 'latencia_p90_ms', 'margem_minima_ms', 'calculado_em')
+    list_select_related = ('projeto',)
+    raw_id_fields = ('projeto',)
+
+
+@admin.register(EstatisticaVereador)
+class EstatisticaVereadorAdmin(admin.ModelAdmin):
+    list_display = ('vereador', 'legislatura', 'votacoes', 'votos_sim', 'votos_nao', 'votos_abster', 'ausencias', 'lado_vencedor')
+    list_select_related = ('vereador',)
+    list_filter = ('legislatura',)
+    search_fields = ('=vereador__username',)
+    raw_id_fields = ('vereador',)
+
+
+@admin.register(ConexaoVereador)
+class ConexaoVereadorAdmin(admin.ModelAdmin):
+    list_display = ('vereador', 'inicio', 'fim')
+    list_select_related = ('vereador',)
+    search_fields = ('=vereador__username',)
+    raw_id_fields = ('vereador',)
+    date_hierarchy = 'inicio'
+    ordering = ('-inicio',)
+
+
+@admin.register(ExecucaoManutencao)
+class ExecucaoManutencaoAdmin(admin.ModelAdmin):
+    list_display = ('rotina', 'iniciado_em', 'duracao_ms', 'linhas_afetadas', 'sucesso')
+    list_filter = ('rotina', 'sucesso')
+    ordering = ('-iniciado_em',)
+
+
+@admin.register(TerminalVotacao)
+class TerminalVotacaoAdmin(admin.ModelAdmin):
+    list_display = ('nome', 'vereador', 'situacao', 'criado_em', 'ativado_em', 'revogado_em')
+    list_select_related = ('vereador',)
+    search_fields = ('nome', '=vereador__username')
+    raw_id_fields = ('vereador',)
+    readonly_fields = ('codigo_ativacao', 'criado_por', 'ativado_em')
+
+
+admin.site.register(Cargo)
+admin.site.register(Configuracao)
@@ -0,0 +1,221 @@
+# legislativo/admissao.py
+"""
+Controle de admissão: faixas de prioridade e contrapressão.
+
+Todas as views dividem as mesmas threads de cada worker. Sem controle, um pico
+de acessos anônimos ao placar (tela_principal, resultados_api) ocupa todas
+elas e o `votar` dos vereadores fica na fila durante a contagem regressiva.
+
+Duas faixas, contadas por processo:
+
+    publica       placar, API de resultados e presença (@faixa_publica)
+    prioritaria   votar e as transições do presidente (@faixa_prioritaria)
+
+Uma requisição pública só entra se ainda sobrarem LEGISLATIVO_ADMISSAO_RESERVA
+vagas (das LEGISLATIVO_ADMISSAO_CAPACIDADE do processo) para a faixa
+prioritária, que nunca é recusada. Cada cliente público tem ainda um balde de
+fichas no cache (LEGISLATIVO_ADMISSAO_TAXA por segundo, até
+LEGISLATIVO_ADMISSAO_RAJADA acumuladas). O balde é lido e regravado sem
+lock: requisições simultâneas do mesmo cliente podem passar de leve do limite.
+
+Recusada, a leitura pública não espera: recebe o último instantâneo daquela
+URL guardado neste processo, marcado com o cabeçalho X-Placar-Desatualizado
+(idade em segundos) e com status 200 na sobrecarga ou 429 quando o cliente
+estourou o balde. Sem instantâneo, 429. As duas respostas trazem Retry-After.
+Só respostas que não dependem do usuário viram instantâneo (sem cookie de
+sessão na requisição, sem token CSRF e sem cookies na resposta).
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import add_never_cache_headers
+
+from . import camaras
+
+PREFIXO = 'legislativo:admissao:'
+
+CABECALHO_DESATUALIZADO = 'X-Placar-Desatualizado'
+
+# URLs diferentes (projetos, ?fields=, hosts) com instantâneo guardado por processo
+MAXIMO_INSTANTANEOS = 256
+
+_lock = threading.Lock()
+_em_andamento = {'publica': 0, 'prioritaria': 0}
+_recusadas = {'limite': 0, 'sobrecarga': 0}
+_instantaneos = OrderedDict()
+
+
+def _capacidade():
+    return getattr(settings, 'LEGISLATIVO_ADMISSAO_CAPACIDADE', 8)
+
+
+def _reserva():
+    return getattr(settings, 'LEGISLATIVO_ADMISSAO_RESERVA', 2)
+
+
+def estado():
+    """Ocupação das faixas e recusas deste processo (para o endpoint de saúde)."""
+    with _lock:
+        return {
+            'capacidade': _capacidade(),
+            'reserva': _reserva(),
+            'em_andamento': dict(_em_andamento),
+            'recusadas': dict(_recusadas),
+        }
+
+
+def cliente(request):
+    """
+    Identificação do cliente para o balde: o IP. Atrás de um proxy, o último
+    endereço do cabeçalho LEGISLATIVO_ADMISSAO_CABECALHO_CLIENTE (ex.:
+    'HTTP_X_FORWARDED_FOR'), que é o que o próprio proxy acrescentou.
+    """
+    cabecalho = getattr(settings, 'LEGISLATIVO_ADMISSAO_CABECALHO_CLIENTE', None)
+    if cabecalho and request.META.get(cabecalho):
+        return request.META[cabecalho].split(',')[-1].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+# --- Balde de fichas por cliente ---
+
+def retirar_ficha(identificacao):
+    """Retira uma ficha do balde do cliente. Retorna 0 se conseguiu, ou os segundos até a próxima ficha."""
+    taxa = getattr(settings, 'LEGISLATIVO_ADMISSAO_TAXA', 10)
+    if not taxa:
+        return 0
+    rajada = getattr(settings, 'LEGISLATIVO_ADMISSAO_RAJADA', 50)
+    chave = f'{PREFIXO}balde:{identificacao}'
+    agora = time.time()
+    fichas, instante = cache.get(chave) or (rajada, agora)
+    fichas = min(rajada, fichas + (agora - instante) * taxa)
+    if fichas < 1:
+        return (1 - fichas) / taxa
+    # Depois de rajada/taxa segundos o balde estaria cheio: a chave pode expirar
+    cache.set(chave, (fichas - 1, agora), timeout=math.ceil(rajada / taxa) + 1)
+    return 0
+
+
+# --- Faixas ---
+
+def _entrar_publica():
+    with _lock:
+        # A reserva da faixa prioritária vale mesmo quando ela está vazia
+        if _em_andamento['publica'] + max(_em_andamento['prioritaria'], _reserva()) >= _capacidade():
+            return False
+        _em_andamento['publica'] += 1
+        return True
+
+
+def _entrar_prioritaria():
+    with _lock:
+        _em_andamento['prioritaria'] += 1
+
+
+def _sair(faixa):
+    with _lock:
+        _em_andamento[faixa] -= 1
+
+
+# --- Instantâneos das leituras públicas ---
+
+def _chave_instantaneo(request):
+    return (camaras.nome_atual(), request.build_absolute_uri())
+
+
+def _compartilhavel(request, response):
+    return (
+        request.method == 'GET'
+        and response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    )
+
+
+def _guardar_instantaneo(request, response):
+    if not _compartilhavel(request, response):
+        return
+    chave = _chave_instantaneo(request)
+    with _lock:
+        _instantaneos[chave] = (time.monotonic(), response.content, response['Content-Type'])
+        _instantaneos.move_to_end(chave)
+        if len(_instantaneos) > MAXIMO_INSTANTANEOS:
+            _instantaneos.popitem(last=False)
+
+
+def _recusar(request, motivo, espera):
+    with _lock:
+        _recusadas[motivo] += 1
+        instantaneo = _instantaneos.get(_chave_instantaneo(request)) if request.method == 'GET' else None
+    if instantaneo is None:
+        response = HttpResponse(
+            "Muitas requisições. Tente novamente em instantes.", status=429, content_type='text/plain; charset=utf-8',
+        )
+    else:
+        instante, conteudo, content_type = instantaneo
+        response = HttpResponse(conteudo, content_type=content_type, status=429 if motivo == 'limite' else 200)
+        response[CABECALHO_DESATUALIZADO] = str(int(time.monotonic() - instante))
+    response['Retry-After'] = str(max(1, math.ceil(espera)))
+    add_never_cache_headers(response)
+    return response
+
+
+def _admitir(request):
+    """None se a requisição pública entrou na faixa (e precisa sair dela); senão a resposta degradada."""
+    espera = retirar_ficha(cliente(request))
+    if espera:
+        return _recusar(request, 'limite', espera)
+    if not _entrar_publica():
+        return _recusar(request, 'sobrecarga', 1)
+    return None
+
+
+def faixa_publica(view):
+    """Leitura pública (síncrona ou assíncrona): limitada por cliente e pela reserva da faixa prioritária."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def _view(request, *args, **kwargs):
+            recusa = _admitir(request)
+            if recusa is not None:
+                return recusa
+            try:
+                response = await view(request, *args, **kwargs)
+            finally:
+                _sair('publica')
+            _guardar_instantaneo(request, response)
+            return response
+    else:
+        @wraps(view)
+        def _view(request, *args, **kwargs):
+            recusa = _admitir(request)
+            if recusa is not None:
+                return recusa
+            try:
+                response = view(request, *args, **kwargs)
+            finally:
+                _sair('publica')
+            _guardar_instantaneo(request, response)
+            return response
+    _view.faixa = 'publica'
+    return _view
+
+
+def faixa_prioritaria(view):
+    """Votação e transições do presidente: nunca recusadas; enquanto rodam, ocupam a reserva."""
+    @wraps(view)
+    def _view(request, *args, **kwargs):
+        _entrar_prioritaria()
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            _sair('prioritaria')
+    _view.faixa = 'prioritaria'
+    return _view
@@ -0,0 +1,78 @@
+# legislativo/analises.py
+"""
+Análise do tempo que os vereadores levam para votar.
+
+A latência de cada voto (Voto.data_voto - Projeto.abertura_voto) e sua
+posição na distribuição são calculadas no banco com funções de janela.
+O resumo de cada projeto é gravado em ResumoTempoVotacao quando a votação
+é encerrada; o painel de análise lê apenas esses resumos.
+"""
+from datetime import timedelta
+
+from django.db.models import DurationField, ExpressionWrapper, F, Window
+from django.db.models.functions import CumeDist
+
+from .models import ResumoTempoVotacao
+
+FAIXAS = 10
+
+
+def latencias_da_votacao(projeto):
+    """
+    Votos do projeto com a latência e o percentil acumulado (CumeDist) de
+    cada um, em ordem de chegada.
+    """
+    latencia = ExpressionWrapper(F('data_voto') - F('projeto__abertura_voto'), output_field=DurationField())
+    return (
+        projeto.votos()
+        .annotate(
+            latencia=latencia,
+            percentil=Window(CumeDist(), order_by=latencia.asc()),
+        )
+        .order_by('data_voto')
+        .values('vereador_id', 'escolha', 'latencia', 'percentil')
+    )
+
+
+def _ms(duracao):
+    return int(duracao.total_seconds() * 1000)
+
+
+def _latencia_no_percentil(linhas, p):
+    # Primeira latência cujo percentil acumulado alcança p
+    for linha in sorted(linhas, key=lambda linha: linha['percentil']):
+        if linha['percentil'] >= p:
+            return _ms(linha['latencia'])
+    return None
+
+
+def materializar_resumo(projeto):
+    """Calcula e grava o ResumoTempoVotacao do projeto (chamado ao encerrar a votação)."""
+    if projeto.abertura_voto is None:
+        return None
+
+    linhas = list(latencias_da_votacao(projeto))
+    limite = timedelta(seconds=projeto.tempo_limite_segundos)
+    distribuicao = [0] * FAIXAS
+    ultimos_10pct = 0
+    for linha in linhas:
+        fracao = linha['latencia'] / limite if limite else 1
+        distribuicao[min(max(int(fracao * FAIXAS), 0), FAIXAS - 1)] += 1
+        if fracao >= 0.9:
+            ultimos_10pct += 1
+
+    latencias = [linha['latencia'] for linha in linhas]
+    dados = {
+        'tempo_limite_segundos': projeto.tempo_limite_segundos,
+        'total_votos': len(linhas),
+        'latencia_minima_ms': _ms(min(latencias)) if latencias else None,
+        'latencia_media_ms': _ms(sum(latencias, timedelta()) / len(latencias)) if latencias else None,
+        'latencia_p50_ms': _latencia_no_percentil(linhas, 0.5),
+        'latencia_p90_ms': _latencia_no_percentil(linhas, 0.9),
+        'latencia_maxima_ms': _ms(max(latencias)) if latencias else None,
+        'margem_minima_ms': _ms(limite - max(latencias)) if latencias else None,
+        'votos_ultimos_10pct': ultimos_10pct,
+        'distribuicao': distribuicao,
+    }
+    resumo, _ = ResumoTempoVotacao.objects.update_or_create(projeto=projeto, defaults=dados)
+    return resumo
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class LegislativoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'legislativo'
+
+    def ready(self):
+        from . import signals  # noqa: F401 (registra os receivers)
@@ -0,0 +1,222 @@
+# legislativo/aquecimento.py
+"""
+Aquecimento do processo depois de um deploy ou reinício.
+
+Sem ele, as primeiras consultas do placar e dos painéis pagam a compilação
+dos templates e os caches vazios em plena sessão.
+aquecer() faz esse trabalho antes, em cada câmara:
+
+    banco          confere que o principal e a réplica respondem (SELECT 1);
+                   não é aquecimento: as conexões do Django são por thread
+    templates      compila os templates do app (mantidos em memória pelo
+                   loader com cache, o padrão do Django)
+    configuracao   Configuracao no cache
+    roster         roster da presença, roster codificado do placar e estado
+                   do diário de votos
+    papeis         grupos e cargos (as verificações de papel consultam essas tabelas)
+    placar         renderiza o placar público e a API de resultados de cada
+                   projeto ABERTO, o que preenche os fragmentos em cache
+
+O estado vale por processo. A aplicação do wsgi.py/asgi.py inicia o
+aquecimento numa thread no primeiro pedido que o processo recebe
+(LEGISLATIVO_AQUECER_AO_INICIAR), que já é no worker, depois do fork: com
+gunicorn --preload o wsgi.py é importado no master, e uma thread iniciada
+ali não chegaria aos workers. No ASGI o primeiro pedido costuma ser o
+evento lifespan, enviado assim que o worker sobe. O endpoint de saúde
+(/api/saude/) responde 503 até o aquecimento terminar e, se o processo
+está frio ou o aquecimento falhou, inicia outro em segundo plano sem
+esperar por ele. Não é feito em AppConfig.ready(): ali o Django desaconselha
+consultas ao banco, e o ready() também roda em cada comando.
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, Group
+from django.db import connections
+from django.template.loader import get_template
+from django.test import RequestFactory
+
+from . import camaras, diario_votos, presenca, serializacao
+from .models import Cargo, Configuracao, Projeto
+
+logger = logging.getLogger(__name__)
+
+GRUPOS = ('Secretaria Geral', 'Gerente de Votação')
+
+DIRETORIO_TEMPLATES = os.path.join(os.path.dirname(__file__), 'templates')
+
+_lock = threading.Lock()
+_estado = {'situacao': 'frio', 'etapas': {}, 'erro': None}
+
+# Thread do aquecimento em segundo plano e se o primeiro pedido já a iniciou
+_thread = None
+_thread_lock = threading.Lock()
+_iniciado = False
+
+
+def _depois_do_fork():
+    # O filho herda o estado (e talvez o lock ocupado) do pai, mas não o aquecimento dele
+    global _lock, _thread, _thread_lock, _iniciado
+    _lock = threading.Lock()
+    _thread, _thread_lock, _iniciado = None, threading.Lock(), False
+    _estado.update(situacao='frio', etapas={}, erro=None)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_depois_do_fork)
+
+
+def estado():
+    """Situação do aquecimento neste processo: frio, aquecendo, pronto ou falhou."""
+    return dict(_estado, pid=os.getpid(), etapas=dict(_estado['etapas']))
+
+
+def pronto():
+    return estado()['situacao'] == 'pronto'
+
+
+# --- Etapas ---
+
+def _banco():
+    for alias in {camaras.alias_principal(), camaras.alias_replica()}:
+        if alias in connections.databases:
+            with connections[alias].cursor() as cursor:
+                cursor.execute('SELECT 1')
+
+
+def _templates():
+    nomes = []
+    for raiz, _, arquivos in os.walk(DIRETORIO_TEMPLATES):
+        for arquivo in arquivos:
+            if arquivo.endswith('.html'):
+                nomes.append(os.path.relpath(os.path.join(raiz, arquivo), DIRETORIO_TEMPLATES).replace(os.sep, '/'))
+    for nome in sorted(nomes):
+        get_template(nome)
+
+
+def _configuracao():
+    Configuracao.atual()
+
+
+def _roster():
+    presenca.roster()
+    serializacao.roster()
+    if diario_votos.ativo():
+        diario_votos.votantes()
+        diario_votos.projetos_abertos()
+
+
+def _papeis():
+    list(Group.objects.filter(name__in=GRUPOS))
+    list(Cargo.objects.all())
+
+
+def _placar():
+    # Passa pelas próprias views: os mesmos caches que as requisições usam
+    from .views import resultados_api, tela_principal
+
+    fabrica = RequestFactory(HTTP_HOST=camaras.host_padrao())
+    request = fabrica.get('/')
+    request.user = AnonymousUser()
+    tela_principal(request)
+    for projeto_id in Projeto.objects.filter(status='ABERTO').values_list('id', flat=True):
+        request = fabrica.get(f'/api/resultados/{projeto_id}/')
+        request.user = AnonymousUser()
+        resultados_api(request, projeto_id)
+
+
+ETAPAS = [
+    ('banco', _banco),
+    ('templates', _templates),
+    ('configuracao', _configuracao),
+    ('roster', _roster),
+    ('papeis', _papeis),
+    ('placar', _placar),
+]
+
+
+# --- Execução ---
+
+def aquecer():
+    """
+    Executa as etapas em todas as câmaras. Retorna o estado final; uma etapa
+    que falha é registrada e o processo fica em 'falhou' (o endpoint de saúde
+    tenta de novo na próxima verificação).
+    """
+    lock = _lock
+    if not lock.acquire(blocking=False):
+        return estado()  # outra thread já está aquecendo
+    try:
+        _estado.update(situacao='aquecendo', etapas={}, erro=None)
+        inicio = time.monotonic()
+        templates_feitos = False
+        for camara in camaras.para_cada_camara():
+            for nome, etapa in ETAPAS:
+                # Templates são do processo, não da câmara
+                if nome == 'templates':
+                    if templates_feitos:
+                        continue
+                    templates_feitos = True
+                chave = f'{camara.nome}:{nome}' if camara else nome
+                antes = time.monotonic()
+                try:
+                    etapa()
+                except Exception as e:
+                    logger.exception("Falha no aquecimento (%s)", chave)
+                    _estado.update(situacao='falhou', erro=f'{chave}: {e}')
+                    return estado()
+                _estado['etapas'][chave] = round((time.monotonic() - antes) * 1000, 1)
+        _estado['situacao'] = 'pronto'
+        logger.info("Processo %s aquecido em %.0f ms", os.getpid(), (time.monotonic() - inicio) * 1000)
+        return estado()
+    finally:
+        lock.release()
+
+
+def _aquecer_em_segundo_plano():
+    try:
+        aquecer()
+    finally:
+        connections.close_all()
+
+
+def iniciar():
+    """
+    Aquece numa thread, sem esperar. Não faz nada se o processo já está
+    pronto ou se outra thread está aquecendo. Retorna a thread iniciada (ou None).
+    """
+    global _thread
+    with _thread_lock:
+        if pronto() or (_thread is not None and _thread.is_alive()):
+            return None
+        _thread = threading.Thread(target=_aquecer_em_segundo_plano, name='legislativo-aquecimento', daemon=True)
+        _thread.start()
+        return _thread
+
+
+def _primeiro_pedido():
+    global _iniciado
+    if _iniciado:
+        return
+    _iniciado = True
+    if getattr(settings, 'LEGISLATIVO_AQUECER_AO_INICIAR', True):
+        iniciar()
+
+
+def wsgi(application):
+    """A aplicação WSGI, iniciando o aquecimento no primeiro pedido de cada processo."""
+    def _application(environ, start_response):
+        _primeiro_pedido()
+        return application(environ, start_response)
+    return _application
+
+
+def asgi(application):
+    """A aplicação ASGI, iniciando o aquecimento no primeiro evento de cada processo (lifespan ou pedido)."""
+    async def _application(scope, receive, send):
+        _primeiro_pedido()
+        return await application(scope, receive, send)
+    return _application
@@ -0,0 +1,183 @@
+# legislativo/armazenamento.py
+"""
+Armazenamento dos PDFs enviados (atas de posse e ata da Lei Orgânica).
+
+Os arquivos são gravados em disco em blocos enquanto o SHA-256 é calculado,
+e o nome final é derivado do hash: enviar de novo o mesmo conteúdo reaproveita
+o arquivo existente em vez de criar uma cópia.
+
+O limite de tamanho vale só para os campos de PDF: validar_tamanho_pdf no
+modelo e, nas views de cadastro, limitar_uploads_pdf, que interrompe o
+recebimento desses campos assim que passam do limite (a foto do mesmo
+formulário segue pelos handlers normais).
+"""
+import hashlib
+import os
+import tempfile
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.utils.deconstruct import deconstructible
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+
+from .camaras import ArmazenamentoPorCamaraMixin
+
+TAMANHO_MAXIMO_PDF_PADRAO = 10 * 1024 * 1024  # 10 MB
+
+
+def tamanho_maximo_pdf():
+    return getattr(settings, 'LEGISLATIVO_PDF_TAMANHO_MAXIMO', TAMANHO_MAXIMO_PDF_PADRAO)
+
+
+class ArquivoMuitoGrande(Exception):
+    pass
+
+
+@deconstructible
+class ArmazenamentoDeduplicado(ArmazenamentoPorCamaraMixin, FileSystemStorage):
+    """
+    FileSystemStorage que grava cada conteúdo uma única vez em
+    <prefixo>/<hash[:2]>/<hash><extensão>.
+    """
+
+    def __init__(self, prefixo='documentos/sha256', tamanho_maximo=None, **kwargs):
+        self.prefixo = prefixo
+        self.tamanho_maximo = tamanho_maximo
+        super().__init__(**kwargs)
+
+    def get_available_name(self, name, max_length=None):
+        # O nome definitivo é decidido em _save a partir do hash do conteúdo
+        return name
+
+    def _save(self, name, content):
+        limite = self.tamanho_maximo or tamanho_maximo_pdf()
+        extensao = os.path.splitext(name)[1].lower()
+
+        diretorio_temp = self.path(self.prefixo)
+        os.makedirs(diretorio_temp, exist_ok=True)
+        fd, caminho_temp = tempfile.mkstemp(dir=diretorio_temp, suffix='.parcial')
+
+        sha256 = hashlib.sha256()
+        tamanho = 0
+        try:
+            with os.fdopen(fd, 'wb') as destino:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for bloco in content.chunks():
+                    tamanho += len(bloco)
+                    if tamanho > limite:
+                        raise ArquivoMuitoGrande(f"O arquivo excede o limite de {limite} bytes.")
+                    sha256.update(bloco)
+                    destino.write(bloco)
+
+            digest = sha256.hexdigest()
+            nome_final = f'{self.prefixo}/{digest[:2]}/{digest}{extensao}'
+            caminho_final = self.path(nome_final)
+
+            if os.path.exists(caminho_final):
+                # Conteúdo já armazenado: descarta a cópia recém-gravada
+                os.remove(caminho_temp)
+            else:
+                os.makedirs(os.path.dirname(caminho_final), exist_ok=True)
+                os.replace(caminho_temp, caminho_final)
+                if self.file_permissions_mode is not None:
+                    os.chmod(caminho_final, self.file_permissions_mode)
+        except BaseException:
+            if os.path.exists(caminho_temp):
+                os.remove(caminho_temp)
+            raise
+
+        return nome_final
+
+
+def armazenamento_pdf():
+    return ArmazenamentoDeduplicado()
+
+
+def validar_tamanho_pdf(arquivo):
+    limite = tamanho_maximo_pdf()
+    if arquivo.size is not None and arquivo.size > limite:
+        raise ValidationError(
+            f"O arquivo enviado tem {arquivo.size // 1024} KB; o limite é {limite // 1024} KB."
+        )
+
+
+class ArquivoRecusado(UploadedFile):
+    """Upload interrompido por exceder o limite: guarda apenas o tamanho observado."""
+
+    def __init__(self, name, content_type, size, charset, content_type_extra=None):
+        super().__init__(None, name, content_type, size, charset, content_type_extra)
+
+    def open(self, mode=None):
+        return self
+
+    def chunks(self, chunk_size=None):
+        return iter(())
+
+    def multiple_chunks(self, chunk_size=None):
+        return False
+
+    def read(self, *args, **kwargs):
+        return b''
+
+    def close(self):
+        pass
+
+
+class LimiteTamanhoUploadHandler(FileUploadHandler):
+    """
+    Primeiro handler da cadeia nas views que recebem PDFs: acompanha o tamanho
+    dos arquivos dos campos indicados e, ao passar do limite, para de repassar
+    os blocos aos próximos handlers. O arquivo resultante (ArquivoRecusado) é
+    rejeitado por validar_tamanho_pdf. Os demais campos passam sem limite.
+    """
+
+    def __init__(self, request=None, campos=()):
+        super().__init__(request)
+        self.campos = set(campos)
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.limitado = self.field_name in self.campos
+        self.recebido = 0
+        self.recusado = False
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.limitado:
+            return raw_data
+        self.recebido += len(raw_data)
+        if self.recebido > tamanho_maximo_pdf():
+            self.recusado = True
+        if self.recusado:
+            return None
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not self.recusado:
+            return None
+        return ArquivoRecusado(
+            self.file_name, self.content_type, self.recebido,
+            self.charset, self.content_type_extra,
+        )
+
+
+def limitar_uploads_pdf(*campos):
+    """
+    Decorator de view: aplica LimiteTamanhoUploadHandler aos campos de PDF
+    indicados. Os handlers só podem mudar antes de request.POST ser lido, e o
+    CsrfViewMiddleware o lê; por isso a view é isenta no middleware e o CSRF é
+    verificado aqui, depois de trocar os handlers.
+    """
+    def decorator(view):
+        protegida = csrf_protect(view)
+
+        @wraps(view)
+        def _view(request, *args, **kwargs):
+            request.upload_handlers.insert(0, LimiteTamanhoUploadHandler(request, campos=campos))
+            return protegida(request, *args, **kwargs)
+        return csrf_exempt(_view)
+    return decorator
@@ -0,0 +1,69 @@
+# legislativo/arquivo.py
+"""
+Arquivo das legislaturas encerradas.
+
+Voto cresce a cada sessão e as consultas quentes (placar, votar, painéis) só
+precisam dos votos da legislatura atual. arquivar() move os votos dos
+projetos FECHADOS de legislaturas passadas para VotoArquivado, numa única
+transação e direto no banco (INSERT ... SELECT seguido de DELETE, sem passar
+os votos pelo Python nem disparar um sinal por voto), e marca os projetos
+como arquivados.
+
+O Projeto continua no lugar: atas, resumos de tempo e estatísticas apontam
+para ele, e o histórico do painel, a busca do admin e os dados abertos
+continuam funcionando. Quem lê votos de um projeto encerrado usa
+Projeto.votos(), que escolhe a tabela certa.
+"""
+from datetime import datetime
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import camaras, versoes
+from .models import LEGISLATURA_DURACAO_ANOS, Projeto, Voto, VotoArquivado, legislatura_de
+
+# Projetos por comando: mantém a lista do IN dentro do limite de parâmetros do SQLite
+LOTE = 500
+
+COLUNAS = ('id', 'projeto_id', 'vereador_id', 'escolha', 'data_voto')
+
+
+def arquivaveis(ate=None):
+    """
+    Projetos FECHADOS ainda não arquivados das legislaturas até `ate` (ano
+    inicial; padrão: a anterior à atual). A legislatura atual nunca entra.
+    """
+    atual = legislatura_de(timezone.now())
+    if ate is None or ate >= atual:
+        ate = atual - LEGISLATURA_DURACAO_ANOS
+    fim = datetime(ate + LEGISLATURA_DURACAO_ANOS, 1, 1, tzinfo=timezone.get_current_timezone())
+    return Projeto.objects.filter(status='FECHADO', arquivado=False, abertura_voto__lt=fim)
+
+
+def arquivar(ate=None):
+    """Move os votos dos projetos arquiváveis para VotoArquivado. Retorna (projetos, votos)."""
+    ids = list(arquivaveis(ate).order_by('id').values_list('id', flat=True))
+    if not ids:
+        return 0, 0
+
+    connection = camaras.conexao()
+    q = connection.ops.quote_name
+    colunas = ', '.join(q(coluna) for coluna in COLUNAS)
+    origem, destino = q(Voto._meta.db_table), q(VotoArquivado._meta.db_table)
+    projeto_id = q('projeto_id')
+
+    movidos = 0
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        for inicio in range(0, len(ids), LOTE):
+            lote = ids[inicio:inicio + LOTE]
+            marcadores = ', '.join(['%s'] * len(lote))
+            cursor.execute(
+                f'INSERT INTO {destino} ({colunas}) SELECT {colunas} FROM {origem} WHERE {projeto_id} IN ({marcadores})',
+                lote,
+            )
+            cursor.execute(f'DELETE FROM {origem} WHERE {projeto_id} IN ({marcadores})', lote)
+            movidos += cursor.rowcount
+            Projeto.objects.using(connection.alias).filter(id__in=lote).update(arquivado=True)
+    # update() não dispara post_save
+    versoes.incrementar(versoes.PROJETOS)
+    return len(ids), movidos
@@ -0,0 +1,159 @@
+# legislativo/atas.py
+"""
+Geração das atas (documentos de resultado) das votações encerradas.
+
+A geração roda num pool de threads fora do ciclo da requisição. O arquivo
+gerado é gravado sob MEDIA_ROOT com o nome derivado do SHA-256 do conteúdo,
+de modo que pedidos repetidos servem o arquivo já existente.
+"""
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.template.loader import render_to_string
+
+from . import camaras
+from .models import AtaVotacao, Projeto, VereadorProfile
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Gerações agendadas e ainda não concluídas: {(câmara, projeto_id): Future}
+_pendentes = {}
+_pendentes_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'LEGISLATIVO_ATAS_WORKERS', 2),
+                thread_name_prefix='legislativo-atas',
+            )
+        return _executor
+
+
+def _linhas_da_votacao(projeto):
+    """
+    Uma linha por vereador da votação como ela foi encerrada: os vereadores
+    da fotografia de presença (Projeto.presenca_encerramento) e quem votou.
+    Projetos encerrados antes da fotografia só têm os votantes. Nome, partido
+    e cargo são os do cadastro.
+    """
+    votos = {voto.vereador_id: voto for voto in projeto.votos()}
+    presenca = {int(user_id): situacao for user_id, situacao in projeto.presenca_encerramento.items()}
+    perfis = VereadorProfile.objects.filter(
+        user_id__in=set(presenca) | set(votos),
+    ).select_related('cargo_mesa').order_by('nome_completo')
+
+    linhas = []
+    for perfil in perfis:
+        voto = votos.get(perfil.user_id)
+        linhas.append({
+            'nome': perfil.nome_completo,
+            'partido': perfil.partido,
+            'cargo': perfil.cargo_mesa.nome if perfil.cargo_mesa else None,
+            'presente': voto is not None or presenca.get(perfil.user_id) != 'AUSENTE',
+            'voto': voto.get_escolha_display() if voto else None,
+            'data_voto': voto.data_voto if voto else None,
+        })
+    return linhas
+
+
+def _renderizar_pdf(html):
+    # PDF é opcional: só é gerado se o WeasyPrint estiver instalado.
+    try:
+        from weasyprint import HTML
+    except ImportError:
+        return None
+    return HTML(string=html).write_pdf()
+
+
+def gerar_ata(projeto_id):
+    """
+    Gera (ou reaproveita) a ata de um projeto encerrado e retorna o AtaVotacao.
+    """
+    projeto = Projeto.objects.get(pk=projeto_id)
+    linhas = _linhas_da_votacao(projeto)
+
+    html = render_to_string('legislativo/ata_votacao.html', {
+        'projeto': projeto,
+        'linhas': linhas,
+        'votos_sim': sum(1 for linha in linhas if linha['voto'] == 'Sim'),
+        'votos_nao': sum(1 for linha in linhas if linha['voto'] == 'Não'),
+        'votos_abster': sum(1 for linha in linhas if linha['voto'] == 'Abstenção'),
+        'presentes': sum(1 for linha in linhas if linha['presente']),
+    })
+
+    conteudo = _renderizar_pdf(html)
+    formato = 'PDF'
+    if conteudo is None:
+        conteudo = html.encode('utf-8')
+        formato = 'HTML'
+
+    sha256 = hashlib.sha256(conteudo).hexdigest()
+    caminho = f'atas/votacao/{sha256[:2]}/{sha256}.{formato.lower()}'
+    if not default_storage.exists(caminho):
+        caminho = default_storage.save(caminho, ContentFile(conteudo))
+
+    ata, _ = AtaVotacao.objects.update_or_create(
+        projeto=projeto,
+        defaults={'arquivo': caminho, 'sha256': sha256, 'formato': formato},
+    )
+    return ata
+
+
+def _gerar_ata_em_segundo_plano(projeto_id):
+    try:
+        return gerar_ata(projeto_id)
+    except Exception:
+        logger.exception("Falha ao gerar a ata do projeto %s", projeto_id)
+        raise
+    finally:
+        # Cada thread do pool abre as próprias conexões; fecha ao terminar.
+        connections.close_all()
+
+
+def agendar_geracao_ata(projeto_id):
+    """
+    Agenda a geração da ata no pool de threads (uma só por projeto enquanto
+    ela não termina).
+    Com LEGISLATIVO_ATAS_ASSINCRONO = False a geração é feita na hora (útil em testes).
+    """
+    if not getattr(settings, 'LEGISLATIVO_ATAS_ASSINCRONO', True):
+        return gerar_ata(projeto_id)
+
+    # Um placar cheio pede a mesma ata várias vezes enquanto ela é gerada: uma geração por projeto
+    chave = (camaras.nome_atual(), projeto_id)
+    with _pendentes_lock:
+        futuro = _pendentes.get(chave)
+        if futuro is not None:
+            return futuro
+        futuro = _pendentes[chave] = _get_executor().submit(
+            camaras.no_contexto(_gerar_ata_em_segundo_plano), projeto_id,
+        )
+    # Fora do lock: se a geração já terminou, o callback roda aqui mesmo
+    futuro.add_done_callback(lambda concluido: _liberar(chave, concluido))
+    return futuro
+
+
+def _liberar(chave, futuro):
+    with _pendentes_lock:
+        if _pendentes.get(chave) is futuro:
+            del _pendentes[chave]
+
+
+def ata_em_cache(projeto):
+    """Retorna o AtaVotacao do projeto se o arquivo já existir no storage."""
+    ata = AtaVotacao.objects.filter(projeto=projeto).first()
+    if ata and default_storage.exists(ata.arquivo.name):
+        return ata
+    return None
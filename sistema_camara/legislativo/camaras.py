@@ -0,0 +1,245 @@
+# legislativo/camaras.py
+"""
+Várias câmaras municipais no mesmo deployment (mesmos processos).
+
+A câmara da requisição é escolhida pelo host (LEGISLATIVO_CAMARAS) e fica
+num contextvar durante a requisição. A partir dela:
+
+    banco     o roteador (roteamento.py) manda o ORM para o alias da câmara
+              (`camara_<nome>` e `camara_<nome>_replica`, criados no
+              settings.py); sessões, usuários e Configuracao ficam nesse banco
+    cache     chave_cache() põe o nome da câmara em todas as chaves
+    mídia     ArmazenamentoPorCamara grava em MEDIA_ROOT/camaras/<nome>/
+
+Sem LEGISLATIVO_CAMARAS nada muda: uma câmara só, nos bancos 'default' e
+'replica'. O custo de cada câmara é uma conexão por processo e um espaço de
+nomes no cache.
+
+Trabalho fora da requisição (pools de threads, comandos) precisa entrar na
+câmara explicitamente: em_camara() ou no_contexto().
+"""
+import contextvars
+import os
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import connections
+from django.http import HttpResponseNotFound
+from django.utils.deconstruct import deconstructible
+
+ALIAS_PRINCIPAL = 'default'
+ALIAS_REPLICA = 'replica'
+
+_atual = contextvars.ContextVar('legislativo_camara', default=None)
+
+# Respondem em qualquer host: o balanceador verifica o processo, não uma câmara
+CAMINHOS_SEM_CAMARA = {'/api/saude/'}
+
+
+class Camara:
+
+    def __init__(self, nome, hosts=(), alias=None, alias_replica=None, **kwargs):
+        self.nome = nome
+        self.hosts = tuple(host.lower() for host in hosts)
+        self.alias = alias or f'camara_{nome}'
+        self.alias_replica = alias_replica or f'{self.alias}_replica'
+
+    def __repr__(self):
+        return f'<Camara {self.nome}>'
+
+
+_cache_config = (None, {}, {})
+
+
+def _configuracao():
+    """({nome: Camara}, {host: Camara}), refeito se LEGISLATIVO_CAMARAS mudar (ex.: override_settings)."""
+    global _cache_config
+    config = getattr(settings, 'LEGISLATIVO_CAMARAS', None) or {}
+    if _cache_config[0] is not config:
+        por_nome = {nome: Camara(nome, **opcoes) for nome, opcoes in config.items()}
+        por_host = {host: camara for camara in por_nome.values() for host in camara.hosts}
+        _cache_config = (config, por_nome, por_host)
+    return _cache_config[1], _cache_config[2]
+
+
+def todas():
+    return list(_configuracao()[0].values())
+
+
+def ativa():
+    """True se o deployment hospeda várias câmaras."""
+    return bool(_configuracao()[0])
+
+
+def por_nome(nome):
+    try:
+        return _configuracao()[0][nome]
+    except KeyError:
+        raise LookupError(f"Câmara desconhecida: {nome}")
+
+
+def host_padrao():
+    """Host para requisições montadas fora de uma requisição (aquecimento, placar estático)."""
+    camara = _atual.get()
+    if camara is not None and camara.hosts:
+        return camara.hosts[0]
+    for host in settings.ALLOWED_HOSTS:
+        if host and not host.startswith('.') and host != '*':
+            return host
+    return 'localhost'
+
+
+def por_host(host):
+    # Sem a porta (request.get_host() a inclui quando não é a padrão)
+    return _configuracao()[1].get(host.lower().rsplit(':', 1)[0])
+
+
+def atual():
+    return _atual.get()
+
+
+def nome_atual():
+    camara = _atual.get()
+    return camara.nome if camara else None
+
+
+def alias_principal():
+    camara = _atual.get()
+    return camara.alias if camara else ALIAS_PRINCIPAL
+
+
+def alias_replica():
+    camara = _atual.get()
+    return camara.alias_replica if camara else ALIAS_REPLICA
+
+
+def conexao():
+    """Conexão com o banco principal da câmara atual (no lugar de django.db.connection)."""
+    return connections[alias_principal()]
+
+
+@contextmanager
+def em_camara(camara):
+    """Executa o bloco na câmara dada (Camara, nome ou None para a instalação sem câmaras)."""
+    if isinstance(camara, str):
+        camara = por_nome(camara)
+    token = _atual.set(camara)
+    try:
+        yield camara
+    finally:
+        _atual.reset(token)
+
+
+def no_contexto(funcao):
+    """Amarra `funcao` à câmara atual, para rodar em outra thread (ex.: ThreadPoolExecutor)."""
+    camara = _atual.get()
+
+    @wraps(funcao)
+    def _funcao(*args, **kwargs):
+        with em_camara(camara):
+            return funcao(*args, **kwargs)
+    return _funcao
+
+
+def para_cada_camara(nome=None):
+    """
+    Itera entrando em cada câmara (ou uma vez, sem câmara, na instalação
+    simples). Com `nome`, só naquela câmara (LookupError se não existir).
+    """
+    selecionadas = [por_nome(nome)] if nome else todas() or [None]
+    for camara in selecionadas:
+        with em_camara(camara):
+            yield camara
+
+
+# --- Cache ---
+
+def chave_cache(key, key_prefix, version):
+    """KEY_FUNCTION do cache: o nome da câmara entra em todas as chaves."""
+    return f'{key_prefix}:{version}:{nome_atual() or "-"}:{key}'
+
+
+# --- Mídia ---
+
+def diretorio_midia():
+    camara = _atual.get()
+    if camara is None:
+        return str(settings.MEDIA_ROOT)
+    return os.path.join(settings.MEDIA_ROOT, 'camaras', camara.nome)
+
+
+def url_midia():
+    camara = _atual.get()
+    if camara is None:
+        return settings.MEDIA_URL
+    return f'{settings.MEDIA_URL}camaras/{camara.nome}/'
+
+
+class ArmazenamentoPorCamaraMixin:
+    """
+    Para FileSystemStorage: sem `location` explícito, a raiz é a da câmara
+    atual. O nome gravado no banco continua relativo (ex.: vereadores/fotos/x.jpg).
+    """
+
+    @property
+    def base_location(self):
+        if self._location is not None:
+            return self._location
+        return diretorio_midia()
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    @property
+    def base_url(self):
+        if self._base_url is not None:
+            return self._base_url if self._base_url.endswith('/') else self._base_url + '/'
+        return url_midia()
+
+
+@deconstructible
+class ArmazenamentoPorCamara(ArmazenamentoPorCamaraMixin, FileSystemStorage):
+    pass
+
+
+# --- Middleware ---
+
+class CamaraMiddleware:
+    """Escolhe a câmara pelo host; deve vir antes de sessão e roteamento do banco."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def _camara(self, request):
+        if not ativa() or request.path in CAMINHOS_SEM_CAMARA:
+            return None, None
+        camara = por_host(request.get_host())
+        if camara is None:
+            return None, HttpResponseNotFound("Câmara não encontrada para este endereço.")
+        return camara, None
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        camara, erro = self._camara(request)
+        if erro is not None:
+            return erro
+        request.camara = camara
+        with em_camara(camara):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        camara, erro = self._camara(request)
+        if erro is not None:
+            return erro
+        request.camara = camara
+        with em_camara(camara):
+            return await self.get_response(request)
@@ -0,0 +1,490 @@
+# legislativo/carga.py
+"""
+Gerador de carga HTTP com asyncio, sem dependências externas.
+
+Não importa o Django: pode ser usado contra qualquer instância em execução,
+inclusive de outra máquina. Cada cliente mantém uma conexão keep-alive e
+repete as requisições do seu roteiro até o fim do tempo.
+
+Três cenários:
+
+    carga_placar       clientes anônimos consultando o placar sem parar
+    simular_sessao     uma sessão plenária: vereadores logados acompanhando
+                       o painel e votando em rajada quando o presidente abre a
+                       votação, junto com centenas de espectadores do placar
+    reproduzir_acessos um log de acesso gravado, na velocidade escolhida
+"""
+import asyncio
+import json
+import random
+import re
+import time
+from datetime import datetime
+from urllib.parse import urlencode, urlsplit
+
+
+class ClienteHTTP:
+    """Cliente HTTP/1.1 mínimo com uma conexão persistente."""
+
+    def __init__(self, url_base, timeout=10.0):
+        self.url_base = url_base
+        partes = urlsplit(url_base)
+        self.host = partes.hostname
+        self.porta = partes.port or 80
+        self.timeout = timeout
+        self.leitor = None
+        self.escritor = None
+        self.cookies = {}
+
+    def clonar(self):
+        """Outra conexão com os mesmos cookies (mesma sessão), para requisições simultâneas."""
+        clone = ClienteHTTP(self.url_base, self.timeout)
+        clone.cookies = dict(self.cookies)
+        return clone
+
+    async def _conectar(self):
+        self.leitor, self.escritor = await asyncio.open_connection(self.host, self.porta)
+
+    async def fechar(self):
+        if self.escritor is not None:
+            self.escritor.close()
+            try:
+                await self.escritor.wait_closed()
+            except OSError:
+                pass
+            self.escritor = None
+
+    async def requisicao(self, metodo, caminho, corpo=b'', cabecalhos=None):
+        """Retorna (status, cabeçalhos, corpo). Reconecta uma vez se a conexão caiu."""
+        for tentativa in range(2):
+            if self.escritor is None:
+                await self._conectar()
+            try:
+                return await asyncio.wait_for(
+                    self._requisicao(metodo, caminho, corpo, cabecalhos or {}), self.timeout
+                )
+            except (ConnectionError, asyncio.IncompleteReadError):
+                await self.fechar()
+                if tentativa:
+                    raise
+            except BaseException:
+                await self.fechar()
+                raise
+
+    async def _requisicao(self, metodo, caminho, corpo, cabecalhos):
+        linhas = [f'{metodo} {caminho} HTTP/1.1', f'Host: {self.host}:{self.porta}']
+        if self.cookies:
+            linhas.append('Cookie: ' + '; '.join(f'{k}={v}' for k, v in self.cookies.items()))
+        if corpo:
+            linhas.append(f'Content-Length: {len(corpo)}')
+        linhas.extend(f'{k}: {v}' for k, v in cabecalhos.items())
+        self.escritor.write(('\r\n'.join(linhas) + '\r\n\r\n').encode('latin-1') + corpo)
+        await self.escritor.drain()
+
+        status_linha = await self.leitor.readuntil(b'\r\n')
+        status = int(status_linha.split()[1])
+        resposta_cabecalhos = {}
+        while True:
+            linha = await self.leitor.readuntil(b'\r\n')
+            if linha == b'\r\n':
+                break
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            nome, valor = nome.strip().lower(), valor.strip()
+            if nome == 'set-cookie':
+                cookie_nome, _, resto = valor.partition('=')
+                self.cookies[cookie_nome] = resto.split(';', 1)[0]
+            resposta_cabecalhos[nome] = valor
+
+        if resposta_cabecalhos.get('transfer-encoding') == 'chunked':
+            partes = []
+            while True:
+                tamanho = int((await self.leitor.readuntil(b'\r\n')).strip(), 16)
+                if tamanho == 0:
+                    await self.leitor.readuntil(b'\r\n')
+                    break
+                partes.append(await self.leitor.readexactly(tamanho))
+                await self.leitor.readexactly(2)
+            conteudo = b''.join(partes)
+        else:
+            conteudo = await self.leitor.readexactly(int(resposta_cabecalhos.get('content-length', 0)))
+
+        if resposta_cabecalhos.get('connection', '').lower() == 'close':
+            await self.fechar()
+        return status, resposta_cabecalhos, conteudo
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+class Estatisticas:
+    """Latências (ms) e erros por endpoint."""
+
+    def __init__(self):
+        self.latencias = {}
+        self.erros = {}
+        self.inicio = time.monotonic()
+        self.fim = None
+        # Reprodução de log: quanto cada requisição saiu depois do horário previsto
+        self.atrasos = []
+
+    def registrar(self, endpoint, latencia_ms, erro=None):
+        self.latencias.setdefault(endpoint, [])
+        self.erros.setdefault(endpoint, {})
+        if erro is None:
+            self.latencias[endpoint].append(latencia_ms)
+        else:
+            self.erros[endpoint][erro] = self.erros[endpoint].get(erro, 0) + 1
+
+    def encerrar(self):
+        self.fim = time.monotonic()
+
+    @property
+    def duracao(self):
+        return (self.fim or time.monotonic()) - self.inicio
+
+    def resumo(self):
+        linhas = {}
+        for endpoint in sorted(set(self.latencias) | set(self.erros)):
+            latencias = self.latencias.get(endpoint, [])
+            erros = sum(self.erros.get(endpoint, {}).values())
+            total = len(latencias) + erros
+            linhas[endpoint] = {
+                'requisicoes': total,
+                'por_segundo': total / self.duracao if self.duracao else 0.0,
+                'taxa_erro': erros / total if total else 0.0,
+                'erros': dict(self.erros.get(endpoint, {})),
+                'p50': percentil(latencias, 50),
+                'p95': percentil(latencias, 95),
+                'p99': percentil(latencias, 99),
+            }
+        return linhas
+
+    def todas_latencias(self):
+        return [valor for valores in self.latencias.values() for valor in valores]
+
+    def total_erros(self):
+        return sum(sum(erros.values()) for erros in self.erros.values())
+
+
+def classificar_erro(status, corpo):
+    # O texto da exceção só aparece no corpo com DEBUG = True; sem ele fica "HTTP 500"
+    if b'database is locked' in corpo:
+        return 'database is locked'
+    if b'UNIQUE constraint failed' in corpo or b'IntegrityError' in corpo:
+        return 'voto duplicado'
+    return f'HTTP {status}'
+
+
+async def medir(cliente, estatisticas, endpoint, metodo, caminho, **kwargs):
+    """Executa uma requisição e registra a latência ou o tipo de erro."""
+    inicio = time.monotonic()
+    try:
+        status, cabecalhos, corpo = await cliente.requisicao(metodo, caminho, **kwargs)
+    except asyncio.TimeoutError:
+        estatisticas.registrar(endpoint, 0, 'timeout')
+        return None
+    except OSError as e:
+        estatisticas.registrar(endpoint, 0, type(e).__name__)
+        return None
+    latencia = (time.monotonic() - inicio) * 1000
+    if status >= 500:
+        estatisticas.registrar(endpoint, latencia, classificar_erro(status, corpo))
+    elif status == 429:
+        estatisticas.registrar(endpoint, latencia, 'HTTP 429')
+    else:
+        estatisticas.registrar(endpoint, latencia)
+    return status, cabecalhos, corpo
+
+
+async def _cliente_placar(url_base, caminhos, estatisticas, fim, intervalo):
+    cliente = ClienteHTTP(url_base)
+    try:
+        while time.monotonic() < fim:
+            for endpoint, caminho in caminhos:
+                await medir(cliente, estatisticas, endpoint, 'GET', caminho)
+            if intervalo:
+                await asyncio.sleep(intervalo)
+    finally:
+        await cliente.fechar()
+
+
+async def carga_placar(url_base, caminhos, clientes, duracao, intervalo=0.0):
+    """
+    `clientes` conexões simultâneas pedindo `caminhos` [(endpoint, caminho), ...]
+    em sequência durante `duracao` segundos. Retorna Estatisticas.
+    """
+    estatisticas = Estatisticas()
+    fim = time.monotonic() + duracao
+    await asyncio.gather(*[
+        _cliente_placar(url_base, caminhos, estatisticas, fim, intervalo)
+        for _ in range(clientes)
+    ])
+    estatisticas.encerrar()
+    return estatisticas
+
+
+def formatar_resumo(estatisticas):
+    """Linhas de texto com vazão, taxa de erro e percentis de cada endpoint."""
+    linhas = [f"{'endpoint':<28} {'req':>7} {'req/s':>8} {'erros':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"]
+    for endpoint, dados in estatisticas.resumo().items():
+        linhas.append(
+            f"{endpoint:<28} {dados['requisicoes']:>7} {dados['por_segundo']:>8.1f} {dados['taxa_erro']:>7.1%} "
+            f"{dados['p50']:>8.1f} {dados['p95']:>8.1f} {dados['p99']:>8.1f}"
+        )
+        for erro, quantidade in sorted(dados['erros'].items()):
+            linhas.append(f"    {erro}: {quantidade}")
+    return linhas
+
+
+# --- Sessão plenária simulada ---
+
+CSRF_FORMULARIO = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+ESCOLHAS = ('SIM', 'NAO', 'ABSTER')
+
+
+def _formulario(cliente, dados):
+    # O token do cookie vale como token do formulário (Django aceita o segredo sem máscara)
+    corpo = urlencode(dados).encode()
+    cabecalhos = {'Content-Type': 'application/x-www-form-urlencoded'}
+    if 'csrftoken' in cliente.cookies:
+        cabecalhos['X-CSRFToken'] = cliente.cookies['csrftoken']
+    return corpo, cabecalhos
+
+
+async def entrar(cliente, estatisticas, usuario, senha, caminho='/contas/login/'):
+    """Login pelo formulário do Django. Retorna True se o servidor aceitou."""
+    resposta = await medir(cliente, estatisticas, 'login', 'GET', caminho)
+    if resposta is None:
+        return False
+    achado = CSRF_FORMULARIO.search(resposta[2])
+    dados = {'username': usuario, 'password': senha}
+    if achado:
+        dados['csrfmiddlewaretoken'] = achado.group(1).decode()
+    corpo, cabecalhos = _formulario(cliente, dados)
+    resposta = await medir(cliente, estatisticas, 'login', 'POST', caminho, corpo=corpo, cabecalhos=cabecalhos)
+    if resposta is None:
+        return False
+    # Sucesso redireciona para LOGIN_REDIRECT_URL; senha errada devolve o formulário (200)
+    if resposta[0] != 302:
+        estatisticas.registrar('login', 0, 'login recusado')
+        return False
+    return True
+
+
+async def _entrar_todos(url_base, credenciais, estatisticas, simultaneos):
+    """Clientes logados (None para quem não conseguiu), no máximo `simultaneos` logins por vez."""
+    limite = asyncio.Semaphore(simultaneos)
+
+    async def _entrar(usuario, senha):
+        cliente = ClienteHTTP(url_base)
+        async with limite:
+            if await entrar(cliente, estatisticas, usuario, senha):
+                return cliente
+        await cliente.fechar()
+        return None
+
+    return await asyncio.gather(*[_entrar(usuario, senha) for usuario, senha in credenciais])
+
+
+async def _espectador(url_base, projeto_id, estatisticas, fim, intervalo, sorteio):
+    cliente = ClienteHTTP(url_base)
+    try:
+        # Os placares não abrem todos no mesmo instante
+        await asyncio.sleep(sorteio.uniform(0, intervalo))
+        await medir(cliente, estatisticas, 'tela_principal', 'GET', '/')
+        while time.monotonic() < fim:
+            await asyncio.sleep(intervalo)
+            await medir(cliente, estatisticas, 'resultados_api', 'GET', f'/api/resultados/{projeto_id}/')
+    finally:
+        await cliente.fechar()
+
+
+async def _votar(cliente, estatisticas, projeto_id, escolha):
+    corpo, cabecalhos = _formulario(cliente, {'escolha': escolha})
+    resposta = await medir(cliente, estatisticas, 'votar', 'POST', f'/votar/{projeto_id}/', corpo=corpo, cabecalhos=cabecalhos)
+    return resposta is not None and resposta[0] == 302
+
+
+async def _vereador(cliente, usuario, projeto_id, estatisticas, fim, aberta, votos, opcoes, sorteio):
+    try:
+        votou = False
+        while time.monotonic() < fim:
+            await medir(cliente, estatisticas, 'painel_vereador', 'GET', '/painel/')
+            await medir(cliente, estatisticas, 'resultados_api', 'GET', f'/api/resultados/{projeto_id}/')
+            if aberta.is_set() and not votou:
+                votou = True
+                # Rajada: todos votam poucos segundos depois da abertura
+                await asyncio.sleep(sorteio.uniform(0, opcoes['rajada']))
+                escolha = sorteio.choice(ESCOLHAS)
+                # Cliques repetidos (duplo clique, reenvio) em conexões separadas, ao mesmo tempo
+                clones = [cliente.clonar() for _ in range(opcoes['votos_repetidos'] - 1)]
+                try:
+                    aceitos = await asyncio.gather(*[
+                        _votar(c, estatisticas, projeto_id, escolha) for c in [cliente, *clones]
+                    ])
+                finally:
+                    for clone in clones:
+                        await clone.fechar()
+                if any(aceitos):
+                    votos.append(usuario)
+                continue
+            await asyncio.sleep(opcoes['intervalo_painel'])
+    finally:
+        await cliente.fechar()
+
+
+async def _presidente(cliente, projeto_id, estatisticas, fim, aberta, opcoes):
+    try:
+        await asyncio.sleep(opcoes['abertura'])
+        resposta = await medir(cliente, estatisticas, 'iniciar_votacao', 'GET', f'/iniciar_votacao/{projeto_id}/')
+        if resposta is not None and resposta[0] == 302:
+            aberta.set()
+        while time.monotonic() < fim:
+            await medir(cliente, estatisticas, 'painel_presidente', 'GET', '/presidente/')
+            await asyncio.sleep(opcoes['intervalo_painel'])
+    finally:
+        await cliente.fechar()
+
+
+async def simular_sessao(url_base, projeto_id, vereadores, presidente, espectadores=200, duracao=60.0,
+                         abertura=5.0, rajada=2.0, votos_repetidos=1, intervalo_painel=2.0,
+                         intervalo_placar=10.0, logins_simultaneos=4, semente=None):
+    """
+    Sessão plenária contra um servidor em execução. `vereadores` é uma lista
+    de (usuário, senha) e `presidente` um par (usuário, senha); o projeto deve
+    estar EM_PAUTA. Os logins são feitos antes (o hash da senha é caro de
+    propósito e, na sessão real, ninguém entra na hora da votação); depois,
+    `duracao` segundos de sessão: `abertura` segundos depois do início o
+    presidente inicia a votação e cada vereador vota em até `rajada` segundos,
+    enviando o voto `votos_repetidos` vezes ao mesmo tempo.
+
+    Retorna (Estatisticas, verificação): a verificação compara os votos aceitos
+    com os votos_computados do placar; a diferença indica votos perdidos ou
+    duplicados.
+    """
+    sorteio = random.Random(semente)
+    estatisticas = Estatisticas()
+    aberta = asyncio.Event()
+    votos = []
+    opcoes = {
+        'abertura': abertura, 'rajada': rajada, 'votos_repetidos': max(1, votos_repetidos),
+        'intervalo_painel': intervalo_painel,
+    }
+    clientes = await _entrar_todos(url_base, [presidente, *vereadores], estatisticas, logins_simultaneos)
+    cliente_presidente, clientes_vereadores = clientes[0], clientes[1:]
+
+    # A vazão (req/s) é medida só na sessão, sem a fase de login
+    estatisticas.inicio = time.monotonic()
+    fim = estatisticas.inicio + duracao
+    await asyncio.gather(
+        *([_presidente(cliente_presidente, projeto_id, estatisticas, fim, aberta, opcoes)] if cliente_presidente else []),
+        *[
+            _vereador(cliente, usuario, projeto_id, estatisticas, fim, aberta, votos, opcoes, sorteio)
+            for cliente, (usuario, _) in zip(clientes_vereadores, vereadores) if cliente is not None
+        ],
+        *[
+            _espectador(url_base, projeto_id, estatisticas, fim, intervalo_placar, sorteio)
+            for _ in range(espectadores)
+        ],
+    )
+    estatisticas.encerrar()
+
+    verificacao = {'votacao_aberta': aberta.is_set(), 'votos_aceitos': len(votos), 'votos_computados': None}
+    cliente = ClienteHTTP(url_base)
+    try:
+        resposta = await cliente.requisicao('GET', f'/api/resultados/{projeto_id}/')
+        if resposta[0] == 200:
+            verificacao['votos_computados'] = json.loads(resposta[2])['votos_computados']
+    except (OSError, asyncio.TimeoutError, ValueError):
+        pass
+    finally:
+        await cliente.fechar()
+    return estatisticas, verificacao
+
+
+# --- Reprodução de log de acesso ---
+
+# Formato comum/combinado (nginx, gunicorn) ou o do runserver:
+#   10.0.0.5 - - [19/Oct/2026:14:02:11 -0300] "GET /api/resultados/3/ HTTP/1.1" 200 812 ...
+#   [19/Oct/2026 14:02:11] "GET /api/resultados/3/ HTTP/1.1" 200 812
+LINHA_ACESSO = re.compile(
+    r'^(?:(?P<cliente>[^\s\[]\S*)\s.*?)?\[(?P<data>[^\]]+)\]\s+"(?P<metodo>[A-Z]+) (?P<caminho>\S+)[^"]*"\s+(?P<status>\d{3})'
+)
+FORMATOS_DATA = ('%d/%b/%Y:%H:%M:%S %z', '%d/%b/%Y %H:%M:%S')
+SEGMENTO_ID = re.compile(r'/(?:\d+|[0-9a-f]{8}-[0-9a-f-]{27})(?=/|$)')
+
+
+def _instante(texto):
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.strptime(texto, formato).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+def ler_acessos(linhas):
+    """
+    [(instante, cliente, caminho)] das requisições GET/HEAD do log, em ordem
+    de horário (cliente é o IP, ou '-' no formato do runserver). POSTs ficam
+    de fora: o log não tem o corpo nem a sessão.
+    """
+    acessos = []
+    for linha in linhas:
+        achado = LINHA_ACESSO.match(linha)
+        if not achado or achado['metodo'] not in ('GET', 'HEAD'):
+            continue
+        instante = _instante(achado['data'])
+        if instante is None:
+            continue
+        acessos.append((instante, achado['cliente'] or '-', achado['caminho']))
+    acessos.sort(key=lambda acesso: acesso[0])
+    return acessos
+
+
+def nome_endpoint(caminho):
+    """Agrupa caminhos com ids: /api/resultados/3/?x=1 -> /api/resultados/<id>/."""
+    return SEGMENTO_ID.sub('/<id>', caminho.split('?', 1)[0])
+
+
+async def _reproduzir_um(url_base, livres, estatisticas, caminho):
+    # Reaproveita uma conexão ociosa (keep-alive) ou abre outra se todas estão ocupadas
+    cliente = livres.pop() if livres else ClienteHTTP(url_base)
+    await medir(cliente, estatisticas, nome_endpoint(caminho), 'GET', caminho)
+    livres.append(cliente)
+
+
+async def reproduzir_acessos(url_base, acessos, velocidade=1.0):
+    """
+    Repete `acessos` (de ler_acessos) mantendo os intervalos originais
+    divididos por `velocidade` (2.0 = duas vezes mais rápido). Cada requisição
+    sai no seu horário, sem esperar as anteriores, então requisições lentas
+    abrem mais conexões, como acontece com navegadores de verdade. Retorna
+    Estatisticas; `atrasos` mostra se o próprio gerador ficou para trás.
+    """
+    estatisticas = Estatisticas()
+    livres = []
+    pendentes = set()
+    inicio = time.monotonic()
+    primeiro = acessos[0][0] if acessos else 0
+    try:
+        for instante, _, caminho in acessos:
+            espera = inicio + (instante - primeiro) / velocidade - time.monotonic()
+            if espera > 0:
+                await asyncio.sleep(espera)
+            estatisticas.atrasos.append(max(0.0, -espera) * 1000)
+            tarefa = asyncio.create_task(_reproduzir_um(url_base, livres, estatisticas, caminho))
+            pendentes.add(tarefa)
+            tarefa.add_done_callback(pendentes.discard)
+        if pendentes:
+            await asyncio.gather(*pendentes)
+    finally:
+        for cliente in livres:
+            await cliente.fechar()
+    estatisticas.encerrar()
+    return estatisticas
@@ -0,0 +1,174 @@
+# legislativo/coalescencia.py
+"""
+Coalescência de requisições ("single-flight").
+
+Requisições simultâneas pela mesma chave compartilham uma única execução:
+a primeira calcula o resultado e as demais esperam por ele. Dentro do
+processo isso é feito com threading.Event (ou asyncio.Future nas views
+assíncronas); opcionalmente
+(LEGISLATIVO_COALESCER_ENTRE_PROCESSOS) também entre processos, com uma
+trava e o resultado guardados no cache compartilhado.
+"""
+import asyncio
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import camaras
+
+
+class _Execucao:
+    def __init__(self):
+        self.pronto = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+_em_andamento = {}
+_lock = threading.Lock()
+
+
+def _entre_processos():
+    return getattr(settings, 'LEGISLATIVO_COALESCER_ENTRE_PROCESSOS', False)
+
+
+def _espera_maxima():
+    return getattr(settings, 'LEGISLATIVO_COALESCER_ESPERA_MAXIMA', 5.0)
+
+
+def _calcular_entre_processos(chave, funcao):
+    chave_resultado = f'legislativo:coalescencia:resultado:{chave}'
+    chave_trava = f'legislativo:coalescencia:trava:{chave}'
+
+    resultado = cache.get(chave_resultado)
+    if resultado is not None:
+        return resultado
+
+    espera = _espera_maxima()
+    if cache.add(chave_trava, 1, timeout=espera):
+        try:
+            resultado = funcao()
+            # A chave inclui a versão dos dados, então o resultado pode ficar no cache
+            cache.set(chave_resultado, resultado, timeout=60)
+            return resultado
+        finally:
+            cache.delete(chave_trava)
+
+    # Outro processo está calculando: aguarda o resultado aparecer no cache
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        time.sleep(0.02)
+        resultado = cache.get(chave_resultado)
+        if resultado is not None:
+            return resultado
+        if cache.get(chave_trava) is None:
+            break
+    # O outro processo falhou ou demorou demais: calcula aqui mesmo
+    return funcao()
+
+
+def coalescer(chave, funcao):
+    """
+    Executa `funcao()` uma única vez para todas as chamadas simultâneas com a
+    mesma `chave` e devolve o mesmo resultado (ou exceção) a todas elas.
+    """
+    # Câmaras diferentes nunca compartilham a execução (no cache a chave já leva a câmara)
+    chave_local = (camaras.nome_atual(), chave)
+    with _lock:
+        execucao = _em_andamento.get(chave_local)
+        lider = execucao is None
+        if lider:
+            execucao = _em_andamento[chave_local] = _Execucao()
+
+    if not lider:
+        if not execucao.pronto.wait(_espera_maxima()):
+            return funcao()
+        if execucao.erro is not None:
+            raise execucao.erro
+        return execucao.resultado
+
+    try:
+        if _entre_processos():
+            execucao.resultado = _calcular_entre_processos(chave, funcao)
+        else:
+            execucao.resultado = funcao()
+        return execucao.resultado
+    except Exception as e:
+        execucao.erro = e
+        raise
+    finally:
+        with _lock:
+            _em_andamento.pop(chave_local, None)
+        execucao.pronto.set()
+
+
+# --- Versão assíncrona (views ASGI) ---
+
+_em_andamento_async = {}
+
+
+async def _acalcular_entre_processos(chave, funcao):
+    chave_resultado = f'legislativo:coalescencia:resultado:{chave}'
+    chave_trava = f'legislativo:coalescencia:trava:{chave}'
+
+    resultado = await cache.aget(chave_resultado)
+    if resultado is not None:
+        return resultado
+
+    espera = _espera_maxima()
+    if await cache.aadd(chave_trava, 1, timeout=espera):
+        try:
+            resultado = await funcao()
+            await cache.aset(chave_resultado, resultado, timeout=60)
+            return resultado
+        finally:
+            await cache.adelete(chave_trava)
+
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        await asyncio.sleep(0.02)
+        resultado = await cache.aget(chave_resultado)
+        if resultado is not None:
+            return resultado
+        if await cache.aget(chave_trava) is None:
+            break
+    return await funcao()
+
+
+async def acoalescer(chave, funcao):
+    """Equivalente assíncrono de coalescer(): `funcao` é uma corrotina sem argumentos."""
+    loop = asyncio.get_running_loop()
+    # As Futures pertencem a um event loop; a chave inclui o loop
+    chave_loop = (id(loop), camaras.nome_atual(), chave)
+    futuro = _em_andamento_async.get(chave_loop)
+    if futuro is not None:
+        try:
+            return await asyncio.wait_for(asyncio.shield(futuro), _espera_maxima())
+        except asyncio.TimeoutError:
+            return await funcao()
+        except asyncio.CancelledError:
+            if not futuro.cancelled():
+                raise
+            # O líder foi cancelado: calcula aqui mesmo
+            return await funcao()
+
+    futuro = _em_andamento_async[chave_loop] = loop.create_future()
+    try:
+        if _entre_processos():
+            resultado = await _acalcular_entre_processos(chave, funcao)
+        else:
+            resultado = await funcao()
+        futuro.set_result(resultado)
+        return resultado
+    except Exception as e:
+        futuro.set_exception(e)
+        # Evita o aviso de exceção não lida quando ninguém estava esperando
+        futuro.exception()
+        raise
+    except BaseException:
+        futuro.cancel()
+        raise
+    finally:
+        _em_andamento_async.pop(chave_loop, None)
@@ -0,0 +1,316 @@
+# legislativo/dados_abertos.py
+"""
+Dados abertos das votações, publicados como arquivos estáticos.
+
+Sob MEDIA_ROOT/<LEGISLATIVO_DADOS_ABERTOS_DIR> (ou a mídia da câmara, ver camaras.py; servidos pelo servidor web,
+sem passar pelo Django):
+
+    votacoes/<projeto_id>.json    uma votação encerrada, com o voto de cada vereador
+    legislaturas/<ano>.csv        uma linha por vereador em cada votação da legislatura
+    manifesto.json                índice de todos os arquivos, com SHA-256 e tamanho
+
+Ao encerrar uma votação só os arquivos afetados são regerados: o JSON do
+projeto, o CSV da legislatura dele e o manifesto. Cada arquivo é escrito num
+temporário no mesmo diretório e trocado com os.replace, então quem lê nunca
+vê um arquivo pela metade. O comando `publicar_dados_abertos` regera tudo.
+"""
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.utils import timezone
+
+from . import camaras
+from .models import LEGISLATURA_DURACAO_ANOS, Projeto, VereadorProfile, Voto, VotoArquivado
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFESTO = 'manifesto.json'
+
+COLUNAS_CSV = [
+    'projeto_id', 'tipo', 'titulo', 'autor', 'abertura_voto', 'resultado_final',
+    'vereador_id', 'vereador', 'partido', 'voto', 'data_voto',
+]
+
+_executor = None
+_executor_lock = threading.Lock()
+_manifesto_lock = threading.Lock()
+
+
+def diretorio():
+    return os.path.join(camaras.diretorio_midia(), getattr(settings, 'LEGISLATIVO_DADOS_ABERTOS_DIR', 'dados-abertos'))
+
+
+def _caminho_projeto(projeto_id):
+    return f'votacoes/{projeto_id}.json'
+
+
+def _caminho_legislatura(legislatura):
+    return f'legislaturas/{legislatura}.csv'
+
+
+# --- Conteúdo ---
+
+def _linhas_da_votacao(projeto, votos, perfis):
+    """
+    Uma linha por participante: votantes e vereadores registrados na presença
+    do encerramento. `votos` é um dict vereador_id -> (escolha, data_voto).
+    """
+    participantes = set(votos) | {int(user_id) for user_id in projeto.presenca_encerramento}
+
+    linhas = []
+    for user_id in participantes:
+        nome, partido = perfis.get(user_id, (None, None))
+        escolha, data_voto = votos.get(user_id, (None, None))
+        if escolha is None:
+            escolha = 'AUSENTE' if projeto.presenca_encerramento.get(str(user_id)) == 'AUSENTE' else 'NAO_VOTOU'
+        linhas.append({
+            'vereador_id': user_id,
+            'vereador': nome,
+            'partido': partido,
+            'voto': escolha,
+            'data_voto': data_voto,
+        })
+    linhas.sort(key=lambda linha: (linha['vereador'] or '', linha['vereador_id']))
+    return linhas
+
+
+def _votos_por_projeto(projetos):
+    """
+    Votos de vários projetos, uma consulta por tabela (Voto e, para os
+    arquivados, VotoArquivado): {projeto_id: {vereador_id: (escolha, data_voto)}}.
+    """
+    votos = {projeto.id: {} for projeto in projetos}
+    arquivados = [projeto.id for projeto in projetos if projeto.arquivado]
+    vivos = [projeto.id for projeto in projetos if not projeto.arquivado]
+    for modelo, ids in ((Voto, vivos), (VotoArquivado, arquivados)):
+        if not ids:
+            continue
+        linhas = modelo.objects.filter(projeto_id__in=ids).values_list(
+            'projeto_id', 'vereador_id', 'escolha', 'data_voto',
+        )
+        for projeto_id, vereador_id, escolha, data_voto in linhas:
+            votos[projeto_id][vereador_id] = (escolha, data_voto)
+    return votos
+
+
+def _perfis():
+    return {
+        user_id: (nome, partido)
+        for user_id, nome, partido in VereadorProfile.objects.values_list('user_id', 'nome_completo', 'partido')
+    }
+
+
+def conteudo_projeto(projeto, votos, perfis):
+    linhas = _linhas_da_votacao(projeto, votos, perfis)
+    dados = {
+        'id': projeto.id,
+        'tipo': projeto.tipo,
+        'titulo': projeto.titulo,
+        'autor': projeto.autor,
+        'descricao': projeto.descricao,
+        'quorum_minimo': projeto.quorum_minimo,
+        'legislatura': projeto.legislatura,
+        'abertura_voto': projeto.abertura_voto,
+        'tempo_limite_segundos': projeto.tempo_limite_segundos,
+        'resultado_final': projeto.resultado_final,
+        'totais': {
+            voto: sum(1 for linha in linhas if linha['voto'] == voto)
+            for voto in ('SIM', 'NAO', 'ABSTER', 'AUSENTE', 'NAO_VOTOU')
+        },
+        'votos': linhas,
+    }
+    return json.dumps(dados, cls=DjangoJSONEncoder, ensure_ascii=False, indent=1).encode('utf-8')
+
+
+def _projetos_publicaveis():
+    return Projeto.objects.filter(status='FECHADO', abertura_voto__isnull=False).order_by('abertura_voto', 'id')
+
+
+def _projetos_da_legislatura(legislatura):
+    fuso = timezone.get_current_timezone()
+    inicio = datetime(legislatura, 1, 1, tzinfo=fuso)
+    fim = datetime(legislatura + LEGISLATURA_DURACAO_ANOS, 1, 1, tzinfo=fuso)
+    return list(_projetos_publicaveis().filter(abertura_voto__gte=inicio, abertura_voto__lt=fim))
+
+
+def conteudo_legislatura(projetos, votos, perfis):
+    """CSV de uma legislatura; `projetos` são as votações encerradas dela, em ordem."""
+    saida = io.StringIO()
+    escritor = csv.DictWriter(saida, fieldnames=COLUNAS_CSV, lineterminator='\n')
+    escritor.writeheader()
+    for projeto in projetos:
+        for linha in _linhas_da_votacao(projeto, votos[projeto.id], perfis):
+            escritor.writerow({
+                'projeto_id': projeto.id,
+                'tipo': projeto.tipo,
+                'titulo': projeto.titulo,
+                'autor': projeto.autor or '',
+                'abertura_voto': projeto.abertura_voto.isoformat(),
+                'resultado_final': projeto.resultado_final,
+                **linha,
+                'vereador': linha['vereador'] or '',
+                'partido': linha['partido'] or '',
+                'data_voto': linha['data_voto'].isoformat() if linha['data_voto'] else '',
+            })
+    # BOM: o Excel abre o CSV em UTF-8 com acentos corretos
+    return ('\ufeff' + saida.getvalue()).encode('utf-8')
+
+
+# --- Escrita atômica e manifesto ---
+
+def gravar_atomico(destino, conteudo):
+    """Grava num temporário no mesmo diretório e troca com os.replace: quem lê nunca vê o arquivo pela metade."""
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    fd, temporario = tempfile.mkstemp(dir=os.path.dirname(destino), suffix='.parcial')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(conteudo)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temporario, 0o644)
+        os.replace(temporario, destino)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def _gravar_atomico(relativo, conteudo):
+    gravar_atomico(os.path.join(diretorio(), relativo), conteudo)
+
+
+@contextmanager
+def _manifesto_travado():
+    # Publicações simultâneas (threads ou processos) não podem perder entradas do manifesto
+    with _manifesto_lock:
+        os.makedirs(diretorio(), exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(diretorio(), '.manifesto.lock'), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def ler_manifesto():
+    try:
+        with open(os.path.join(diretorio(), MANIFESTO), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {'arquivos': {}}
+
+
+def _publicar(arquivos, completo=False):
+    """
+    Grava os arquivos {caminho relativo: conteúdo} que mudaram e atualiza o
+    manifesto. Com `completo`, entradas que não estão em `arquivos` saem do
+    manifesto (e do disco). Retorna os caminhos regravados.
+    """
+    with _manifesto_travado():
+        manifesto = ler_manifesto()
+        entradas = manifesto['arquivos']
+        agora = timezone.now().isoformat()
+        regravados = []
+
+        for relativo, conteudo in sorted(arquivos.items()):
+            sha256 = hashlib.sha256(conteudo).hexdigest()
+            atual = entradas.get(relativo)
+            if atual and atual['sha256'] == sha256 and os.path.exists(os.path.join(diretorio(), relativo)):
+                continue
+            _gravar_atomico(relativo, conteudo)
+            entradas[relativo] = {'sha256': sha256, 'tamanho': len(conteudo), 'atualizado_em': agora}
+            regravados.append(relativo)
+
+        if completo:
+            for relativo in set(entradas) - set(arquivos):
+                del entradas[relativo]
+                caminho = os.path.join(diretorio(), relativo)
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+                regravados.append(relativo)
+
+        if regravados:
+            manifesto['gerado_em'] = agora
+            manifesto['arquivos'] = dict(sorted(entradas.items()))
+            _gravar_atomico(MANIFESTO, json.dumps(manifesto, ensure_ascii=False, indent=1).encode('utf-8'))
+    return regravados
+
+
+def publicar_votacao(projeto_id):
+    """Regera o JSON do projeto encerrado e o CSV da legislatura dele."""
+    projeto = Projeto.objects.get(pk=projeto_id)
+    if projeto.status != 'FECHADO' or projeto.abertura_voto is None:
+        return []
+    perfis = _perfis()
+    projetos = _projetos_da_legislatura(projeto.legislatura)
+    votos = _votos_por_projeto(projetos)
+    return _publicar({
+        _caminho_projeto(projeto.id): conteudo_projeto(projeto, votos[projeto.id], perfis),
+        _caminho_legislatura(projeto.legislatura): conteudo_legislatura(projetos, votos, perfis),
+    })
+
+
+def publicar_tudo():
+    """Regera todos os arquivos e remove os de projetos que não estão mais encerrados."""
+    perfis = _perfis()
+    projetos = list(_projetos_publicaveis())
+    votos = _votos_por_projeto(projetos)
+    por_legislatura = {}
+    arquivos = {}
+    for projeto in projetos:
+        arquivos[_caminho_projeto(projeto.id)] = conteudo_projeto(projeto, votos[projeto.id], perfis)
+        por_legislatura.setdefault(projeto.legislatura, []).append(projeto)
+    for legislatura, da_legislatura in por_legislatura.items():
+        arquivos[_caminho_legislatura(legislatura)] = conteudo_legislatura(da_legislatura, votos, perfis)
+    return _publicar(arquivos, completo=True)
+
+
+# --- Execução em segundo plano ---
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Um único worker: as publicações saem em ordem e não disputam o manifesto
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='legislativo-dados-abertos')
+        return _executor
+
+
+def _publicar_em_segundo_plano(projeto_id):
+    try:
+        return publicar_votacao(projeto_id)
+    except Exception:
+        logger.exception("Falha ao publicar os dados abertos do projeto %s", projeto_id)
+        raise
+    finally:
+        connections.close_all()
+
+
+def agendar_publicacao(projeto_id):
+    """
+    Agenda a publicação dos dados abertos da votação encerrada.
+    Com LEGISLATIVO_DADOS_ABERTOS_ASSINCRONO = False a publicação é feita na hora.
+    """
+    if not getattr(settings, 'LEGISLATIVO_DADOS_ABERTOS_ASSINCRONO', True):
+        return publicar_votacao(projeto_id)
+    return _get_executor().submit(camaras.no_contexto(_publicar_em_segundo_plano), projeto_id)
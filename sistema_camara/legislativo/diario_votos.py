@@ -0,0 +1,338 @@
+# legislativo/diario_votos.py
+"""
+Diário de votos: recepção dos votos sem esperar o lock de escrita do banco.
+
+Com LEGISLATIVO_DIARIO_VOTOS_ARQUIVO definido, `votar` valida o voto contra
+o estado dos projetos abertos e dos vereadores presentes guardado em memória
+(recarregado quando a versão dos projetos ou do roster muda), grava uma
+linha JSON no diário com fsync e responde na hora. Um drenador em segundo
+plano aplica as linhas pendentes em Voto, em lotes, uma transação por lote.
+
+O deslocamento já aplicado fica em `<arquivo>.aplicado` e só avança depois
+do commit. Se o processo cair entre o commit e a gravação do deslocamento,
+o lote é reaplicado, e a chave única (projeto, vereador) descarta o que já
+estava gravado: cada voto entra exatamente uma vez, valendo o primeiro.
+Quando tudo foi aplicado o diário é truncado.
+
+Vários processos podem compartilhar o mesmo arquivo: a escrita e a drenagem
+usam flock (onde houver fcntl; sem ele, só dentro de um processo).
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.utils import timezone
+
+from . import camaras, rastreamento, versoes
+from .models import Projeto, VereadorProfile, Voto
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ESCOLHAS = {escolha for escolha, _ in Voto.ESCOLHAS_VOTO}
+
+# Voto recebido e ainda não aplicado (ou já aplicado): bloqueia o segundo voto
+# do mesmo vereador antes mesmo de chegar ao banco
+PREFIXO_RECEBIDO = 'legislativo:diario:'
+TTL_RECEBIDO = 24 * 3600
+
+_locks = {}
+_locks_lock = threading.Lock()
+
+_drenador = None
+_drenador_lock = threading.Lock()
+_sinal = threading.Event()
+# Câmaras com votos a drenar (None: instalação sem câmaras)
+_camaras_pendentes = set()
+
+# Estado em memória por câmara: {câmara: (versão, dados)}, recarregado quando a versão no cache muda
+_projetos_abertos = {}
+_votantes = {}
+
+
+def ativo():
+    return bool(getattr(settings, 'LEGISLATIVO_DIARIO_VOTOS_ARQUIVO', None))
+
+
+def _arquivo():
+    arquivo = str(settings.LEGISLATIVO_DIARIO_VOTOS_ARQUIVO)
+    camara = camaras.nome_atual()
+    if camara is None:
+        return arquivo
+    # Um diário por câmara: <diretório>/<câmara>/<arquivo>
+    return os.path.join(os.path.dirname(arquivo), camara, os.path.basename(arquivo))
+
+
+@contextmanager
+def _travado(sufixo):
+    """Lock exclusivo entre threads (e entre processos, com flock) no arquivo `<diário><sufixo>`."""
+    caminho = _arquivo() + sufixo
+    with _locks_lock:
+        lock = _locks.setdefault(caminho, threading.Lock())
+    with lock:
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(caminho, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# --- Estado em memória usado na validação ---
+
+def projetos_abertos():
+    """{projeto_id: fim do prazo} dos projetos ABERTOS."""
+    camara = camaras.nome_atual()
+    versao = versoes.versao(versoes.PROJETOS)
+    estado = _projetos_abertos.get(camara)
+    if estado is None or estado[0] != versao:
+        estado = _projetos_abertos[camara] = (versao, {
+            projeto_id: abertura + timedelta(seconds=tempo_limite)
+            for projeto_id, abertura, tempo_limite in Projeto.objects.filter(
+                status='ABERTO', abertura_voto__isnull=False,
+            ).values_list('id', 'abertura_voto', 'tempo_limite_segundos')
+        })
+    return estado[1]
+
+
+def votantes():
+    """user_ids dos vereadores que não estão marcados como ausentes."""
+    camara = camaras.nome_atual()
+    versao = versoes.versao(versoes.ROSTER)
+    estado = _votantes.get(camara)
+    if estado is None or estado[0] != versao:
+        estado = _votantes[camara] = (versao, frozenset(
+            VereadorProfile.objects.filter(ausente_na_sessao=False).values_list('user_id', flat=True)
+        ))
+    return estado[1]
+
+
+def _chave_recebido(projeto_id, vereador_id):
+    return f'{PREFIXO_RECEBIDO}{projeto_id}:{vereador_id}'
+
+
+def pendente(projeto_id, vereador_id):
+    """Escolha recebida pelo diário para o vereador (None se não houver)."""
+    return cache.get(_chave_recebido(projeto_id, vereador_id))
+
+
+# --- Recepção ---
+
+def receber(projeto_id, vereador_id, escolha):
+    """
+    Valida e grava o voto no diário. Retorna True se o voto foi aceito ou se
+    o vereador já tinha votado, e False se a validação em memória não é
+    suficiente (projeto fechado ou vencido, ausente, escolha inválida): nesses
+    casos `votar` segue pelo caminho normal, que trata cada situação.
+    """
+    agora = timezone.now()
+    limite = projetos_abertos().get(projeto_id)
+    if limite is None or agora > limite or escolha not in ESCOLHAS or vereador_id not in votantes():
+        return False
+
+    chave = _chave_recebido(projeto_id, vereador_id)
+    if not cache.add(chave, escolha, timeout=TTL_RECEBIDO):
+        return True  # voto repetido: vale o primeiro
+    if Voto.objects.filter(projeto_id=projeto_id, vereador_id=vereador_id).exists():
+        return True
+
+    linha = json.dumps({
+        'projeto_id': projeto_id,
+        'vereador_id': vereador_id,
+        'escolha': escolha,
+        'data_voto': agora.isoformat(),
+    }, separators=(',', ':')) + '\n'
+    try:
+        with _travado('.lock'):
+            with open(_arquivo(), 'a', encoding='utf-8') as f:
+                f.write(linha)
+                f.flush()
+                os.fsync(f.fileno())
+    except OSError:
+        # Não confirmado: o vereador pode tentar de novo
+        cache.delete(chave)
+        raise
+
+    if getattr(settings, 'LEGISLATIVO_DIARIO_VOTOS_ASSINCRONO', True):
+        _garantir_drenador()
+        _camaras_pendentes.add(camaras.atual())
+        _sinal.set()
+    else:
+        drenar()
+    return True
+
+
+# --- Drenagem ---
+
+def _ler_aplicado():
+    try:
+        with open(_arquivo() + '.aplicado', encoding='utf-8') as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _gravar_aplicado(posicao):
+    caminho = _arquivo() + '.aplicado'
+    temporario = f'{caminho}.{os.getpid()}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        f.write(str(posicao))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporario, caminho)
+
+
+def _pendentes(posicao):
+    """Linhas completas depois de `posicao`: [(posição após a linha, dados ou None)]."""
+    try:
+        with open(_arquivo(), 'rb') as f:
+            f.seek(posicao)
+            conteudo = f.read()
+    except FileNotFoundError:
+        return []
+    linhas = []
+    for bruta in conteudo.split(b'\n')[:-1]:  # o último pedaço não tem '\n': linha incompleta
+        posicao += len(bruta) + 1
+        try:
+            linhas.append((posicao, json.loads(bruta)))
+        except ValueError:
+            # Linha corrompida por queda no meio da escrita (nunca foi confirmada ao vereador)
+            logger.error("Linha inválida no diário de votos ignorada: %r", bruta[:200])
+            linhas.append((posicao, None))
+    return linhas
+
+
+def _aplicar(entradas):
+    """
+    Grava um lote em Voto numa transação; (projeto, vereador) repetidos são
+    descartados, assim como votos de projetos que já não estão ABERTOS ou
+    recebidos depois do prazo: a validação em memória de `receber` pode ter
+    aceitado um voto durante o encerramento, e ele não pode entrar depois da
+    apuração.
+    """
+    por_chave = {}
+    for entrada in entradas:
+        por_chave.setdefault((entrada['projeto_id'], entrada['vereador_id']), entrada)
+    prazos = {
+        projeto_id: abertura + timedelta(seconds=tempo_limite)
+        for projeto_id, abertura, tempo_limite in Projeto.objects.filter(
+            id__in={p for p, _ in por_chave}, status='ABERTO', abertura_voto__isnull=False,
+        ).values_list('id', 'abertura_voto', 'tempo_limite_segundos')
+    }
+    vereadores = set(User.objects.filter(id__in={v for _, v in por_chave}).values_list('id', flat=True))
+    votos = []
+    descartados = []
+    for (projeto_id, vereador_id), entrada in por_chave.items():
+        data_voto = datetime.fromisoformat(entrada['data_voto'])
+        if projeto_id in prazos and data_voto <= prazos[projeto_id] and vereador_id in vereadores:
+            votos.append(Voto(
+                projeto_id=projeto_id, vereador_id=vereador_id, escolha=entrada['escolha'], data_voto=data_voto,
+            ))
+        else:
+            descartados.append(_chave_recebido(projeto_id, vereador_id))
+    if descartados:
+        logger.warning("%d voto(s) do diário descartado(s): votação encerrada ou prazo esgotado", len(descartados))
+        # O painel deixa de mostrar esses votos como recebidos
+        cache.delete_many(descartados)
+    inicio = time.perf_counter()
+    with transaction.atomic(using=camaras.alias_principal()):
+        Voto.objects.bulk_create(votos, ignore_conflicts=True)
+    # bulk_create não dispara post_save: invalida os placares aqui
+    for projeto_id in {voto.projeto_id for voto in votos}:
+        versoes.incrementar(versoes.projeto(projeto_id))
+    if votos and rastreamento.ativo():
+        _rastrear_aplicados(votos, (time.perf_counter() - inicio) * 1000)
+    return len(votos)
+
+
+def _rastrear_aplicados(votos, duracao_ms):
+    """
+    Um span voto.aplicado por voto do lote, com o id dele. bulk_create com
+    ignore_conflicts não devolve os ids, então são relidos; o resumo do
+    rastreamento liga cada um ao span votar pelo par (projeto, vereador).
+    """
+    chaves = {(voto.projeto_id, voto.vereador_id) for voto in votos}
+    aplicados = Voto.objects.filter(
+        projeto_id__in={p for p, _ in chaves}, vereador_id__in={v for _, v in chaves},
+    ).values_list('id', 'projeto_id', 'vereador_id')
+    for voto_id, projeto_id, vereador_id in aplicados:
+        if (projeto_id, vereador_id) in chaves:
+            rastreamento.registrar(
+                'voto.aplicado', duracao_ms, projeto_id=projeto_id, vereador_id=vereador_id, voto_id=voto_id,
+            )
+
+
+def drenar():
+    """Aplica tudo o que está pendente no diário. Retorna o número de linhas lidas."""
+    if not ativo():
+        return 0
+    lote = getattr(settings, 'LEGISLATIVO_DIARIO_VOTOS_LOTE', 500)
+    lidas = 0
+    with _travado('.drenagem'):
+        posicao = _ler_aplicado()
+        with _travado('.lock'):
+            linhas = _pendentes(posicao)
+        for inicio in range(0, len(linhas), lote):
+            pedaco = linhas[inicio:inicio + lote]
+            _aplicar([dados for _, dados in pedaco if dados is not None])
+            posicao = pedaco[-1][0]
+            _gravar_aplicado(posicao)
+            lidas += len(pedaco)
+
+        # Tudo aplicado e nada novo escrito nesse meio-tempo: recomeça o arquivo
+        with _travado('.lock'):
+            if os.path.exists(_arquivo()) and os.path.getsize(_arquivo()) == posicao and posicao:
+                # Nessa ordem: uma queda entre os dois passos só causa reaplicação
+                _gravar_aplicado(0)
+                os.truncate(_arquivo(), 0)
+    return lidas
+
+
+def _laco_drenador():
+    intervalo = getattr(settings, 'LEGISLATIVO_DIARIO_VOTOS_INTERVALO', 0.2)
+    while True:
+        # Espera o primeiro voto e dá um intervalo para o lote acumular
+        _sinal.wait()
+        time.sleep(intervalo)
+        _sinal.clear()
+        pendentes = list(_camaras_pendentes)
+        _camaras_pendentes.difference_update(pendentes)
+        for camara in pendentes:
+            try:
+                with camaras.em_camara(camara):
+                    drenar()
+            except Exception:
+                logger.exception("Falha ao drenar o diário de votos (as linhas serão reaplicadas)")
+                _camaras_pendentes.add(camara)
+                _sinal.set()
+            finally:
+                connections.close_all()
+        if _camaras_pendentes:
+            time.sleep(intervalo)
+
+
+def _garantir_drenador():
+    global _drenador
+    with _drenador_lock:
+        if _drenador is None or not _drenador.is_alive():
+            _drenador = threading.Thread(target=_laco_drenador, name='legislativo-diario-votos', daemon=True)
+            _drenador.start()
+            # Linhas deixadas por um processo anterior também são aplicadas
+            _camaras_pendentes.update(camaras.todas() or [None])
+            _sinal.set()
@@ -0,0 +1,156 @@
+# legislativo/estatisticas.py
+"""
+Estatísticas de participação de cada vereador por legislatura.
+
+EstatisticaVereador é atualizada de forma incremental a cada votação
+encerrada (contabilizar_votacao), com um UPDATE por categoria,
+independentemente do tamanho do histórico. recalcular_estatisticas()
+reconstrói a tabela inteira a partir dos votos.
+"""
+from collections import Counter, defaultdict
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+
+from . import camaras
+from .models import EstatisticaVereador, Projeto, VereadorProfile, Voto, VotoArquivado, legislatura_de
+
+CAMPO_POR_ESCOLHA = {
+    'SIM': 'votos_sim',
+    'NAO': 'votos_nao',
+    'ABSTER': 'votos_abster',
+}
+
+ESCOLHA_VENCEDORA = {
+    'APROVADO': 'SIM',
+    'REPROVADO': 'NAO',
+}
+
+
+def registrar_presenca(projeto):
+    """Fotografa a presença dos vereadores em exercício no momento do encerramento."""
+    projeto.presenca_encerramento = {
+        str(user_id): 'AUSENTE' if ausente else 'PRESENTE'
+        for user_id, ausente in VereadorProfile.objects.filter(ativo=True).values_list('user_id', 'ausente_na_sessao')
+    }
+
+
+def _participacoes(votos, presenca, resultado_final):
+    """
+    Para cada vereador da votação, os campos de EstatisticaVereador a incrementar.
+    `votos` é um dict user_id -> escolha. Projetos encerrados antes do registro
+    de presença só têm os votantes como participantes.
+    """
+    vencedora = ESCOLHA_VENCEDORA.get(resultado_final)
+    participantes = {int(user_id) for user_id in presenca} | set(votos)
+
+    for user_id in participantes:
+        campos = ['votacoes']
+        escolha = votos.get(user_id)
+        if escolha in CAMPO_POR_ESCOLHA:
+            campos.append(CAMPO_POR_ESCOLHA[escolha])
+            if escolha == vencedora:
+                campos.append('lado_vencedor')
+        elif presenca.get(str(user_id)) == 'AUSENTE':
+            campos.append('ausencias')
+        else:
+            campos.append('nao_votou')
+        yield user_id, campos
+
+
+def _somar(legislatura, por_campo, delta=1):
+    """Soma `delta` a cada campo dos vereadores em `por_campo` ({campo: [user_id]}), um UPDATE por campo."""
+    existentes = set(User.objects.filter(id__in=set().union(*por_campo.values())).values_list('id', flat=True))
+
+    with transaction.atomic(using=camaras.alias_principal()):
+        if delta > 0:
+            EstatisticaVereador.objects.bulk_create(
+                [EstatisticaVereador(vereador_id=user_id, legislatura=legislatura) for user_id in existentes],
+                ignore_conflicts=True,
+            )
+        da_legislatura = EstatisticaVereador.objects.filter(legislatura=legislatura)
+        for campo, ids in por_campo.items():
+            da_legislatura.filter(vereador_id__in=existentes.intersection(ids)).update(**{campo: F(campo) + delta})
+        if delta < 0:
+            # Quem saiu de todas as votações da legislatura some, como no recálculo
+            da_legislatura.filter(vereador_id__in=existentes, votacoes__lte=0).delete()
+
+
+def contabilizar_votacao(projeto):
+    """Soma uma votação encerrada às estatísticas dos vereadores."""
+    legislatura = projeto.legislatura
+    if legislatura is None:
+        return
+
+    votos = dict(projeto.votos().values_list('vereador_id', 'escolha'))
+    por_campo = defaultdict(list)
+    for user_id, campos in _participacoes(votos, projeto.presenca_encerramento, projeto.resultado_final):
+        for campo in campos:
+            por_campo[campo].append(user_id)
+    if por_campo:
+        _somar(legislatura, por_campo)
+
+
+def descontar_voto(voto):
+    """
+    Voto apagado (ex.: pelo admin) de uma votação já contabilizada: o vereador
+    passa a contar como recalcular_estatisticas() o contaria sem esse voto
+    (não votou, ausente, ou fora da votação).
+    """
+    projeto = Projeto.objects.filter(pk=voto.projeto_id, status='FECHADO').first()
+    if projeto is None or projeto.legislatura is None:
+        return
+
+    # O voto já saiu do banco
+    votos = dict(projeto.votos().values_list('vereador_id', 'escolha'))
+    presenca, resultado = projeto.presenca_encerramento, projeto.resultado_final
+    antes = dict(_participacoes({**votos, voto.vereador_id: voto.escolha}, presenca, resultado))
+    depois = dict(_participacoes(votos, presenca, resultado))
+    diferenca = Counter(depois.get(voto.vereador_id, []))
+    diferenca.subtract(antes.get(voto.vereador_id, []))
+    for delta in (-1, 1):
+        por_campo = {campo: [voto.vereador_id] for campo, n in diferenca.items() if n == delta}
+        if por_campo:
+            _somar(projeto.legislatura, por_campo, delta)
+
+
+def descontar_votacao(projeto):
+    """Projeto encerrado apagado: tira das estatísticas o que sobrou dele depois dos votos (já descontados um a um)."""
+    if projeto.status != 'FECHADO' or projeto.legislatura is None:
+        return
+    por_campo = defaultdict(list)
+    for user_id, campos in _participacoes({}, projeto.presenca_encerramento, projeto.resultado_final):
+        for campo in campos:
+            por_campo[campo].append(user_id)
+    if por_campo:
+        _somar(projeto.legislatura, por_campo, -1)
+
+
+def recalcular_estatisticas():
+    """Reconstrói EstatisticaVereador a partir de todas as votações encerradas."""
+    votos_por_projeto = defaultdict(dict)
+    for modelo in (Voto, VotoArquivado):
+        for projeto_id, user_id, escolha in modelo.objects.filter(projeto__status='FECHADO').values_list(
+            'projeto_id', 'vereador_id', 'escolha'
+        ):
+            votos_por_projeto[projeto_id][user_id] = escolha
+
+    contagens = defaultdict(Counter)
+    projetos = Projeto.objects.filter(status='FECHADO', abertura_voto__isnull=False).values_list(
+        'id', 'abertura_voto', 'resultado_final', 'presenca_encerramento'
+    )
+    for projeto_id, abertura_voto, resultado_final, presenca in projetos:
+        legislatura = legislatura_de(abertura_voto)
+        for user_id, campos in _participacoes(votos_por_projeto[projeto_id], presenca, resultado_final):
+            contagens[(user_id, legislatura)].update(campos)
+
+    existentes = set(User.objects.values_list('id', flat=True))
+    with transaction.atomic(using=camaras.alias_principal()):
+        EstatisticaVereador.objects.all().delete()
+        EstatisticaVereador.objects.bulk_create([
+            EstatisticaVereador(vereador_id=user_id, legislatura=legislatura, **contagem)
+            for (user_id, legislatura), contagem in contagens.items()
+            if user_id in existentes
+        ], batch_size=500)
+    return len(contagens)
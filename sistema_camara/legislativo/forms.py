@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm as BaseUserCreationForm
-from .models import Projeto, VereadorProfile, Cargo
+from django.contrib.auth.models import User
+from .models import Projeto, VereadorProfile, Cargo, TerminalVotacao
 
 # Renomeia para evitar conflito de nome se necessário, mas usa o nome canônico no views.py
 # O erro original era porque UserCreationForm não estava em .forms
@@ -34,3 +35,19 @@ class VereadorProfileForm(forms.ModelForm):
             'ausente_na_sessao'
         ]
 
+
+class TerminalVotacaoForm(forms.ModelForm):
+    # Só vereadores em exercício recebem terminal
+    vereador = forms.ModelChoiceField(
+        queryset=User.objects.filter(vereadorprofile__ativo=True, is_active=True)
+        .select_related('vereadorprofile').order_by('vereadorprofile__nome_completo'),
+        label="Vereador",
+    )
+
+    class Meta:
+        model = TerminalVotacao
+        fields = ['nome', 'vereador']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['vereador'].label_from_instance = lambda user: user.vereadorprofile.nome_completo
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from legislativo.aquecimento import aquecer
+
+
+class Command(BaseCommand):
+    help = (
+        "Executa o aquecimento (conexões, templates, Configuracao, roster, placar dos "
+        "projetos abertos) e mostra o tempo de cada etapa. Os caches preenchidos só "
+        "servem aos workers se o cache for compartilhado (ex.: Redis); cada worker "
+        "também se aquece ao subir."
+    )
+
+    def handle(self, *args, **options):
+        estado = aquecer()
+        for etapa, duracao_ms in estado['etapas'].items():
+            self.stdout.write(f"  {etapa}: {duracao_ms:.1f} ms")
+        if estado['situacao'] != 'pronto':
+            raise CommandError(f"Aquecimento falhou: {estado['erro']}")
+        self.stdout.write(self.style.SUCCESS("Aquecido."))
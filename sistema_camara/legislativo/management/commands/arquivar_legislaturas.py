@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from legislativo import camaras
+from legislativo.arquivo import arquivar, arquivaveis
+
+
+class Command(BaseCommand):
+    help = (
+        "Move os votos dos projetos encerrados de legislaturas passadas para o arquivo "
+        "(VotoArquivado). A legislatura atual nunca é arquivada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ate', type=int, help="Ano inicial da última legislatura a arquivar (padrão: a anterior à atual).")
+        parser.add_argument('--simular', action='store_true', help="Só mostra quantos projetos seriam arquivados.")
+        parser.add_argument('--camara', help="Só a câmara informada (padrão: todas).")
+
+    def handle(self, *args, **options):
+        try:
+            for camara in camaras.para_cada_camara(options['camara']):
+                prefixo = f"[{camara.nome}] " if camara else ""
+                if options['simular']:
+                    total = arquivaveis(options['ate']).count()
+                    self.stdout.write(f"{prefixo}{total} projeto(s) seriam arquivados.")
+                    continue
+                projetos, votos = arquivar(options['ate'])
+                self.stdout.write(self.style.SUCCESS(
+                    f"{prefixo}{projetos} projeto(s) arquivado(s), {votos} voto(s) movido(s)."
+                ))
+        except LookupError as e:
+            raise CommandError(str(e))
@@ -0,0 +1,56 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+
+from legislativo.carga import carga_placar, percentil
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede quantos clientes simultâneos do placar público um servidor em execução "
+        "sustenta. Rode uma vez contra o servidor WSGI e outra contra o ASGI "
+        "(mesmo número de workers) para comparar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help="URL base do servidor, ex.: http://127.0.0.1:8000")
+        parser.add_argument('projeto_id', type=int, help="Projeto consultado em /api/resultados/<id>/.")
+        parser.add_argument(
+            '--clientes', default='10,50,100,200,400',
+            help="Níveis de clientes simultâneos, separados por vírgula.",
+        )
+        parser.add_argument('--duracao', type=float, default=10.0, help="Segundos por nível.")
+        parser.add_argument(
+            '--intervalo', type=float, default=1.0,
+            help="Pausa de cada cliente entre consultas (o placar real consulta a cada 10 s).",
+        )
+        parser.add_argument('--p95-maximo', type=float, default=500.0, help="Latência p95 aceitável (ms).")
+        parser.add_argument('--erro-maximo', type=float, default=0.01, help="Taxa de erro aceitável.")
+
+    def handle(self, *args, **options):
+        caminhos = [('resultados_api', f"/api/resultados/{options['projeto_id']}/")]
+        niveis = [int(n) for n in options['clientes'].split(',')]
+
+        self.stdout.write(f"{'clientes':>9} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'erros':>7}")
+        sustentado = 0
+        for clientes in niveis:
+            estatisticas = asyncio.run(carga_placar(
+                options['url'], caminhos, clientes, options['duracao'], options['intervalo'],
+            ))
+            latencias = estatisticas.todas_latencias()
+            erros = estatisticas.total_erros()
+            total = len(latencias) + erros
+            taxa_erro = erros / total if total else 1.0
+            p95 = percentil(latencias, 95)
+            self.stdout.write(
+                f"{clientes:>9} {total / estatisticas.duracao:>9.1f} {percentil(latencias, 50):>9.1f} "
+                f"{p95:>9.1f} {percentil(latencias, 99):>9.1f} {taxa_erro:>7.1%}"
+            )
+            if p95 <= options['p95_maximo'] and taxa_erro <= options['erro_maximo']:
+                sustentado = clientes
+            else:
+                break
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Clientes simultâneos sustentados (p95 <= {options['p95_maximo']:.0f} ms): {sustentado}"
+        ))
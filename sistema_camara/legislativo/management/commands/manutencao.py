@@ -0,0 +1,76 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from legislativo import camaras
+from legislativo.manutencao import AGENDA, executar_rotina, rotinas_vencidas
+
+logger = logging.getLogger('legislativo.manutencao')
+
+
+class Command(BaseCommand):
+    help = (
+        "Executa as rotinas de manutenção vencidas (tokens e sessões expirados, "
+        "mídias órfãs, ANALYZE/VACUUM e checkpoint do WAL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'rotinas', nargs='*',
+            help=f"Rotinas a executar mesmo que não estejam vencidas: {', '.join(AGENDA)}.",
+        )
+        parser.add_argument(
+            '--todas', action='store_true',
+            help="Executa todas as rotinas, ignorando a agenda.",
+        )
+        parser.add_argument(
+            '--camara',
+            help="Só a câmara informada (padrão: todas as câmaras do deployment).",
+        )
+        parser.add_argument(
+            '--loop', type=int, metavar='SEGUNDOS',
+            help="Continua rodando, verificando a agenda a cada SEGUNDOS.",
+        )
+
+    def handle(self, *args, **options):
+        desconhecidas = set(options['rotinas']) - set(AGENDA)
+        if desconhecidas:
+            raise CommandError(f"Rotina(s) desconhecida(s): {', '.join(sorted(desconhecidas))}")
+        if options['camara'] and not camaras.ativa():
+            raise CommandError("--camara só vale com LEGISLATIVO_CAMARAS configurado.")
+
+        while True:
+            try:
+                # Cada câmara tem o próprio histórico (ExecucaoManutencao) e, portanto, a própria agenda
+                for camara in camaras.para_cada_camara(options['camara']):
+                    if options['todas']:
+                        rotinas = list(AGENDA)
+                    elif options['rotinas']:
+                        rotinas = options['rotinas']
+                    else:
+                        rotinas = rotinas_vencidas()
+
+                    for nome in rotinas:
+                        self.executar(nome, camara)
+            except LookupError as e:
+                raise CommandError(str(e))
+
+            if not options['loop']:
+                break
+            # Nas próximas voltas só a agenda decide o que executar
+            options['todas'] = False
+            options['rotinas'] = []
+            time.sleep(options['loop'])
+
+    def executar(self, nome, camara=None):
+        execucao = executar_rotina(nome)
+        mensagem = f"{nome}: {execucao.linhas_afetadas} afetado(s) em {execucao.duracao_ms} ms"
+        if camara is not None:
+            mensagem = f"[{camara.nome}] {mensagem}"
+        if execucao.sucesso:
+            logger.info(mensagem)
+            self.stdout.write(self.style.SUCCESS(mensagem))
+        else:
+            logger.error("%s (erro: %s)", mensagem, execucao.erro)
+            self.stderr.write(f"{mensagem} - ERRO: {execucao.erro}")
@@ -0,0 +1,21 @@
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from legislativo import camaras
+
+
+class Command(BaseCommand):
+    help = "Aplica as migrações no banco de cada câmara (LEGISLATIVO_CAMARAS)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--camara', help="Só a câmara informada (padrão: todas).")
+
+    def handle(self, *args, **options):
+        if not camaras.ativa():
+            raise CommandError("Nenhuma câmara configurada (LEGISLATIVO_CAMARAS); use `migrate`.")
+        try:
+            for camara in camaras.para_cada_camara(options['camara']):
+                self.stdout.write(f"[{camara.nome}] banco {camara.alias}")
+                call_command('migrate', database=camara.alias, verbosity=options['verbosity'], stdout=self.stdout)
+        except LookupError as e:
+            raise CommandError(str(e))
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from legislativo import camaras
+from legislativo.dados_abertos import diretorio, publicar_tudo, publicar_votacao
+from legislativo.models import Projeto
+
+
+class Command(BaseCommand):
+    help = (
+        "Regera os arquivos de dados abertos das votações encerradas (JSON por "
+        "projeto, CSV por legislatura e manifesto). Sem argumentos, regera tudo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('projetos', nargs='*', type=int, help="Só os projetos informados (ids).")
+        parser.add_argument('--camara', help="Só a câmara informada (padrão: todas; com ids, obrigatório se houver câmaras).")
+
+    def handle(self, *args, **options):
+        if options['projetos'] and camaras.ativa() and not options['camara']:
+            raise CommandError("Informe a câmara dos projetos com --camara.")
+        try:
+            for _ in camaras.para_cada_camara(options['camara']):
+                self.publicar(options['projetos'])
+        except LookupError as e:
+            raise CommandError(str(e))
+
+    def publicar(self, projetos):
+        if projetos:
+            regravados = []
+            for projeto_id in projetos:
+                try:
+                    regravados += publicar_votacao(projeto_id)
+                except Projeto.DoesNotExist:
+                    raise CommandError(f"Projeto {projeto_id} não encontrado.")
+        else:
+            regravados = publicar_tudo()
+
+        for relativo in regravados:
+            self.stdout.write(f"  {relativo}")
+        self.stdout.write(self.style.SUCCESS(f"{len(regravados)} arquivo(s) atualizado(s) em {diretorio()}"))
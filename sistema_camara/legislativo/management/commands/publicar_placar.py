@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from legislativo import camaras
+from legislativo.placar_estatico import diretorio, executar
+
+
+class Command(BaseCommand):
+    help = (
+        "Publica o placar público em arquivos estáticos (index.html e atual.json) e "
+        "os regrava a cada mudança. Roda até ser interrompido; sirva o diretório com "
+        "um servidor estático (nginx) e aponte as TVs do plenário para o index.html."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intervalo', type=float, default=0.5, help="Segundos entre as verificações (padrão: 0.5).")
+        parser.add_argument('--uma-vez', action='store_true', help="Publica uma vez e sai.")
+        parser.add_argument('--camara', help="Só a câmara informada (padrão: todas).")
+
+    def handle(self, *args, **options):
+        try:
+            for camara in camaras.para_cada_camara(options['camara']):
+                prefixo = f"[{camara.nome}] " if camara else ""
+                self.stdout.write(f"{prefixo}Placar estático em {diretorio()}")
+            executar(options['intervalo'], options['camara'], vezes=1 if options['uma_vez'] else None)
+        except LookupError as e:
+            raise CommandError(str(e))
+        except KeyboardInterrupt:
+            pass
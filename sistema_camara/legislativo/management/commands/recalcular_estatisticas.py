@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from legislativo import camaras
+from legislativo.estatisticas import recalcular_estatisticas
+
+
+class Command(BaseCommand):
+    help = "Reconstrói as estatísticas de participação dos vereadores a partir de todas as votações encerradas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--camara', help="Só a câmara informada (padrão: todas).")
+
+    def handle(self, *args, **options):
+        try:
+            for camara in camaras.para_cada_camara(options['camara']):
+                total = recalcular_estatisticas()
+                prefixo = f"[{camara.nome}] " if camara else ""
+                self.stdout.write(self.style.SUCCESS(
+                    f"{prefixo}{total} estatística(s) de vereador por legislatura recalculada(s)."
+                ))
+        except LookupError as e:
+            raise CommandError(str(e))
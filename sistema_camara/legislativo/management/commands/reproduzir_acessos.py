@@ -0,0 +1,49 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+
+from legislativo.carga import formatar_resumo, ler_acessos, percentil, reproduzir_acessos
+
+
+class Command(BaseCommand):
+    help = (
+        "Reproduz um log de acesso gravado (formato comum/combinado do nginx e do "
+        "gunicorn, ou o do runserver) contra um servidor em execução, mantendo os "
+        "intervalos entre as requisições. Só GET/HEAD são repetidos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help="URL base do servidor, ex.: http://127.0.0.1:8000")
+        parser.add_argument('arquivo', help="Log de acesso.")
+        parser.add_argument(
+            '--velocidade', type=float, default=1.0,
+            help="Multiplicador do ritmo original (2 = duas vezes mais rápido).",
+        )
+
+    def handle(self, *args, **options):
+        if options['velocidade'] <= 0:
+            raise CommandError("--velocidade deve ser maior que zero.")
+        try:
+            with open(options['arquivo'], encoding='utf-8', errors='replace') as f:
+                acessos = ler_acessos(f)
+        except OSError as e:
+            raise CommandError(f"Não foi possível ler {options['arquivo']}: {e}")
+        if not acessos:
+            raise CommandError("Nenhuma requisição GET/HEAD reconhecida no log.")
+
+        clientes = len({cliente for _, cliente, _ in acessos})
+        self.stdout.write(
+            f"{len(acessos)} requisição(ões) de {clientes} cliente(s) distinto(s), "
+            f"{(acessos[-1][0] - acessos[0][0]) / options['velocidade']:.1f} s na velocidade {options['velocidade']:g}x"
+        )
+        estatisticas = asyncio.run(reproduzir_acessos(options['url'], acessos, options['velocidade']))
+
+        for linha in formatar_resumo(estatisticas):
+            self.stdout.write(linha)
+        self.stdout.write(
+            f"Atraso em relação ao log: p50 {percentil(estatisticas.atrasos, 50):.1f} ms, "
+            f"p99 {percentil(estatisticas.atrasos, 99):.1f} ms"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Duração: {estatisticas.duracao:.1f} s; erros: {estatisticas.total_erros()}"
+        ))
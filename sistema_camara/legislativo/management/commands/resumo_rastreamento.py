@@ -0,0 +1,67 @@
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from legislativo.carga import percentil
+from legislativo.rastreamento import arquivos_de_spans, ciclos_de_voto, ler_spans
+
+ETAPAS = [
+    ('votar_ms', 'votar (requisição)'),
+    ('insert_ms', 'insert do voto'),
+    ('invalidacao_ms', 'invalidação do cache'),
+    ('diario_ms', 'gravação no diário'),
+    ('ate_aplicacao_ms', 'voto -> aplicado (diário)'),
+    ('ate_montagem_ms', 'voto -> placar montado'),
+    ('montagem_ms', 'montagem do placar'),
+    ('renderizacao_ms', 'renderização (navegador)'),
+    ('ate_exibicao_ms', 'voto -> placar exibido'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Resume os spans do rastreamento do voto: p50/p95/p99 do tempo entre o "
+        "vereador votar e o voto aparecer no placar, por sessão (dia)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--arquivo', help="Arquivo de spans (padrão: LEGISLATIVO_RASTREAMENTO_ARQUIVO, com os backups de rotação).",
+        )
+        parser.add_argument('--sessao', help="Só a sessão do dia informado (AAAA-MM-DD).")
+
+    def handle(self, *args, **options):
+        arquivo = options['arquivo'] or getattr(settings, 'LEGISLATIVO_RASTREAMENTO_ARQUIVO', None)
+        if not arquivo:
+            raise CommandError("Rastreamento desligado: defina LEGISLATIVO_RASTREAMENTO_ARQUIVO ou use --arquivo.")
+        if not arquivos_de_spans(arquivo):
+            raise CommandError(f"Nenhum arquivo de spans encontrado em {arquivo}.")
+
+        # Sessão = dia (horário local) em que o voto foi dado
+        por_sessao = defaultdict(list)
+        for ciclo in ciclos_de_voto(ler_spans(arquivo)):
+            dia = timezone.localtime(datetime.fromtimestamp(ciclo['inicio'], tz=dt_timezone.utc)).date().isoformat()
+            por_sessao[dia].append(ciclo)
+
+        if options['sessao']:
+            por_sessao = {options['sessao']: por_sessao.get(options['sessao'], [])}
+
+        for dia in sorted(por_sessao):
+            ciclos = por_sessao[dia]
+            exibidos = sum(1 for ciclo in ciclos if ciclo['ate_exibicao_ms'] is not None)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"Sessão {dia}: {len(ciclos)} voto(s), {exibidos} com exibição no placar registrada"
+            ))
+            self.stdout.write(f"  {'etapa (ms)':<28} {'p50':>9} {'p95':>9} {'p99':>9} {'n':>6}")
+            for campo, rotulo in ETAPAS:
+                valores = [ciclo[campo] for ciclo in ciclos if ciclo[campo] is not None]
+                if not valores:
+                    self.stdout.write(f"  {rotulo:<28} {'-':>9} {'-':>9} {'-':>9} {0:>6}")
+                    continue
+                self.stdout.write(
+                    f"  {rotulo:<28} {percentil(valores, 50):>9.1f} {percentil(valores, 95):>9.1f} "
+                    f"{percentil(valores, 99):>9.1f} {len(valores):>6}"
+                )
@@ -0,0 +1,70 @@
+import asyncio
+
+from django.core.management.base import BaseCommand, CommandError
+
+from legislativo.carga import formatar_resumo, simular_sessao
+
+
+def _credencial(texto):
+    usuario, separador, senha = texto.strip().partition(':')
+    if not separador or not usuario:
+        raise CommandError(f"Credencial inválida (use usuario:senha): {texto.strip()!r}")
+    return usuario, senha
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula uma sessão plenária contra um servidor em execução: vereadores logados "
+        "acompanham o painel e votam em rajada quando o presidente abre a votação, "
+        "enquanto espectadores anônimos consultam o placar. O projeto deve estar EM_PAUTA."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('url', help="URL base do servidor, ex.: http://127.0.0.1:8000")
+        parser.add_argument('projeto_id', type=int, help="Projeto EM_PAUTA cuja votação será aberta.")
+        parser.add_argument(
+            '--vereadores', required=True, metavar='ARQUIVO',
+            help="Arquivo com uma credencial usuario:senha por linha, uma por vereador simulado.",
+        )
+        parser.add_argument('--presidente', required=True, metavar='USUARIO:SENHA', help="Quem abre a votação.")
+        parser.add_argument('--espectadores', type=int, default=200, help="Placares anônimos abertos.")
+        parser.add_argument('--duracao', type=float, default=60.0, help="Segundos de sessão.")
+        parser.add_argument('--abertura', type=float, default=5.0, help="Segundos até o presidente abrir a votação.")
+        parser.add_argument('--rajada', type=float, default=2.0, help="Janela (s) em que os vereadores votam.")
+        parser.add_argument(
+            '--votos-repetidos', type=int, default=1,
+            help="Envios simultâneos do mesmo voto por vereador (testa a corrida do voto duplicado).",
+        )
+        parser.add_argument('--intervalo-painel', type=float, default=2.0, help="Pausa entre consultas do painel.")
+        parser.add_argument('--intervalo-placar', type=float, default=10.0, help="Pausa entre consultas do placar.")
+        parser.add_argument('--logins-simultaneos', type=int, default=4, help="Logins em paralelo antes da sessão.")
+        parser.add_argument('--semente', type=int, help="Semente dos sorteios (votos e atrasos), para repetir a sessão.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['vereadores'], encoding='utf-8') as f:
+                vereadores = [_credencial(linha) for linha in f if linha.strip() and not linha.startswith('#')]
+        except OSError as e:
+            raise CommandError(f"Não foi possível ler {options['vereadores']}: {e}")
+
+        estatisticas, verificacao = asyncio.run(simular_sessao(
+            options['url'], options['projeto_id'], vereadores, _credencial(options['presidente']),
+            espectadores=options['espectadores'], duracao=options['duracao'], abertura=options['abertura'],
+            rajada=options['rajada'], votos_repetidos=options['votos_repetidos'],
+            intervalo_painel=options['intervalo_painel'], intervalo_placar=options['intervalo_placar'],
+            logins_simultaneos=options['logins_simultaneos'], semente=options['semente'],
+        ))
+
+        for linha in formatar_resumo(estatisticas):
+            self.stdout.write(linha)
+        self.stdout.write(f"Duração: {estatisticas.duracao:.1f} s; erros: {estatisticas.total_erros()}")
+
+        if not verificacao['votacao_aberta']:
+            raise CommandError("A votação não foi aberta (o projeto está EM_PAUTA? o presidente entrou?).")
+        aceitos, computados = verificacao['votos_aceitos'], verificacao['votos_computados']
+        mensagem = f"Votos aceitos: {aceitos}; computados no placar: {computados}"
+        if computados == aceitos:
+            self.stdout.write(self.style.SUCCESS(mensagem))
+        else:
+            # Com o diário de votos, o placar pode levar alguns décimos de segundo para alcançar
+            self.stdout.write(self.style.WARNING(f"{mensagem} (votos perdidos ou duplicados)"))
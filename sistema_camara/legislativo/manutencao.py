@@ -0,0 +1,172 @@
+# legislativo/manutencao.py
+"""
+Rotinas de manutenção executadas pelo comando `manage.py manutencao`.
+
+Cada rotina retorna o número de linhas (ou arquivos) afetados. O comando
+registra cada execução em ExecucaoManutencao, e esse histórico é usado para
+decidir quais rotinas estão vencidas segundo o AGENDA abaixo.
+"""
+import os
+import time
+from datetime import timedelta
+
+from django.apps import apps
+from django.contrib.sessions.models import Session
+from django.db import models
+from django.utils import timezone
+
+from . import camaras
+from .models import ExecucaoManutencao, TokenAtivacao
+from .diario_votos import drenar as drenar_diario_votos
+from .presenca import fechar_expiradas
+
+# Arquivos mais novos que isso não são considerados órfãos (upload em andamento)
+CARENCIA_MIDIA = timedelta(hours=1)
+
+
+def purgar_tokens_expirados():
+    apagados, _ = TokenAtivacao.objects.filter(expira_em__lt=timezone.now()).delete()
+    return apagados
+
+
+def purgar_sessoes_expiradas():
+    apagados, _ = Session.objects.filter(expire_date__lt=timezone.now()).delete()
+    return apagados
+
+
+def _campos_de_arquivo():
+    for model in apps.get_models():
+        for campo in model._meta.get_fields():
+            if isinstance(campo, models.FileField):
+                yield model, campo
+
+
+def _arquivos_referenciados():
+    """Nomes de todos os arquivos apontados por FileFields dos modelos do projeto."""
+    referenciados = set()
+    for model, campo in _campos_de_arquivo():
+        nomes = model._default_manager.exclude(**{campo.name: ''}).exclude(**{f'{campo.name}__isnull': True})
+        referenciados.update(nomes.values_list(campo.name, flat=True))
+    return referenciados
+
+
+def _prefixos_de_upload():
+    """
+    Diretórios (relativos à mídia) onde os FileFields gravam: o upload_to de
+    cada campo e o prefixo do armazenamento deduplicado (documentos/sha256/).
+    Só esses diretórios são varridos; o resto da mídia (dados abertos, placar
+    estático...) pertence a quem o gerou.
+    """
+    prefixos = set()
+    for _, campo in _campos_de_arquivo():
+        prefixo = getattr(campo.storage, 'prefixo', None)
+        if prefixo:
+            prefixos.add(prefixo)
+        if isinstance(campo.upload_to, str) and campo.upload_to:
+            # Só a parte fixa: 'fotos/%Y/' grava em 'fotos/<ano>/'
+            prefixos.add(campo.upload_to.split('%')[0])
+    prefixos = {prefixo.strip('/') for prefixo in prefixos if prefixo.strip('/')}
+    # Um prefixo dentro de outro já é varrido por ele
+    return sorted(p for p in prefixos if not any(p.startswith(outro + '/') for outro in prefixos))
+
+
+def purgar_midias_orfas():
+    raiz = camaras.diretorio_midia()
+    if not os.path.isdir(raiz):
+        return 0
+
+    referenciados = _arquivos_referenciados()
+    limite = time.time() - CARENCIA_MIDIA.total_seconds()
+    removidos = 0
+    for prefixo in _prefixos_de_upload():
+        for diretorio, _, arquivos in os.walk(os.path.join(raiz, prefixo)):
+            for arquivo in arquivos:
+                caminho = os.path.join(diretorio, arquivo)
+                nome = os.path.relpath(caminho, raiz).replace(os.sep, '/')
+                if nome in referenciados or os.path.getmtime(caminho) > limite:
+                    continue
+                os.remove(caminho)
+                removidos += 1
+    return removidos
+
+
+def _executar_sql(*comandos):
+    with camaras.conexao().cursor() as cursor:
+        for comando in comandos:
+            cursor.execute(comando)
+
+
+def otimizar_banco():
+    connection = camaras.conexao()
+    if connection.vendor == 'sqlite':
+        _executar_sql('ANALYZE', 'PRAGMA optimize')
+    elif connection.vendor == 'postgresql':
+        _executar_sql('ANALYZE')
+    return 0
+
+
+def vacuum_banco():
+    connection = camaras.conexao()
+    if connection.vendor in ('sqlite', 'postgresql'):
+        _executar_sql('VACUUM')
+    return 0
+
+
+def checkpoint_wal():
+    connection = camaras.conexao()
+    if connection.vendor != 'sqlite':
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        # (busy, páginas no WAL, páginas copiadas); fora do modo WAL retorna -1
+        linha = cursor.fetchone()
+    return max(linha[2], 0) if linha else 0
+
+
+# nome da rotina -> (função, intervalo mínimo entre execuções)
+AGENDA = {
+    'tokens_expirados': (purgar_tokens_expirados, timedelta(hours=1)),
+    'presencas_expiradas': (fechar_expiradas, timedelta(minutes=1)),
+    # Linhas do diário de votos deixadas por um processo que caiu antes de drenar
+    'diario_votos': (drenar_diario_votos, timedelta(minutes=1)),
+    'sessoes_expiradas': (purgar_sessoes_expiradas, timedelta(days=1)),
+    'midias_orfas': (purgar_midias_orfas, timedelta(days=1)),
+    'checkpoint_wal': (checkpoint_wal, timedelta(hours=1)),
+    'otimizar_banco': (otimizar_banco, timedelta(days=1)),
+    'vacuum_banco': (vacuum_banco, timedelta(days=7)),
+}
+
+
+def rotinas_vencidas(agora=None):
+    agora = agora or timezone.now()
+    ultimas = dict(
+        ExecucaoManutencao.objects.filter(sucesso=True)
+        .values('rotina')
+        .annotate(ultima=models.Max('iniciado_em'))
+        .values_list('rotina', 'ultima')
+    )
+    return [
+        nome for nome, (_, intervalo) in AGENDA.items()
+        if nome not in ultimas or agora - ultimas[nome] >= intervalo
+    ]
+
+
+def executar_rotina(nome):
+    """Executa uma rotina e registra duração e linhas afetadas."""
+    funcao, _ = AGENDA[nome]
+    iniciado_em = timezone.now()
+    inicio = time.monotonic()
+    afetados = 0
+    erro = ''
+    try:
+        afetados = funcao()
+    except Exception as e:
+        erro = str(e)
+    return ExecucaoManutencao.objects.create(
+        rotina=nome,
+        iniciado_em=iniciado_em,
+        duracao_ms=int((time.monotonic() - inicio) * 1000),
+        linhas_afetadas=afetados,
+        sucesso=not erro,
+        erro=erro,
+    )
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legislativo', '0005_projeto_resultado_final_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='projeto',
+            name='tempo_limite_segundos',
+            field=models.IntegerField(default=60),
+        ),
+        migrations.CreateModel(
+            name='AtaVotacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('arquivo', models.FileField(max_length=255, upload_to='atas/votacao/')),
+                ('sha256', models.CharField(db_index=True, max_length=64)),
+                ('formato', models.CharField(choices=[('HTML', 'HTML'), ('PDF', 'PDF')], default='HTML', max_length=4)),
+                ('gerado_em', models.DateTimeField(auto_now=True)),
+                ('projeto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='ata_votacao', to='legislativo.projeto')),
+            ],
+            options={
+                'verbose_name': 'Ata de Votação',
+                'verbose_name_plural': 'Atas de Votação',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:46
+
+import legislativo.armazenamento
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legislativo', '0006_atavotacao'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='configuracao',
+            name='ata_lei_organica',
+            field=models.FileField(blank=True, null=True, storage=legislativo.armazenamento.armazenamento_pdf, upload_to='documentos/ata_lei_organica/', validators=[legislativo.armazenamento.validar_tamanho_pdf], verbose_name='Ata da Lei Orgânica (PDF)'),
+        ),
+        migrations.AlterField(
+            model_name='vereadorprofile',
+            name='ata_posse',
+            field=models.FileField(blank=True, null=True, storage=legislativo.armazenamento.armazenamento_pdf, upload_to='vereadores/atas/', validators=[legislativo.armazenamento.validar_tamanho_pdf], verbose_name='Ata de Posse (PDF)'),
+        ),
+    ]
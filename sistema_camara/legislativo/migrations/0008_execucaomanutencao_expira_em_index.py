@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legislativo', '0007_armazenamento_pdf_deduplicado'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tokenativacao',
+            name='expira_em',
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.CreateModel(
+            name='ExecucaoManutencao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rotina', models.CharField(max_length=50)),
+                ('iniciado_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('duracao_ms', models.IntegerField(default=0)),
+                ('linhas_afetadas', models.IntegerField(default=0)),
+                ('sucesso', models.BooleanField(default=True)),
+                ('erro', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Execução de Manutenção',
+                'verbose_name_plural': 'Execuções de Manutenção',
+                'indexes': [models.Index(fields=['rotina', 'iniciado_em'], name='legislativo_rotina_09df78_idx')],
+            },
+        ),
+    ]
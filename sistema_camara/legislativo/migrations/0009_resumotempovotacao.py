@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legislativo', '0008_execucaomanutencao_expira_em_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoTempoVotacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tempo_limite_segundos', models.IntegerField()),
+                ('total_votos', models.IntegerField(default=0)),
+                ('latencia_minima_ms', models.IntegerField(blank=True, null=True)),
+                ('latencia_media_ms', models.IntegerField(blank=True, null=True)),
+                ('latencia_p50_ms', models.IntegerField(blank=True, null=True)),
+                ('latencia_p90_ms', models.IntegerField(blank=True, null=True)),
+                ('latencia_maxima_ms', models.IntegerField(blank=True, null=True)),
+                ('margem_minima_ms', models.IntegerField(blank=True, null=True)),
+                ('votos_ultimos_10pct', models.IntegerField(default=0)),
+                ('distribuicao', models.JSONField(default=list)),
+                ('calculado_em', models.DateTimeField(auto_now=True)),
+                ('projeto', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='resumo_tempo', to='legislativo.projeto')),
+            ],
+            options={
+                'verbose_name': 'Resumo de Tempo de Votação',
+                'verbose_name_plural': 'Resumos de Tempo de Votação',
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legislativo', '0009_resumotempovotacao'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projeto',
+            name='presenca_encerramento',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.CreateModel(
+            name='EstatisticaVereador',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('legislatura', models.IntegerField(verbose_name='Legislatura (ano inicial)')),
+                ('votacoes', models.IntegerField(default=0, verbose_name='Votações em exercício')),
+                ('votos_sim', models.IntegerField(default=0)),
+                ('votos_nao', models.IntegerField(default=0)),
+                ('votos_abster', models.IntegerField(default=0)),
+                ('ausencias', models.IntegerField(default=0)),
+                ('nao_votou', models.IntegerField(default=0, verbose_name='Presente sem votar')),
+                ('lado_vencedor', models.IntegerField(default=0, verbose_name='Votos no lado vencedor')),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('vereador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='estatisticas', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Estatística de Vereador',
+                'verbose_name_plural': 'Estatísticas de Vereadores',
+                'unique_together': {('vereador', 'legislatura')},
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legislativo', '0010_estatisticavereador_presenca_encerramento'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projeto',
+            index=models.Index(fields=['status', 'abertura_voto'], name='legislativo_status_3cbf53_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='voto',
+            index=models.Index(fields=['projeto', 'escolha'], name='legislativo_projeto_bacb3f_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legislativo', '0011_indices_projeto_voto'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConexaoVereador',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('inicio', models.DateTimeField()),
+                ('fim', models.DateTimeField(blank=True, null=True)),
+                ('vereador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conexoes', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Conexão de Vereador',
+                'verbose_name_plural': 'Conexões de Vereadores',
+                'indexes': [models.Index(fields=['vereador', 'fim'], name='legislativo_vereado_b68524_idx'), models.Index(fields=['inicio'], name='legislativo_inicio_56ca50_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legislativo', '0012_conexao_vereador'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='voto',
+            name='data_voto',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legislativo', '0013_voto_data_voto_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projeto',
+            name='arquivado',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.CreateModel(
+            name='VotoArquivado',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('escolha', models.CharField(choices=[('SIM', 'Sim'), ('NAO', 'Não'), ('ABSTER', 'Abstenção')], max_length=10)),
+                ('data_voto', models.DateTimeField()),
+                ('projeto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='votos_arquivados', to='legislativo.projeto')),
+                ('vereador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='votos_arquivados', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Voto Arquivado',
+                'verbose_name_plural': 'Votos Arquivados',
+                'indexes': [models.Index(fields=['projeto', 'escolha'], name='legislativo_projeto_b43c2d_idx')],
+                'unique_together': {('projeto', 'vereador')},
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 12:42
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legislativo', '0014_arquivo_votos'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminalVotacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100, verbose_name='Terminal (bancada)')),
+                ('codigo_ativacao', models.UUIDField(default=uuid.uuid4, editable=False, unique=True)),
+                ('ativacao_expira_em', models.DateTimeField()),
+                ('criado_em', models.DateTimeField(default=django.utils.timezone.now)),
+                ('ativado_em', models.DateTimeField(blank=True, null=True)),
+                ('revogado_em', models.DateTimeField(blank=True, null=True)),
+                ('criado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('vereador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terminais', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Terminal de Votação',
+                'verbose_name_plural': 'Terminais de Votação',
+            },
+        ),
+    ]
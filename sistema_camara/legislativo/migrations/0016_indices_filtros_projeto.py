@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('legislativo', '0015_terminal_votacao'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='projeto',
+            index=models.Index(fields=['tipo', 'id'], name='legislativo_tipo_18d9b9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projeto',
+            index=models.Index(fields=['resultado_final', 'id'], name='legislativo_resulta_898b18_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projeto',
+            index=models.Index(fields=['arquivado', 'id'], name='legislativo_arquiva_3533ad_idx'),
+        ),
+    ]
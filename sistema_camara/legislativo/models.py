@@ -1,15 +1,18 @@
 # legislativo/models.py
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.cache import cache
 import uuid
 from django.utils import timezone
+from . import versoes
+from .armazenamento import armazenamento_pdf, validar_tamanho_pdf
 
 # Adicionar ao topo junto com os imports existentes
 
 
 class Configuracao(models.Model):
     limite_vereadores = models.IntegerField(default=9, verbose_name="Limite Máximo de Vereadores")
-    ata_lei_organica = models.FileField(upload_to='documentos/ata_lei_organica/', null=True, blank=True, verbose_name="Ata da Lei Orgânica (PDF)")
+    ata_lei_organica = models.FileField(upload_to='documentos/ata_lei_organica/', storage=armazenamento_pdf, validators=[validar_tamanho_pdf], null=True, blank=True, verbose_name="Ata da Lei Orgânica (PDF)")
     
     class Meta:
         verbose_name = "Configuração do Sistema"
@@ -25,12 +28,23 @@ class Configuracao(models.Model):
             return
         return super(Configuracao, self).save(*args, **kwargs)
 
+    @classmethod
+    def atual(cls):
+        """A configuração (ou None), em cache até a próxima alteração."""
+        chave = f'legislativo:configuracao:{versoes.versao(versoes.CONFIGURACAO)}'
+        guardada = cache.get(chave)
+        if guardada is None:
+            # Numa lista: "sem configuração" também fica em cache
+            guardada = [cls.objects.first()]
+            cache.set(chave, guardada, timeout=None)
+        return guardada[0]
+
 
 class TokenAtivacao(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     token = models.UUIDField(default=uuid.uuid4, editable=False)
     criado_em = models.DateTimeField(default=timezone.now)
-    expira_em = models.DateTimeField()
+    expira_em = models.DateTimeField(db_index=True)
 
     def save(self, *args, **kwargs):
         self.expira_em = timezone.now() + timezone.timedelta(hours=24) # Expira em 24h
@@ -60,7 +74,7 @@ class VereadorProfile(models.Model):
     nome_candidatura = models.CharField(max_length=100, blank=True, null=True, verbose_name="Nome de Candidatura")
     partido = models.CharField(max_length=10, blank=True, null=True)
     foto = models.ImageField(upload_to='vereadores/fotos/', null=True, blank=True)
-    ata_posse = models.FileField(upload_to='vereadores/atas/', null=True, blank=True, verbose_name="Ata de Posse (PDF)")
+    ata_posse = models.FileField(upload_to='vereadores/atas/', storage=armazenamento_pdf, validators=[validar_tamanho_pdf], null=True, blank=True, verbose_name="Ata de Posse (PDF)")
     
     # Ausência
     ausente_na_sessao = models.BooleanField(default=False, verbose_name="Ausente na Sessão Atual")
@@ -91,6 +105,18 @@ class VereadorProfile(models.Model):
         return self.cargo_mesa and "Presidente" in self.cargo_mesa.nome
 
 
+# Legislaturas municipais: mandatos de 4 anos iniciados em 1º de janeiro
+# (2021-2024, 2025-2028, ...). A legislatura é identificada pelo ano inicial.
+LEGISLATURA_ANO_BASE = 2021
+LEGISLATURA_DURACAO_ANOS = 4
+
+
+def legislatura_de(data):
+    """Ano inicial da legislatura que contém a data (datetime com fuso)."""
+    ano = timezone.localtime(data).year
+    return ano - (ano - LEGISLATURA_ANO_BASE) % LEGISLATURA_DURACAO_ANOS
+
+
 class Projeto(models.Model):
     # Tipos de Proposição
     TIPO_PROPOSICAO = (
@@ -135,21 +161,42 @@ class Projeto(models.Model):
     tempo_limite_segundos = models.IntegerField(default=60) # Padrão: 60 segundos
     abertura_voto = models.DateTimeField(null=True, blank=True)
     
+    # Presença dos vereadores em exercício no encerramento: {user_id: 'PRESENTE' | 'AUSENTE'}
+    presenca_encerramento = models.JSONField(default=dict, blank=True, editable=False)
+
+    # Votos movidos para VotoArquivado (comando `arquivar_legislaturas`)
+    arquivado = models.BooleanField(default=False, editable=False)
+    
     class Meta:
         verbose_name = "Projeto de Lei"
         verbose_name_plural = "Projetos de Lei"
+        indexes = [
+            models.Index(fields=['status', 'abertura_voto']),
+            # Filtros do admin, na ordem da listagem (-id)
+            models.Index(fields=['tipo', 'id']),
+            models.Index(fields=['resultado_final', 'id']),
+            models.Index(fields=['arquivado', 'id']),
+        ]
 
     def __str__(self):
         return f'{self.get_tipo_display()} N° {self.id}: {self.titulo}'
     
+    @property
+    def legislatura(self):
+        return legislatura_de(self.abertura_voto) if self.abertura_voto else None
+    
+    def votos(self):
+        """Votos do projeto, no arquivo se a legislatura dele já foi arquivada."""
+        return self.votos_arquivados.all() if self.arquivado else self.voto_set.all()
+
     def votos_sim(self):
-        return self.voto_set.filter(escolha='SIM').count()
+        return self.votos().filter(escolha='SIM').count()
     
     def votos_nao(self):
-        return self.voto_set.filter(escolha='NAO').count()
+        return self.votos().filter(escolha='NAO').count()
     
     def votos_abster(self):
-        return self.voto_set.filter(escolha='ABSTER').count()
+        return self.votos().filter(escolha='ABSTER').count()
         
     def calcular_resultado(self):
         """
@@ -202,12 +249,179 @@ class Voto(models.Model):
     projeto = models.ForeignKey(Projeto, on_delete=models.CASCADE)
     vereador = models.ForeignKey(User, on_delete=models.CASCADE)
     escolha = models.CharField(max_length=10, choices=ESCOLHAS_VOTO)
-    data_voto = models.DateTimeField(auto_now_add=True)
+    # Com o diário de votos o voto é gravado depois de recebido: o horário vem de quem grava
+    data_voto = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         unique_together = ('projeto', 'vereador') 
         verbose_name = "Voto de Vereador"
         verbose_name_plural = "Votos de Vereadores"
+        indexes = [models.Index(fields=['projeto', 'escolha'])]
+
+    def __str__(self):
+        return f'{self.vereador.username} votou em {self.projeto.titulo} ({self.escolha})'
+
+
+class VotoArquivado(models.Model):
+    # Votos de legislaturas passadas, movidos de Voto em bloco (ver legislativo/arquivo.py).
+    # Mesmo id e mesmos campos do voto original; só leitura.
+    id = models.BigIntegerField(primary_key=True)
+    projeto = models.ForeignKey(Projeto, on_delete=models.CASCADE, related_name='votos_arquivados')
+    vereador = models.ForeignKey(User, on_delete=models.CASCADE, related_name='votos_arquivados')
+    escolha = models.CharField(max_length=10, choices=Voto.ESCOLHAS_VOTO)
+    data_voto = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('projeto', 'vereador')
+        verbose_name = "Voto Arquivado"
+        verbose_name_plural = "Votos Arquivados"
+        indexes = [models.Index(fields=['projeto', 'escolha'])]
+
+    def __str__(self):
+        return f'{self.vereador_id} votou em {self.projeto_id} ({self.escolha})'
+
+
+class AtaVotacao(models.Model):
+    # Documento de resultado gerado ao encerrar a votação de um projeto.
+    # O arquivo é gravado sob MEDIA_ROOT com nome derivado do SHA-256 do conteúdo.
+    FORMATO_CHOICES = (
+        ('HTML', 'HTML'),
+        ('PDF', 'PDF'),
+    )
+
+    projeto = models.OneToOneField(Projeto, on_delete=models.CASCADE, related_name='ata_votacao')
+    arquivo = models.FileField(upload_to='atas/votacao/', max_length=255)
+    sha256 = models.CharField(max_length=64, db_index=True)
+    formato = models.CharField(max_length=4, choices=FORMATO_CHOICES, default='HTML')
+    gerado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Ata de Votação"
+        verbose_name_plural = "Atas de Votação"
+
+    def __str__(self):
+        return f'Ata de votação do projeto {self.projeto_id}'
+
+
+class ExecucaoManutencao(models.Model):
+    # Histórico das rotinas do comando `manutencao` (também usado como agenda)
+    rotina = models.CharField(max_length=50)
+    iniciado_em = models.DateTimeField(default=timezone.now)
+    duracao_ms = models.IntegerField(default=0)
+    linhas_afetadas = models.IntegerField(default=0)
+    sucesso = models.BooleanField(default=True)
+    erro = models.TextField(blank=True)
+
+    class Meta:
+        verbose_name = "Execução de Manutenção"
+        verbose_name_plural = "Execuções de Manutenção"
+        indexes = [models.Index(fields=['rotina', 'iniciado_em'])]
+
+    def __str__(self):
+        return f'{self.rotina} em {self.iniciado_em:%d/%m/%Y %H:%M}'
+
+
+class ResumoTempoVotacao(models.Model):
+    # Distribuição do tempo de voto de um projeto, materializada ao encerrar a votação
+    projeto = models.OneToOneField(Projeto, on_delete=models.CASCADE, related_name='resumo_tempo')
+    tempo_limite_segundos = models.IntegerField()
+    total_votos = models.IntegerField(default=0)
+
+    # Latência = data do voto - abertura da votação (milissegundos)
+    latencia_minima_ms = models.IntegerField(null=True, blank=True)
+    latencia_media_ms = models.IntegerField(null=True, blank=True)
+    latencia_p50_ms = models.IntegerField(null=True, blank=True)
+    latencia_p90_ms = models.IntegerField(null=True, blank=True)
+    latencia_maxima_ms = models.IntegerField(null=True, blank=True)
+
+    # Proximidade do prazo: folga do último voto e votos nos 10% finais do tempo
+    margem_minima_ms = models.IntegerField(null=True, blank=True)
+    votos_ultimos_10pct = models.IntegerField(default=0)
+
+    # Votos por décimo do tempo limite (10 posições; votos após o prazo contam na última)
+    distribuicao = models.JSONField(default=list)
+
+    calculado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumo de Tempo de Votação"
+        verbose_name_plural = "Resumos de Tempo de Votação"
 
     def __str__(self):
-        return f'{self.vereador.username} votou em {self.projeto.titulo} ({self.escolha})'
\ No newline at end of file
+        return f'Tempo de votação do projeto {self.projeto_id}'
+
+
+class EstatisticaVereador(models.Model):
+    # Participação acumulada de cada vereador por legislatura, atualizada a cada
+    # votação encerrada (ver estatisticas.py)
+    vereador = models.ForeignKey(User, on_delete=models.CASCADE, related_name='estatisticas')
+    legislatura = models.IntegerField(verbose_name="Legislatura (ano inicial)")
+
+    votacoes = models.IntegerField(default=0, verbose_name="Votações em exercício")
+    votos_sim = models.IntegerField(default=0)
+    votos_nao = models.IntegerField(default=0)
+    votos_abster = models.IntegerField(default=0)
+    ausencias = models.IntegerField(default=0)
+    nao_votou = models.IntegerField(default=0, verbose_name="Presente sem votar")
+    lado_vencedor = models.IntegerField(default=0, verbose_name="Votos no lado vencedor")
+
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Estatística de Vereador"
+        verbose_name_plural = "Estatísticas de Vereadores"
+        unique_together = ('vereador', 'legislatura')
+
+    def __str__(self):
+        return f'{self.vereador_id} na legislatura {self.legislatura}'
+
+
+class ConexaoVereador(models.Model):
+    # Período em que o painel do vereador ficou conectado (batidas de presença).
+    # Só é escrito nas transições; as batidas em si ficam no cache (ver presenca.py)
+    vereador = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conexoes')
+    inicio = models.DateTimeField()
+    fim = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Conexão de Vereador"
+        verbose_name_plural = "Conexões de Vereadores"
+        indexes = [models.Index(fields=['vereador', 'fim']), models.Index(fields=['inicio'])]
+
+    def __str__(self):
+        return f'{self.vereador_id} conectado em {self.inicio:%d/%m/%Y %H:%M}'
+
+
+class TerminalVotacao(models.Model):
+    # Terminal fixo de uma bancada do plenário, habilitado pela secretaria para um
+    # vereador. A credencial fica num cookie assinado no próprio terminal (ver terminais.py)
+    nome = models.CharField(max_length=100, verbose_name="Terminal (bancada)")
+    vereador = models.ForeignKey(User, on_delete=models.CASCADE, related_name='terminais')
+    codigo_ativacao = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    ativacao_expira_em = models.DateTimeField()
+    criado_em = models.DateTimeField(default=timezone.now)
+    criado_por = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    ativado_em = models.DateTimeField(null=True, blank=True)
+    revogado_em = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Terminal de Votação"
+        verbose_name_plural = "Terminais de Votação"
+
+    def save(self, *args, **kwargs):
+        if self.ativacao_expira_em is None:
+            self.ativacao_expira_em = timezone.now() + timezone.timedelta(hours=1)  # o código vale 1h
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f'{self.nome} ({self.vereador_id})'
+
+    @property
+    def situacao(self):
+        if self.revogado_em:
+            return 'REVOGADO'
+        if self.ativado_em:
+            return 'ATIVO'
+        if timezone.now() > self.ativacao_expira_em:
+            return 'EXPIRADO'
+        return 'PENDENTE'
@@ -0,0 +1,95 @@
+# legislativo/paginacao.py
+"""
+Paginação por chave (keyset) das listas dos painéis.
+
+Em vez de OFFSET, cada página começa depois da última linha da anterior
+(`WHERE (campo1, campo2) > (v1, v2) ORDER BY campo1, campo2 LIMIT n`), o
+que usa os índices e custa o mesmo em qualquer página. O cursor é opaco
+para o navegador: os valores da última linha em JSON, em base64.
+"""
+import base64
+import json
+
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+TAMANHO_PAGINA = 20
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def _valor_json(valor):
+    # Datas com microssegundos completos: o cursor precisa do valor exato da linha
+    if hasattr(valor, 'isoformat'):
+        return valor.isoformat()
+    return str(valor)
+
+
+def codificar_cursor(valores):
+    dados = json.dumps(valores, default=_valor_json, separators=(',', ':'))
+    return base64.urlsafe_b64encode(dados.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor, campos):
+    try:
+        dados = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        valores = json.loads(dados)
+    except (ValueError, TypeError):
+        raise CursorInvalido(cursor)
+    if not isinstance(valores, list) or len(valores) != campos:
+        raise CursorInvalido(cursor)
+    return valores
+
+
+def _depois_de(ordem, valores):
+    # (a, b) > (va, vb)  =>  a > va OR (a = va AND b > vb), respeitando '-' (decrescente)
+    condicao = Q()
+    iguais = {}
+    for campo, valor in zip(ordem, valores):
+        nome = campo.lstrip('-')
+        operador = 'lt' if campo.startswith('-') else 'gt'
+        condicao |= Q(**iguais, **{f'{nome}__{operador}': valor})
+        iguais[nome] = valor
+    return condicao
+
+
+class Pagina:
+    """
+    Uma página de `queryset` na `ordem` dada (o último campo deve ser único,
+    ex.: ('-id',) ou ('nome_completo', 'pk'); campos sem NULL). A consulta só
+    é feita quando os itens são usados, para não anular os fragmentos em cache
+    dos templates.
+    """
+
+    def __init__(self, queryset, ordem, depois=None, tamanho=TAMANHO_PAGINA):
+        self.ordem = ordem
+        self.tamanho = tamanho
+        queryset = queryset.order_by(*ordem)
+        if depois:
+            queryset = queryset.filter(_depois_de(ordem, decodificar_cursor(depois, len(ordem))))
+        self.queryset = queryset
+
+    @cached_property
+    def _linhas(self):
+        # Uma linha a mais indica se existe próxima página
+        return list(self.queryset[:self.tamanho + 1])
+
+    @property
+    def itens(self):
+        return self._linhas[:self.tamanho]
+
+    @property
+    def proximo(self):
+        """Cursor da próxima página, ou None se esta é a última."""
+        if len(self._linhas) <= self.tamanho:
+            return None
+        ultimo = self._linhas[self.tamanho - 1]
+        return codificar_cursor([getattr(ultimo, campo.lstrip('-')) for campo in self.ordem])
+
+    def __iter__(self):
+        return iter(self.itens)
+
+    def __bool__(self):
+        return bool(self._linhas)
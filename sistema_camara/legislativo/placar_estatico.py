@@ -0,0 +1,116 @@
+# legislativo/placar_estatico.py
+"""
+Placar estático: o placar público publicado em arquivos.
+
+O comando `publicar_placar` roda como um processo à parte e, a cada
+intervalo, monta o placar como o Django montaria e grava sob
+MEDIA_ROOT/<LEGISLATIVO_PLACAR_ESTATICO_DIR> (ou a mídia da câmara, ver
+camaras.py):
+
+    index.html    tela_principal pré-renderizada, que lê o atual.json ao lado
+    atual.json    JSON do projeto exibido (o mesmo da API de resultados), ou null
+
+Um arquivo só é regravado quando o conteúdo muda (com a votação aberta o
+tempo restante muda a cada segundo), num temporário trocado com os.replace:
+o servidor estático nunca entrega um arquivo pela metade. As TVs do plenário
+apontam para o index.html no servidor estático e continuam funcionando com
+os workers do Django ocupados ou reiniciando.
+
+O publicador é outro processo: com o cache local por processo (LocMemCache)
+ele nunca vê as versões incrementadas pelos sinais dos workers. Por isso
+tudo o que é publicado sai do banco a cada rodada, sem os caches por versão:
+o projeto exibido, os votos (inclusive os aplicados pelo diário), o roster
+(nomes, fotos e ausências) e o cabeçalho do projeto, que na tela_principal
+fica num fragmento {% cache %}. Só a presença ao vivo vem do cache: entre
+processos, só com cache compartilhado (ex.: Redis).
+"""
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+from . import camaras, serializacao
+from .dados_abertos import gravar_atomico
+
+logger = logging.getLogger(__name__)
+
+PAGINA = 'index.html'
+DADOS = 'atual.json'
+
+
+def diretorio():
+    return os.path.join(camaras.diretorio_midia(), getattr(settings, 'LEGISLATIVO_PLACAR_ESTATICO_DIR', 'placar'))
+
+
+def _request():
+    request = RequestFactory(HTTP_HOST=camaras.host_padrao()).get('/')
+    request.user = AnonymousUser()
+    return request
+
+
+def conteudo(request=None):
+    """(HTML, JSON) do placar como estão agora."""
+    # A mesma montagem da tela_principal e da API de resultados
+    from .views import _dados_resultados, _resposta_resultados, contexto_tela_principal
+
+    request = request or _request()
+    contexto = contexto_tela_principal()
+    contexto.update(
+        placar_estatico=DADOS,
+        # Sem o beacon de exibição: a página não fala com o Django
+        rastreamento_ativo=False,
+        # Fragmento {% cache %} com chave própria e sem validade: é sempre renderizado
+        fragmentos_ttl=0, versao_projeto_ativo='estatico',
+    )
+    pagina = render_to_string('legislativo/tela_principal.html', contexto, request=request).encode('utf-8')
+
+    projeto = contexto['projeto_ativo']
+    if projeto is None:
+        return pagina, b'null'
+    resposta = _resposta_resultados(request, _dados_resultados(projeto.id), None, serializacao.roster_do_banco())
+    return pagina, resposta.content
+
+
+class Publicador:
+    """Publica o placar de cada câmara quando ele muda; lembra o que já gravou."""
+
+    def __init__(self):
+        self._gravados = {}
+
+    def _gravar(self, relativo, dados):
+        destino = os.path.join(diretorio(), relativo)
+        if self._gravados.get(destino) == dados and os.path.exists(destino):
+            return False
+        gravar_atomico(destino, dados)
+        self._gravados[destino] = dados
+        return True
+
+    def publicar(self):
+        """Publica o placar da câmara atual. Retorna os arquivos regravados."""
+        pagina, dados = conteudo()
+        # A página antes dos dados: quem vê um projeto novo no JSON recarrega e já encontra a página dele
+        return [relativo for relativo, atual in ((PAGINA, pagina), (DADOS, dados)) if self._gravar(relativo, atual)]
+
+
+def executar(intervalo=0.5, nome_camara=None, vezes=None):
+    """Laço do publicador: publica todas as câmaras (ou só `nome_camara`) a cada `intervalo` segundos."""
+    publicador = Publicador()
+    rodadas = 0
+    while vezes is None or rodadas < vezes:
+        inicio = time.monotonic()
+        for camara in camaras.para_cada_camara(nome_camara):
+            try:
+                publicador.publicar()
+            except Exception:
+                # Banco fora do ar ou disco cheio: os arquivos anteriores continuam servidos
+                logger.exception("Falha ao publicar o placar estático%s", f" ({camara.nome})" if camara else "")
+                connections.close_all()
+        rodadas += 1
+        if vezes is None or rodadas < vezes:
+            time.sleep(max(0.0, intervalo - (time.monotonic() - inicio)))
+    return publicador
@@ -0,0 +1,109 @@
+# legislativo/presenca.py
+"""
+Presença ao vivo dos vereadores, a partir das batidas (heartbeats) do painel.
+
+Cada batida só grava no cache o horário da última batida do vereador; o
+banco é escrito apenas nas transições: quando um vereador que estava
+desconectado volta a bater, abre-se uma ConexaoVereador, e ela é fechada
+no logout ou pela rotina `presencas_expiradas` (comando `manutencao`) depois
+que as batidas param. "Conectado agora" = última batida há no máximo
+LEGISLATIVO_PRESENCA_TIMEOUT segundos.
+
+A presença ao vivo é informativa: quem pode votar continua sendo decidido
+por VereadorProfile.ausente_na_sessao.
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import camaras, versoes
+from .models import ConexaoVereador, VereadorProfile
+
+PREFIXO = 'legislativo:presenca:'
+
+# A chave dura bem mais que o timeout: a última batida de quem caiu ainda é
+# usada como fim da conexão
+TTL_BATIDA = 24 * 3600
+
+
+def _chave(user_id):
+    return f'{PREFIXO}{user_id}'
+
+
+def _timeout():
+    return getattr(settings, 'LEGISLATIVO_PRESENCA_TIMEOUT', 15)
+
+
+def _data(instante):
+    return datetime.fromtimestamp(instante, tz=dt_timezone.utc)
+
+
+def _ativa(ultima, agora):
+    return ultima is not None and agora - ultima <= _timeout()
+
+
+def roster():
+    """[(user_id, nome_completo)] dos vereadores em exercício, em cache por versão do roster."""
+    chave = f'{PREFIXO}roster:{versoes.versao(versoes.ROSTER)}'
+    linhas = cache.get(chave)
+    if linhas is None:
+        linhas = list(
+            VereadorProfile.objects.filter(ativo=True).order_by('nome_completo').values_list('user_id', 'nome_completo')
+        )
+        cache.set(chave, linhas, timeout=getattr(settings, 'LEGISLATIVO_FRAGMENTOS_TTL', 3600))
+    return linhas
+
+
+def bater(user_id):
+    """
+    Registra uma batida. Retorna True se o vereador acabou de se conectar
+    (única situação em que o banco é escrito).
+    """
+    agora = time.time()
+    chave = _chave(user_id)
+    ultima = cache.get(chave)
+    cache.set(chave, agora, timeout=TTL_BATIDA)
+    if _ativa(ultima, agora):
+        return False
+
+    with transaction.atomic(using=camaras.alias_principal()):
+        # Conexão anterior que a rotina ainda não fechou termina na última batida vista
+        ConexaoVereador.objects.filter(vereador_id=user_id, fim__isnull=True).update(
+            fim=_data(ultima) if ultima is not None else _data(agora)
+        )
+        ConexaoVereador.objects.create(vereador_id=user_id, inicio=_data(agora))
+    return True
+
+
+def desconectar(user_id):
+    """Fecha a conexão do vereador agora (logout)."""
+    cache.delete(_chave(user_id))
+    return ConexaoVereador.objects.filter(vereador_id=user_id, fim__isnull=True).update(fim=_data(time.time()))
+
+
+def conectados(user_ids):
+    """Subconjunto de `user_ids` com batida recente (uma única leitura no cache)."""
+    agora = time.time()
+    ultimas = cache.get_many([_chave(user_id) for user_id in user_ids])
+    return {user_id for user_id in user_ids if _ativa(ultimas.get(_chave(user_id)), agora)}
+
+
+def fechar_expiradas():
+    """Fecha as conexões abertas cujas batidas pararam; fim = última batida."""
+    abertas = list(ConexaoVereador.objects.filter(fim__isnull=True).values_list('id', 'vereador_id', 'inicio'))
+    if not abertas:
+        return 0
+    agora = time.time()
+    ultimas = cache.get_many([_chave(vereador_id) for _, vereador_id, _ in abertas])
+    fechadas = 0
+    for conexao_id, vereador_id, inicio in abertas:
+        ultima = ultimas.get(_chave(vereador_id))
+        if _ativa(ultima, agora):
+            continue
+        # Sem batida no cache (reinício do cache): a conexão fica com duração zero
+        fim = max(_data(ultima), inicio) if ultima is not None else inicio
+        fechadas += ConexaoVereador.objects.filter(pk=conexao_id, fim__isnull=True).update(fim=fim)
+    return fechadas
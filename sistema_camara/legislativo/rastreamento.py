@@ -0,0 +1,259 @@
+# legislativo/rastreamento.py
+"""
+Rastreamento do ciclo de vida do voto: do clique do vereador até o placar.
+
+Cada etapa é um span gravado como uma linha JSON num arquivo local com
+rotação (LEGISLATIVO_RASTREAMENTO_ARQUIVO). Spans abertos dentro de outro
+span herdam o rastro (trace) dele, inclusive em código chamado por sinais:
+
+    votar                 requisição do vereador (raiz do rastro)
+      voto.insert         INSERT do voto (inclui os sinais post_save)
+        voto.invalidacao  incremento da versão do projeto no cache
+      voto.diario         com o diário de votos, a gravação no diário
+    voto.aplicado         com o diário, o lote que gravou o voto no banco
+    resultados.montagem   cálculo do placar que passa a incluir o voto
+    placar.exibicao       renderização informada pelo navegador (beacon)
+
+A montagem e a exibição registram `ultimo_voto_id`, o maior id de voto
+incluído no placar; é o que liga cada voto ao momento em que apareceu na
+tela (ver o comando `resumo_rastreamento`). Com o diário, o voto ainda não
+tem id ao fim da requisição: o votar registra projeto_id e vereador_id, e o
+voto.aplicado do drenador traz o id para o mesmo par. Sem arquivo
+configurado os spans não são gravados e o custo é só o de medir o tempo.
+"""
+import contextvars
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_span_atual = contextvars.ContextVar('legislativo_span', default=None)
+
+_exportadores = {}
+_exportadores_lock = threading.Lock()
+
+
+class Span:
+
+    def __init__(self, nome, rastro, pai, atributos):
+        self.nome = nome
+        self.rastro = rastro
+        self.id = secrets.token_hex(4)
+        self.pai = pai
+        self.atributos = atributos
+        self.inicio = time.time()
+        self.duracao_ms = None
+
+    def como_dict(self):
+        return {
+            'rastro': self.rastro,
+            'span': self.id,
+            'pai': self.pai,
+            'nome': self.nome,
+            'inicio': round(self.inicio, 6),
+            'duracao_ms': round(self.duracao_ms, 3),
+            'atributos': self.atributos,
+        }
+
+
+def ativo():
+    return bool(getattr(settings, 'LEGISLATIVO_RASTREAMENTO_ARQUIVO', None))
+
+
+def _exportador():
+    """Logger com RotatingFileHandler para o arquivo configurado (um por caminho)."""
+    arquivo = getattr(settings, 'LEGISLATIVO_RASTREAMENTO_ARQUIVO', None)
+    if not arquivo:
+        return None
+    arquivo = str(arquivo)
+    exportador = _exportadores.get(arquivo)
+    if exportador is None:
+        with _exportadores_lock:
+            exportador = _exportadores.get(arquivo)
+            if exportador is None:
+                os.makedirs(os.path.dirname(arquivo) or '.', exist_ok=True)
+                handler = RotatingFileHandler(
+                    arquivo,
+                    maxBytes=getattr(settings, 'LEGISLATIVO_RASTREAMENTO_TAMANHO_MAXIMO', 5 * 1024 * 1024),
+                    backupCount=getattr(settings, 'LEGISLATIVO_RASTREAMENTO_BACKUPS', 5),
+                    encoding='utf-8',
+                )
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                exportador = logging.Logger(f'{__name__}.exportador:{arquivo}')
+                exportador.addHandler(handler)
+                _exportadores[arquivo] = exportador
+    return exportador
+
+
+def exportar(span):
+    exportador = _exportador()
+    if exportador is None:
+        return
+    try:
+        exportador.info(json.dumps(span.como_dict(), ensure_ascii=False, default=str))
+    except Exception:
+        # O rastreamento nunca pode derrubar uma votação
+        logger.exception("Falha ao gravar o span %s", span.nome)
+
+
+@contextmanager
+def span(nome, **atributos):
+    """
+    Mede o bloco e grava o span ao sair. Atributos conhecidos só depois
+    (ex.: o id do voto criado) podem ser acrescentados em `span.atributos`.
+    """
+    pai = _span_atual.get()
+    atual = Span(nome, pai.rastro if pai else secrets.token_hex(8), pai.id if pai else None, atributos)
+    token = _span_atual.set(atual)
+    inicio = time.perf_counter()
+    try:
+        yield atual
+    except BaseException as e:
+        atual.atributos['erro'] = type(e).__name__
+        raise
+    finally:
+        atual.duracao_ms = (time.perf_counter() - inicio) * 1000
+        _span_atual.reset(token)
+        exportar(atual)
+
+
+@contextmanager
+def span_filho(nome, **atributos):
+    """Como span(), mas só grava dentro de um rastro já iniciado (ex.: sinais)."""
+    if _span_atual.get() is None:
+        yield None
+        return
+    with span(nome, **atributos) as atual:
+        yield atual
+
+
+def anotar(**atributos):
+    """Acrescenta atributos ao span em andamento (se houver)."""
+    atual = _span_atual.get()
+    if atual is not None:
+        atual.atributos.update(atributos)
+
+
+def rastrear(nome):
+    """Decorator de view: a requisição inteira vira um span (raiz do rastro)."""
+    def decorador(view):
+        @wraps(view)
+        def _view(request, *args, **kwargs):
+            with span(nome, usuario_id=request.user.id, **kwargs) as atual:
+                response = view(request, *args, **kwargs)
+                atual.atributos['status'] = response.status_code
+                return response
+        return _view
+    return decorador
+
+
+def registrar(nome, duracao_ms, **atributos):
+    """Grava um span já medido fora do servidor (ex.: renderização no navegador), terminando agora."""
+    atual = Span(nome, secrets.token_hex(8), None, atributos)
+    atual.duracao_ms = duracao_ms
+    atual.inicio = time.time() - duracao_ms / 1000
+    exportar(atual)
+    return atual
+
+
+def arquivos_de_spans(arquivo=None):
+    """O arquivo de spans e seus backups de rotação, do mais antigo ao mais recente."""
+    arquivo = str(arquivo or settings.LEGISLATIVO_RASTREAMENTO_ARQUIVO)
+    backups = getattr(settings, 'LEGISLATIVO_RASTREAMENTO_BACKUPS', 5)
+    candidatos = [f'{arquivo}.{n}' for n in range(backups, 0, -1)] + [arquivo]
+    return [caminho for caminho in candidatos if os.path.exists(caminho)]
+
+
+def ler_spans(arquivo=None):
+    for caminho in arquivos_de_spans(arquivo):
+        with open(caminho, encoding='utf-8') as f:
+            for linha in f:
+                try:
+                    yield json.loads(linha)
+                except ValueError:
+                    # Linha truncada (processo interrompido no meio da escrita)
+                    continue
+
+
+def _primeiro_que_inclui(eventos, voto_id, depois_de):
+    # eventos: [(fim, ultimo_voto_id, span)] em ordem de término
+    for fim, ultimo_voto_id, evento in eventos:
+        if fim >= depois_de and ultimo_voto_id is not None and ultimo_voto_id >= voto_id:
+            return evento
+    return None
+
+
+def _ms_ate_o_fim(s, desde):
+    return (s['inicio'] + s['duracao_ms'] / 1000 - desde) * 1000
+
+
+def ciclos_de_voto(spans):
+    """
+    Reconstrói o ciclo de cada voto registrado a partir dos spans. Para cada
+    voto, a montagem e a exibição são as primeiras do mesmo projeto, depois do
+    voto, cujo `ultimo_voto_id` já o inclui. Votos aceitos pelo diário tomam o
+    id do voto.aplicado do mesmo (projeto, vereador), o primeiro deles se o
+    vereador repetiu o voto; os que ainda não foram
+    aplicados (ou foram descartados na drenagem) ficam de fora. Tempos em ms;
+    None quando a etapa não foi registrada (ex.: nenhum placar aberto).
+    """
+    votos = []
+    filhos = {}
+    aplicados = {}
+    montagens = {}
+    exibicoes = {}
+    for s in spans:
+        fim = s['inicio'] + s['duracao_ms'] / 1000
+        atributos = s.get('atributos') or {}
+        if s['nome'] == 'votar' and (atributos.get('voto_id') or atributos.get('diario')):
+            votos.append(s)
+        elif s['nome'] in ('voto.insert', 'voto.invalidacao', 'voto.diario'):
+            filhos.setdefault(s['rastro'], {})[s['nome']] = s
+        elif s['nome'] == 'voto.aplicado':
+            aplicados[(atributos.get('projeto_id'), atributos.get('vereador_id'))] = s
+        elif s['nome'] == 'resultados.montagem':
+            montagens.setdefault(atributos.get('projeto_id'), []).append((fim, atributos.get('ultimo_voto_id'), s))
+        elif s['nome'] == 'placar.exibicao':
+            exibicoes.setdefault(atributos.get('projeto_id'), []).append((fim, atributos.get('ultimo_voto_id'), s))
+    for eventos in list(montagens.values()) + list(exibicoes.values()):
+        eventos.sort(key=lambda evento: evento[0])
+
+    ciclos = []
+    for voto in sorted(votos, key=lambda s: s['inicio']):
+        projeto_id = voto['atributos'].get('projeto_id')
+        voto_id = voto['atributos'].get('voto_id')
+        aplicado = None
+        if voto_id is None:
+            # Um voto repetido também é aceito pelo diário; como no banco, vale o primeiro
+            aplicado = aplicados.pop((projeto_id, voto['atributos'].get('vereador_id')), None)
+            if aplicado is None:
+                continue
+            voto_id = aplicado['atributos']['voto_id']
+        montagem = _primeiro_que_inclui(montagens.get(projeto_id, []), voto_id, voto['inicio'])
+        exibicao = _primeiro_que_inclui(exibicoes.get(projeto_id, []), voto_id, voto['inicio'])
+        etapas = filhos.get(voto['rastro'], {})
+
+        ciclos.append({
+            'inicio': voto['inicio'],
+            'projeto_id': projeto_id,
+            'voto_id': voto_id,
+            'votar_ms': voto['duracao_ms'],
+            'insert_ms': etapas['voto.insert']['duracao_ms'] if 'voto.insert' in etapas else None,
+            'invalidacao_ms': etapas['voto.invalidacao']['duracao_ms'] if 'voto.invalidacao' in etapas else None,
+            'diario_ms': etapas['voto.diario']['duracao_ms'] if 'voto.diario' in etapas else None,
+            'ate_aplicacao_ms': _ms_ate_o_fim(aplicado, voto['inicio']) if aplicado else None,
+            'montagem_ms': montagem['duracao_ms'] if montagem else None,
+            'ate_montagem_ms': _ms_ate_o_fim(montagem, voto['inicio']) if montagem else None,
+            'renderizacao_ms': exibicao['duracao_ms'] if exibicao else None,
+            'ate_exibicao_ms': _ms_ate_o_fim(exibicao, voto['inicio']) if exibicao else None,
+        })
+    return ciclos
@@ -0,0 +1,114 @@
+# legislativo/roteamento.py
+"""
+Roteamento de leitura/escrita entre o banco principal e a réplica.
+
+Somente as views marcadas com @somente_leitura (placar público e API de
+resultados) leem da réplica. Qualquer escrita vai para o banco principal e,
+a partir dela, as leituras da mesma requisição também. Depois de uma escrita
+nos dados do sistema (ex.: `votar`) o navegador recebe um cookie que força
+leituras no principal enquanto a réplica pode estar atrasada.
+
+Com várias câmaras (camaras.py) principal e réplica são os da câmara atual.
+"""
+import contextvars
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from . import camaras
+
+COOKIE_LER_PRINCIPAL = 'ler_principal'
+
+_estado = contextvars.ContextVar('legislativo_roteamento', default=None)
+
+
+def _replica_configurada():
+    return camaras.alias_replica() in connections.databases
+
+
+def _ler_da_replica(request):
+    estado = _estado.get()
+    if estado is not None and COOKIE_LER_PRINCIPAL not in request.COOKIES:
+        estado['ler_replica'] = True
+
+
+def somente_leitura(view):
+    """Marca a view (síncrona ou assíncrona) como segura para ler da réplica."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def _view(request, *args, **kwargs):
+            _ler_da_replica(request)
+            return await view(request, *args, **kwargs)
+    else:
+        @wraps(view)
+        def _view(request, *args, **kwargs):
+            _ler_da_replica(request)
+            return view(request, *args, **kwargs)
+    _view.somente_leitura = True
+    return _view
+
+
+class RoteadorLeituraEscrita:
+
+    def db_for_read(self, model, **hints):
+        estado = _estado.get()
+        if estado and estado['ler_replica'] and not estado['escreveu'] and _replica_configurada():
+            return camaras.alias_replica()
+        return camaras.alias_principal()
+
+    def db_for_write(self, model, **hints):
+        estado = _estado.get()
+        if estado is not None:
+            estado['escreveu'] = True
+            if model._meta.app_label == 'legislativo':
+                estado['escreveu_dados'] = True
+        return camaras.alias_principal()
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Principal e réplica têm o mesmo conteúdo
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # A réplica tem o mesmo esquema do principal
+        return True
+
+
+class RoteamentoBancoMiddleware:
+    """Mantém o estado de roteamento de cada requisição (WSGI e ASGI)."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _estado.set(self._novo_estado())
+        try:
+            return self._marcar_leitura_principal(self.get_response(request))
+        finally:
+            _estado.reset(token)
+
+    async def __acall__(self, request):
+        token = _estado.set(self._novo_estado())
+        try:
+            return self._marcar_leitura_principal(await self.get_response(request))
+        finally:
+            _estado.reset(token)
+
+    def _novo_estado(self):
+        return {'ler_replica': False, 'escreveu': False, 'escreveu_dados': False}
+
+    def _marcar_leitura_principal(self, response):
+        if _estado.get()['escreveu_dados']:
+            response.set_cookie(
+                COOKIE_LER_PRINCIPAL, '1',
+                max_age=getattr(settings, 'LEGISLATIVO_REPLICA_ATRASO_MAXIMO', 5),
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,172 @@
+# legislativo/serializacao.py
+"""
+Serialização do placar (resultados_api).
+
+O roster (id, nome, partido e foto de cada vereador em exercício) quase
+nunca muda, mas é a maior parte da resposta. Ele é codificado em JSON uma
+vez por versão do roster (e por endereço do site, por causa da foto com URL
+absoluta) e guardado em memória; a cada requisição só são emendados os
+campos de cada vereador que mudam (voto e presença), também pré-codificados.
+
+`?fields=votos_sim,votos_nao` devolve só os campos pedidos: o placar que
+mostra apenas os totais não paga pelo roster nem pela presença.
+
+Com o orjson instalado (opcional) ele é usado no lugar do json da biblioteca
+padrão.
+"""
+import json
+import threading
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import camaras, versoes
+from .models import VereadorProfile
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+CAMPOS = (
+    'id', 'titulo', 'status', 'resultado_final', 'tempo_restante',
+    'votos_sim', 'votos_nao', 'votos_abster', 'votos_computados', 'total_vereadores',
+    'vereadores_conectados', 'votos_individuais', 'quorum_necessario', 'ultimo_voto_id',
+)
+
+# Campos que dependem do roster: sem eles, nem o roster nem a presença são consultados
+CAMPOS_ROSTER = {'total_vereadores', 'vereadores_conectados', 'votos_individuais'}
+
+STATUS_VOTO = ('SIM', 'NAO', 'ABSTER', 'NÃO VOTOU', 'AUSENTE')
+
+# Endereços diferentes (hosts, http/https) guardados por versão do roster
+MAXIMO_ENDERECOS = 8
+
+_rosters = {}
+_lock = threading.Lock()
+
+
+class CampoInvalido(ValueError):
+    pass
+
+
+def dumps(dados):
+    """JSON compacto em bytes (orjson quando disponível)."""
+    if orjson is not None:
+        return orjson.dumps(dados)
+    return json.dumps(dados, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def campos_pedidos(texto):
+    """Campos de `?fields=` (None: todos). CampoInvalido se algum não existe."""
+    if not texto:
+        return None
+    campos = {campo.strip() for campo in texto.split(',') if campo.strip()}
+    desconhecidos = campos - set(CAMPOS)
+    if desconhecidos:
+        raise CampoInvalido(', '.join(sorted(desconhecidos)))
+    return campos
+
+
+def precisa_roster(campos):
+    return campos is None or bool(campos & CAMPOS_ROSTER)
+
+
+# Fim de cada item de votos_individuais: ',"voto":"SIM","conectado":true}' (10 combinações)
+_FINAIS = {
+    (status, conectado): b',' + dumps({'voto': status, 'conectado': conectado})[1:]
+    for status in STATUS_VOTO for conectado in (False, True)
+}
+
+
+def _final(status, conectado):
+    final = _FINAIS.get((status, conectado))
+    if final is None:
+        final = b',' + dumps({'voto': status, 'conectado': conectado})[1:]
+    return final
+
+
+class Roster:
+    """Vereadores em exercício numa versão do roster, com os trechos JSON já codificados."""
+
+    def __init__(self, profiles):
+        self.profiles = [
+            (profile.user_id, profile.nome_completo, profile.partido, profile.foto.url if profile.foto else None)
+            for profile in profiles
+        ]
+        self.ids = [user_id for user_id, _, _, _ in self.profiles]
+        self.ausentes = frozenset(profile.user_id for profile in profiles if profile.ausente_na_sessao)
+        self._inicios = {}
+
+    def inicios(self, request):
+        """'{"vereador_id":..,"nome":..,"partido":..,"foto_url":..' de cada vereador, sem fechar o objeto."""
+        endereco = (request.scheme, request.get_host())
+        inicios = self._inicios.get(endereco)
+        if inicios is None:
+            inicios = [
+                dumps({
+                    'vereador_id': user_id,
+                    'nome': nome,
+                    'partido': partido,
+                    'foto_url': request.build_absolute_uri(foto_url) if foto_url else None,
+                })[:-1]
+                for user_id, nome, partido, foto_url in self.profiles
+            ]
+            if len(self._inicios) >= MAXIMO_ENDERECOS:
+                self._inicios.clear()
+            self._inicios[endereco] = inicios
+        return inicios
+
+
+def _consulta_roster():
+    return VereadorProfile.objects.filter(ativo=True).order_by('nome_completo')
+
+
+def _guardar(versao, roster):
+    with _lock:
+        _rosters[camaras.nome_atual()] = (versao, roster)
+    return roster
+
+
+def roster_do_banco():
+    """Roster montado agora, sem passar pela versão em cache (ver placar_estatico.py)."""
+    return Roster(list(_consulta_roster()))
+
+
+def roster():
+    """Roster da versão atual, montado uma vez por processo (e por câmara)."""
+    versao = versoes.versao(versoes.ROSTER)
+    atual = _rosters.get(camaras.nome_atual())
+    if atual is not None and atual[0] == versao:
+        return atual[1]
+    return _guardar(versao, roster_do_banco())
+
+
+async def aroster():
+    versao = await versoes.aversao(versoes.ROSTER)
+    atual = _rosters.get(camaras.nome_atual())
+    if atual is not None and atual[0] == versao:
+        return atual[1]
+    return _guardar(versao, Roster([profile async for profile in _consulta_roster()]))
+
+
+def votos_individuais(request, roster, votos, conectados):
+    """O array votos_individuais já codificado, emendando voto e presença nos trechos do roster."""
+    partes = []
+    for inicio, user_id in zip(roster.inicios(request), roster.ids):
+        status = votos.get(user_id)
+        if status is None:
+            status = 'AUSENTE' if user_id in roster.ausentes else 'NÃO VOTOU'
+        partes.append(inicio + _final(status, user_id in conectados))
+    return b'[' + b','.join(partes) + b']'
+
+
+def resultados(campos_escalares, votos_codificados=None):
+    """
+    Objeto do placar: `campos_escalares` codificados de uma vez e, se houver,
+    votos_individuais (já codificado) emendado no fim do objeto.
+    """
+    corpo = dumps(campos_escalares)
+    if votos_codificados is None:
+        return corpo
+    separador = b',' if len(corpo) > 2 else b''
+    return corpo[:-1] + separador + b'"votos_individuais":' + votos_codificados + b'}'
@@ -0,0 +1,64 @@
+# legislativo/signals.py
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import estatisticas, presenca, rastreamento, versoes
+from .models import Cargo, Configuracao, Projeto, TerminalVotacao, VereadorProfile, Voto, VotoArquivado
+
+
+@receiver([post_save, post_delete], sender=Voto)
+def voto_alterado(sender, instance, **kwargs):
+    with rastreamento.span_filho('voto.invalidacao', projeto_id=instance.projeto_id):
+        versoes.incrementar(versoes.projeto(instance.projeto_id))
+
+
+@receiver([post_save, post_delete], sender=Projeto)
+def projeto_alterado(sender, instance, **kwargs):
+    versoes.incrementar(versoes.projeto(instance.pk))
+    versoes.incrementar(versoes.PROJETOS)
+
+
+# Votos e votações apagados depois de contabilizados (admin): as estatísticas acompanham.
+# Apagar um projeto apaga antes os votos dele, um a um, e só então o projeto.
+@receiver(post_delete, sender=Voto)
+@receiver(post_delete, sender=VotoArquivado)
+def voto_apagado(sender, instance, **kwargs):
+    estatisticas.descontar_voto(instance)
+
+
+@receiver(post_delete, sender=Projeto)
+def projeto_apagado(sender, instance, **kwargs):
+    estatisticas.descontar_votacao(instance)
+
+
+@receiver([post_save, post_delete], sender=VereadorProfile)
+@receiver([post_save, post_delete], sender=Cargo)
+def vereador_alterado(sender, instance, **kwargs):
+    versoes.incrementar(versoes.ROSTER)
+
+
+@receiver([post_save, post_delete], sender=Configuracao)
+def configuracao_alterada(sender, instance, **kwargs):
+    versoes.incrementar(versoes.CONFIGURACAO)
+
+
+@receiver([post_save, post_delete], sender=TerminalVotacao)
+def terminal_alterado(sender, instance, **kwargs):
+    versoes.incrementar(versoes.TERMINAIS)
+
+
+@receiver([post_save, post_delete], sender=User)
+def usuario_alterado(sender, instance, update_fields=None, **kwargs):
+    # Conta desativada ou removida invalida os terminais dela; o last_login do login não
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    versoes.incrementar(versoes.TERMINAIS)
+
+
+@receiver(user_logged_out)
+def vereador_saiu(sender, request, user, **kwargs):
+    # Fim da sessão: fecha a conexão sem esperar a rotina de expiração
+    if user is not None:
+        presenca.desconectar(user.id)
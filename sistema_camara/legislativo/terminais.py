@@ -0,0 +1,102 @@
+# legislativo/terminais.py
+"""
+Terminais de votação: credenciais de dispositivo para as bancadas do plenário.
+
+No início da sessão todos os vereadores entram ao mesmo tempo, e cada login
+paga o hash PBKDF2 da senha. Com um terminal habilitado, o vereador não faz
+login: a secretaria cadastra o terminal da bancada para ele e abre o link de
+ativação (válido por 1 hora, uso único) no próprio terminal. Esse link grava
+no navegador um cookie assinado (django.core.signing, HMAC com a SECRET_KEY)
+com o terminal e o vereador, válido por LEGISLATIVO_TERMINAL_VALIDADE_DIAS.
+
+As views marcadas com @aceita_terminal (painel do vereador, votar e batida de
+presença) autenticam pelo cookie com uma verificação de assinatura e uma
+consulta a um mapa em memória {terminal: vereador} dos terminais ativos.
+O mapa é recarregado quando a versão dos terminais muda (revogação, vereador
+desativado) e, de todo modo, a cada LEGISLATIVO_TERMINAIS_RECARGA_SEGUNDOS:
+com o cache local por processo, a versão só muda no worker que atendeu a
+revogação, e os outros a percebem no máximo nesse intervalo. Nenhuma
+consulta à tabela de sessões ou de usuários por requisição.
+
+Se o navegador também tiver uma sessão de login, a sessão vale: quem entrou
+com usuário e senha num terminal nunca vota como o vereador da bancada.
+"""
+import copy
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core import signing
+
+from . import camaras, versoes
+from .models import TerminalVotacao
+
+COOKIE = 'terminal_votacao'
+SALT = 'legislativo.terminais'
+
+# Estado em memória por câmara: {câmara: (versões, carregado em, {terminal_id: User})}
+_ativos = {}
+
+
+def _validade():
+    return getattr(settings, 'LEGISLATIVO_TERMINAL_VALIDADE_DIAS', 365) * 24 * 3600
+
+
+def _recarga():
+    # Prazo máximo para uma revogação feita em outro processo valer neste
+    return getattr(settings, 'LEGISLATIVO_TERMINAIS_RECARGA_SEGUNDOS', 5)
+
+
+def credencial(terminal):
+    """Valor do cookie do terminal: [terminal_id, vereador_id] assinado e com data."""
+    return signing.dumps([terminal.id, terminal.vereador_id], salt=SALT)
+
+
+def gravar_cookie(response, terminal):
+    response.set_cookie(
+        COOKIE, credencial(terminal), max_age=_validade(),
+        secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite='Lax',
+    )
+    return response
+
+
+def ativos():
+    """{terminal_id: User} dos terminais ativados, não revogados, de contas ativas."""
+    camara = camaras.nome_atual()
+    versao = (versoes.versao(versoes.TERMINAIS), versoes.versao(versoes.ROSTER))
+    agora = time.monotonic()
+    estado = _ativos.get(camara)
+    if estado is None or estado[0] != versao or agora - estado[1] >= _recarga():
+        terminais = TerminalVotacao.objects.filter(
+            ativado_em__isnull=False, revogado_em__isnull=True, vereador__is_active=True,
+        ).select_related('vereador')
+        estado = _ativos[camara] = (versao, agora, {terminal.id: terminal.vereador for terminal in terminais})
+    return estado[2]
+
+
+def autenticar(request):
+    """Vereador do terminal (um User só desta requisição) se o cookie for válido; senão None."""
+    valor = request.COOKIES.get(COOKIE)
+    if not valor or settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return None
+    try:
+        terminal_id, user_id = signing.loads(valor, salt=SALT, max_age=_validade())
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+    user = ativos().get(terminal_id)
+    if user is None or user.id != user_id:
+        return None
+    # O User do mapa é compartilhado entre threads: cada requisição usa uma cópia
+    return copy.copy(user)
+
+
+def aceita_terminal(view):
+    """A view também aceita o vereador autenticado pelo cookie do terminal."""
+    @wraps(view)
+    def _view(request, *args, **kwargs):
+        user = autenticar(request)
+        if user is not None:
+            # Substitui o usuário preguiçoso do AuthenticationMiddleware antes que ele leia a sessão
+            request.user = user
+        return view(request, *args, **kwargs)
+    return _view
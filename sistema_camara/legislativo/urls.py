@@ -1,12 +1,21 @@
 # legislativo/urls.py
+from django.conf import settings
 from django.urls import path
 from . import views
 
 app_name = 'legislativo'
 
+# Sob ASGI o placar público usa as views assíncronas (ver sistema_camara/asgi.py)
+if settings.LEGISLATIVO_VIEWS_ASSINCRONAS:
+    tela_principal = views.tela_principal_async
+    resultados_api = views.resultados_api_async
+else:
+    tela_principal = views.tela_principal
+    resultados_api = views.resultados_api
+
 urlpatterns = [
     # Tela Pública (Placar)
-    path('', views.tela_principal, name='tela_principal'), 
+    path('', tela_principal, name='tela_principal'), 
     
     # URLs de Ativação (Superusuário)
     path('contas/ativar/<uuid:token>/', views.ativar_conta_secretaria, name='ativar_conta_secretaria'),
@@ -19,7 +28,18 @@ urlpatterns = [
     path('secretaria/vereadores/editar/<int:user_id>/', views.editar_vereador, name='editar_vereador'),
     path('secretaria/vereadores/remover/<int:user_id>/', views.remover_vereador, name='remover_vereador'),
     path('secretaria/vereadores/ausencia/<int:user_id>/', views.marcar_ausencia, name='marcar_ausencia'),
+    path('secretaria/terminais/', views.gerenciar_terminais, name='gerenciar_terminais'),
+    path('secretaria/terminais/<int:terminal_id>/revogar/', views.revogar_terminal, name='revogar_terminal'),
+    path('terminal/ativar/<uuid:codigo>/', views.ativar_terminal, name='ativar_terminal'),
     path('presidente/', views.painel_presidente, name='painel_presidente'), 
+    
+    # Páginas seguintes das listas dos painéis (só as linhas, para "Carregar mais")
+    path('secretaria/projetos/', views.projetos_secretaria_parcial, name='projetos_secretaria_parcial'),
+    path('secretaria/vereadores/lista/', views.vereadores_parcial, name='vereadores_parcial'),
+    path('presidente/preparacao/', views.projetos_preparacao_parcial, name='projetos_preparacao_parcial'),
+    path('presidente/pauta/', views.projetos_pauta_parcial, name='projetos_pauta_parcial'),
+    path('presidente/encerrados/', views.projetos_encerrados_parcial, name='projetos_encerrados_parcial'),
+    path('presidente/vereadores/', views.vereadores_ausencia_parcial, name='vereadores_ausencia_parcial'),
     path('votar/<int:projeto_id>/', views.votar, name='votar'),
     
     path('colocar_em_pauta/<int:projeto_id>/', views.colocar_em_pauta, name='colocar_em_pauta'),
@@ -28,5 +48,13 @@ urlpatterns = [
     path('iniciar_votacao/<int:projeto_id>/', views.iniciar_votacao, name='iniciar_votacao'),
     path('encerrar_votacao/<int:projeto_id>/', views.encerrar_votacao, name='encerrar_votacao'),
     
-    path('api/resultados/<int:projeto_id>/', views.resultados_api, name='resultados_api'),
+    path('votacoes/<int:projeto_id>/ata/', views.ata_votacao, name='ata_votacao'),
+    path('api/analises/tempo-votacao/', views.analise_tempo_votacao, name='analise_tempo_votacao'),
+    path('api/vereadores/<int:user_id>/estatisticas/', views.estatisticas_vereador, name='estatisticas_vereador'),
+    
+    path('api/resultados/<int:projeto_id>/', resultados_api, name='resultados_api'),
+    path('api/placar/exibido/', views.placar_exibido, name='placar_exibido'),
+    path('api/presenca/', views.presenca_api, name='presenca_api'),
+    path('api/presenca/batida/', views.presenca_batida, name='presenca_batida'),
+    path('api/saude/', views.saude, name='saude'),
 ]
\ No newline at end of file
@@ -0,0 +1,64 @@
+# legislativo/versoes.py
+"""
+Contadores de versão guardados no cache.
+
+Cada conjunto de dados (o roster de vereadores, os votos de um projeto, ...)
+tem um número de versão incrementado pelos sinais em signals.py sempre que
+muda. Chaves de cache que incluem a versão ficam obsoletas automaticamente.
+
+Uma versão ausente (cache novo ou esvaziado) começa num valor derivado do
+relógio, e não em 1: assim quem guarda dados por versão fora do cache (ex.: o
+estado em memória de diario_votos.py) nunca confunde uma versão nova com uma
+de antes do reinício.
+"""
+import time
+
+from django.core.cache import cache
+
+PREFIXO = 'legislativo:versao:'
+
+ROSTER = 'roster'
+# Qualquer projeto criado, alterado ou removido (listas de pauta e histórico)
+PROJETOS = 'projetos'
+CONFIGURACAO = 'configuracao'
+# Terminais de votação habilitados ou revogados (terminais.py)
+TERMINAIS = 'terminais'
+
+
+def projeto(projeto_id):
+    return f'projeto:{projeto_id}'
+
+
+def _inicial():
+    return time.time_ns() // 1000
+
+
+def versao(nome):
+    chave = PREFIXO + nome
+    valor = cache.get(chave)
+    if valor is None:
+        inicial = _inicial()
+        cache.add(chave, inicial, timeout=None)
+        valor = cache.get(chave, inicial)
+    return valor
+
+
+async def aversao(nome):
+    chave = PREFIXO + nome
+    valor = await cache.aget(chave)
+    if valor is None:
+        inicial = _inicial()
+        await cache.aadd(chave, inicial, timeout=None)
+        valor = await cache.aget(chave, inicial)
+    return valor
+
+
+def incrementar(nome):
+    chave = PREFIXO + nome
+    try:
+        return cache.incr(chave)
+    except ValueError:
+        # Chave ainda não existe (ou foi removida do cache)
+        inicial = _inicial()
+        cache.add(chave, inicial, timeout=None)
+        return cache.get(chave, inicial)
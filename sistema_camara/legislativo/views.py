@@ -1,14 +1,38 @@
 # legislativo/views.py
+import logging
+
 from django.shortcuts import render, get_object_or_404, redirect
+from django.urls import reverse
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse, HttpResponseForbidden
+from django.http import JsonResponse, HttpResponseForbidden, HttpResponse, HttpResponseBadRequest, FileResponse, HttpResponseNotModified, Http404
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.cache import never_cache
 from django.views.decorators.http import require_POST
 from django.utils import timezone
 from datetime import timedelta
 from django.contrib.auth.models import User
-from .models import Projeto, Voto, TokenAtivacao, VereadorProfile, Configuracao
-from .forms import ProjetoForm, UserCreationForm, VereadorProfileForm
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Count, Q
+from django.middleware.csrf import get_token
+from asgiref.sync import sync_to_async
+from .models import Projeto, Voto, TokenAtivacao, VereadorProfile, Configuracao, ResumoTempoVotacao, EstatisticaVereador, TerminalVotacao
+from .analises import materializar_resumo
+from .estatisticas import contabilizar_votacao, registrar_presenca
+from .armazenamento import limitar_uploads_pdf
+from .atas import agendar_geracao_ata, ata_em_cache
+from .dados_abertos import agendar_publicacao
+from .roteamento import somente_leitura, COOKIE_LER_PRINCIPAL
+from .admissao import faixa_prioritaria, faixa_publica
+from .terminais import aceita_terminal
+from .coalescencia import coalescer, acoalescer
+from .paginacao import CursorInvalido, Pagina
+from . import admissao, aquecimento, camaras, diario_votos, presenca, rastreamento, serializacao, terminais, versoes
+from .forms import ProjetoForm, TerminalVotacaoForm, UserCreationForm, VereadorProfileForm
 from django.contrib import messages
+
+logger = logging.getLogger(__name__)
+
 # TOTAL_VEREADORES = User.objects.count() # Removido para evitar erro de importação antes da migração
 
 def check_is_secretaria(user):
@@ -17,6 +41,25 @@ def check_is_secretaria(user):
 def check_is_gerente(user):
     return user.groups.filter(name='Gerente de Votação').exists()
 
+def check_is_presidente(user):
+    profile = getattr(user, 'vereadorprofile', None)
+    return bool(profile and profile.cargo_mesa and profile.cargo_mesa.nome == 'Presidente')
+
+def contexto_fragmentos(*nomes):
+    """Versões usadas nas chaves dos fragmentos {% cache %} dos templates."""
+    contexto = {'fragmentos_ttl': getattr(settings, 'LEGISLATIVO_FRAGMENTOS_TTL', 3600)}
+    for nome in nomes:
+        contexto[f'versao_{nome}'] = versoes.versao(nome)
+    return contexto
+
+def chave_csrf(request):
+    """
+    Segredo CSRF da sessão, para fragmentos em cache que contêm {% csrf_token %}:
+    o token gravado no fragmento continua válido enquanto o segredo não mudar.
+    """
+    get_token(request)  # garante request.META['CSRF_COOKIE']
+    return request.META.get('CSRF_COOKIE', '')
+
 
 
 # --- 1. Autenticação/Ativação da Secretaria ---
@@ -42,22 +85,30 @@ def ativar_conta_secretaria(request, token):
 
     return render(request, 'legislativo/ativacao_sucesso.html', {'user': user})
 
-def tela_principal(request):
-    from .models import VereadorProfile
+def contexto_tela_principal():
+    """Contexto do placar público (também usado pelo placar estático, ver placar_estatico.py)."""
     # Pega o projeto que está ATIVO ou o último FECHADO
     projeto = Projeto.objects.filter(status__in=['ABERTO', 'FECHADO']).order_by('-abertura_voto').first()
     
     # Calcula o total de vereadores ativos
     total_vereadores = VereadorProfile.objects.filter(user__is_active=True).count()
     
-    context = {
+    return {
         'projeto_ativo': projeto,
-        'total_vereadores': total_vereadores
+        'total_vereadores': total_vereadores,
+        'versao_projeto_ativo': versoes.versao(versoes.projeto(projeto.id)) if projeto else None,
+        'rastreamento_ativo': rastreamento.ativo(),
+        **contexto_fragmentos(),
     }
-    return render(request, 'legislativo/tela_principal.html', context)
+
+@faixa_publica
+@somente_leitura
+def tela_principal(request):
+    return render(request, 'legislativo/tela_principal.html', contexto_tela_principal())
 
 
 # --- 2. Painel do Vereador/Gerente ---
+@aceita_terminal
 @login_required
 def painel_vereador(request):
     
@@ -91,6 +142,11 @@ def painel_vereador(request):
             projeto=projeto_ativo, 
             vereador=request.user
         ).first()
+        if voto_vereador is None and diario_votos.ativo():
+            # Voto já recebido pelo diário, ainda não aplicado
+            escolha = diario_votos.pendente(projeto_ativo.id, request.user.id)
+            if escolha:
+                voto_vereador = Voto(projeto=projeto_ativo, vereador=request.user, escolha=escolha)
 
     # Busca projetos na pauta (embora um vereador comum não deva interagir com eles,
     # mantemos a variável para consistência se você quiser exibir algo.)
@@ -102,6 +158,9 @@ def painel_vereador(request):
         'voto_vereador': voto_vereador,
         'vereador_profile': vereador_profile, # Adiciona o perfil do vereador
         'projetos_na_pauta': projetos_na_pauta, # Adicionada para que o template a use se necessário
+        'versao_projeto_ativo': versoes.versao(versoes.projeto(projeto_ativo.id)) if projeto_ativo else None,
+        'presenca_intervalo': getattr(settings, 'LEGISLATIVO_PRESENCA_INTERVALO', 5),
+        **contexto_fragmentos(versoes.ROSTER),
     }
     return render(request, 'legislativo/painel_vereador.html', context)
 
@@ -118,13 +177,13 @@ def painel_presidente(request):
         
     projeto_ativo = Projeto.objects.filter(status='ABERTO').order_by('-abertura_voto').first()
     
-    # Separa projetos por status para melhor organização no template
-    projetos_preparacao = Projeto.objects.filter(status='PREPARACAO').order_by('id')
-    projetos_em_pauta = Projeto.objects.filter(status='EM_PAUTA').order_by('id')
-    projetos_encerrados = Projeto.objects.filter(status='FECHADO').order_by('-abertura_voto')[:5]
+    # Separa projetos por status para melhor organização no template (primeira página de cada lista)
+    projetos_preparacao = _pagina_projetos_preparacao()
+    projetos_em_pauta = _pagina_projetos_pauta()
+    projetos_encerrados = _pagina_projetos_encerrados()
     
     # Vereadores ativos e ausentes
-    vereadores_ativos = VereadorProfile.objects.filter(ativo=True).select_related('user').order_by('nome_completo')
+    vereadores_ativos = _pagina_vereadores_ativos()
 
     context = {
         'projeto_ativo': projeto_ativo,
@@ -132,16 +191,112 @@ def painel_presidente(request):
         'projetos_em_pauta': projetos_em_pauta,      # NOVO
         'projetos_encerrados': projetos_encerrados,
         'vereadores_ativos': vereadores_ativos,
-        'cargo_usuario': profile.cargo_mesa.nome if profile.cargo_mesa else None
+        'cargo_usuario': profile.cargo_mesa.nome if profile.cargo_mesa else None,
+        # As listas acima só são consultadas se o fragmento não estiver em cache
+        'csrf_chave': chave_csrf(request),
+        'presenca_intervalo': getattr(settings, 'LEGISLATIVO_PRESENCA_INTERVALO', 5),
+        **contexto_fragmentos(versoes.PROJETOS, versoes.ROSTER),
     }
     return render(request, 'legislativo/painel_presidente.html', context)
 
 
+# --- 3.1. Listas paginadas dos painéis ---
+# A primeira página vai no painel; as seguintes são buscadas pelo botão
+# "Carregar mais" nas views *_parcial, que renderizam só as linhas.
+
+def _pagina_projetos_secretaria(depois=None):
+    return Pagina(Projeto.objects.filter(status='PREPARACAO'), ('-id',), depois)
+
+def _pagina_projetos_preparacao(depois=None):
+    return Pagina(Projeto.objects.filter(status='PREPARACAO'), ('id',), depois)
+
+def _pagina_projetos_pauta(depois=None):
+    return Pagina(Projeto.objects.filter(status='EM_PAUTA'), ('id',), depois)
+
+def _pagina_projetos_encerrados(depois=None):
+    # Placar de cada projeto numa única consulta (em vez de 3 COUNTs por linha).
+    # Projetos encerrados sem nunca terem sido abertos não entram no histórico.
+    # Os votos de legislaturas arquivadas estão em VotoArquivado (ver arquivo.py).
+    projetos = Projeto.objects.filter(status='FECHADO', abertura_voto__isnull=False).annotate(
+        **{
+            f'total_{nome}': Count('voto', filter=Q(voto__escolha=escolha), distinct=True)
+            + Count('votos_arquivados', filter=Q(votos_arquivados__escolha=escolha), distinct=True)
+            for nome, escolha in (('sim', 'SIM'), ('nao', 'NAO'), ('abster', 'ABSTER'))
+        },
+    )
+    return Pagina(projetos, ('-abertura_voto', '-id'), depois, tamanho=5)
+
+def _pagina_vereadores_ativos(depois=None):
+    vereadores = VereadorProfile.objects.filter(ativo=True).select_related('user', 'cargo_mesa')
+    return Pagina(vereadores, ('nome_completo', 'pk'), depois)
+
+def _pagina_vereadores(depois=None):
+    vereadores = VereadorProfile.objects.select_related('user', 'cargo_mesa')
+    return Pagina(vereadores, ('nome_completo', 'pk'), depois)
+
+def _lista_parcial(request, template, pagina_de):
+    try:
+        pagina = pagina_de(request.GET.get('depois'))
+    except CursorInvalido:
+        return HttpResponseBadRequest("Cursor de paginação inválido.")
+    return render(request, template, {'pagina': pagina})
+
+@login_required
+def projetos_secretaria_parcial(request):
+    if not check_is_secretaria(request.user):
+        return HttpResponseForbidden("Acesso negado. Você não pertence ao grupo Secretaria Geral.")
+    return _lista_parcial(request, 'legislativo/parciais/projetos_secretaria.html', _pagina_projetos_secretaria)
+
+@login_required
+def vereadores_parcial(request):
+    if not check_is_secretaria(request.user):
+        return HttpResponseForbidden("Acesso negado. Você não pertence ao grupo Secretaria Geral.")
+    return _lista_parcial(request, 'legislativo/parciais/vereadores.html', _pagina_vereadores)
+
+@login_required
+def projetos_preparacao_parcial(request):
+    if not check_is_presidente(request.user):
+        return HttpResponseForbidden("Acesso negado. Apenas o Presidente da Câmara pode acessar este painel.")
+    return _lista_parcial(request, 'legislativo/parciais/projetos_preparacao.html', _pagina_projetos_preparacao)
+
+@login_required
+def projetos_pauta_parcial(request):
+    if not check_is_presidente(request.user):
+        return HttpResponseForbidden("Acesso negado. Apenas o Presidente da Câmara pode acessar este painel.")
+    return _lista_parcial(request, 'legislativo/parciais/projetos_pauta.html', _pagina_projetos_pauta)
+
+@login_required
+def projetos_encerrados_parcial(request):
+    if not check_is_presidente(request.user):
+        return HttpResponseForbidden("Acesso negado. Apenas o Presidente da Câmara pode acessar este painel.")
+    return _lista_parcial(request, 'legislativo/parciais/projetos_encerrados.html', _pagina_projetos_encerrados)
+
+@login_required
+def vereadores_ausencia_parcial(request):
+    if not check_is_presidente(request.user):
+        return HttpResponseForbidden("Acesso negado. Apenas o Presidente da Câmara pode acessar este painel.")
+    return _lista_parcial(request, 'legislativo/parciais/vereadores_ausencia.html', _pagina_vereadores_ativos)
+
+
+@faixa_prioritaria
+@aceita_terminal
 @login_required
 @require_POST
+@rastreamento.rastrear('votar')
 def votar(request, projeto_id):
-    projeto = get_object_or_404(Projeto, pk=projeto_id)
     escolha = request.POST.get('escolha') 
+    rastreamento.anotar(projeto_id=projeto_id, vereador_id=request.user.id)
+
+    # 0. Diário de votos: aceito pela validação em memória, responde sem esperar o banco
+    if diario_votos.ativo():
+        with rastreamento.span('voto.diario', projeto_id=projeto_id):
+            aceito = diario_votos.receber(projeto_id, request.user.id, escolha)
+        if aceito:
+            # O id do voto só existe depois da drenagem: o span voto.aplicado o liga a este por (projeto, vereador)
+            rastreamento.anotar(diario=True)
+            return redirect('legislativo:painel_vereador')
+
+    projeto = get_object_or_404(Projeto, pk=projeto_id)
     
     # 1. Validação de Abertura/Tempo
     agora = timezone.now()
@@ -149,10 +304,9 @@ def votar(request, projeto_id):
     
     if projeto.status != 'ABERTO' or agora > limite:
         # Votação não está aberta ou tempo expirou
-        # Se o tempo expirou, encerra a votação automaticamente
+        # Se o tempo expirou, encerra a votação automaticamente (como o presidente encerraria)
         if projeto.status == 'ABERTO' and agora > limite:
-            projeto.status = 'FECHADO'
-            projeto.save()
+            fechar_votacao(projeto)
         return redirect('legislativo:painel_vereador') # Redireciona para o painel do vereador
         
     # 1.5. Validação de Ausência
@@ -168,11 +322,13 @@ def votar(request, projeto_id):
         return redirect('legislativo:painel_vereador')
 
     # 3. Cria e salva o voto
-    Voto.objects.create(
-        projeto=projeto, 
-        vereador=request.user, 
-        escolha=escolha
-    )
+    with rastreamento.span('voto.insert', projeto_id=projeto.id):
+        voto = Voto.objects.create(
+            projeto=projeto, 
+            vereador=request.user, 
+            escolha=escolha
+        )
+    rastreamento.anotar(voto_id=voto.id)
     
     return redirect('legislativo:painel_vereador')
 
@@ -180,6 +336,7 @@ def votar(request, projeto_id):
 def check_is_gerente(user):
     return user.groups.filter(name='Gerente de Votação').exists()
 
+@faixa_prioritaria
 @login_required
 def colocar_em_pauta(request, projeto_id):
     """Coloca um projeto em pauta (status: PREPARACAO -> EM_PAUTA)"""
@@ -201,6 +358,7 @@ def colocar_em_pauta(request, projeto_id):
     messages.success(request, f"Projeto '{projeto.titulo}' colocado em pauta com sucesso!")
     return redirect('legislativo:painel_presidente')
 
+@faixa_prioritaria
 @login_required
 def retirar_da_pauta(request, projeto_id):
     """Retira um projeto da pauta (status: EM_PAUTA -> PREPARACAO)"""
@@ -223,6 +381,7 @@ def retirar_da_pauta(request, projeto_id):
     return redirect('legislativo:painel_presidente')
 
 
+@faixa_prioritaria
 @login_required
 def iniciar_votacao(request, projeto_id):
     """Abre votação de um projeto (status: EM_PAUTA -> ABERTO)"""
@@ -248,6 +407,50 @@ def iniciar_votacao(request, projeto_id):
     messages.success(request, f"Votação do projeto '{projeto.titulo}' iniciada!")
     return redirect('legislativo:painel_presidente')
 
+def fechar_votacao(projeto):
+    """
+    Fecha uma votação ABERTA: apura, fotografa a presença, soma às
+    estatísticas, grava o resumo de tempo e agenda a ata e os dados abertos.
+    É o único caminho para FECHADO (encerramento pelo presidente e prazo
+    esgotado em `votar`). Retorna False, sem fazer nada, se o projeto já
+    não estava aberto: quem chega depois não conta a votação de novo.
+    """
+    alias = camaras.alias_principal()
+
+    # 0. Votos recebidos pelo diário entram antes da apuração
+    diario_votos.drenar()
+
+    with transaction.atomic(using=alias):
+        # Vários votos depois do prazo (e o presidente) podem tentar fechar juntos: só um consegue
+        if not Projeto.objects.filter(pk=projeto.pk, status='ABERTO').update(status='FECHADO'):
+            return False
+
+        # 1. Fecha e salva o resultado (com a presença no momento do encerramento)
+        projeto.status = 'FECHADO'
+        projeto.resultado_final = projeto.calcular_resultado()
+        registrar_presenca(projeto)
+        projeto.save()
+
+        # 2. Grava o resumo de tempo de votação usado no painel de análise
+        materializar_resumo(projeto)
+
+        # 3. Soma a votação às estatísticas dos vereadores
+        contabilizar_votacao(projeto)
+
+        # 4. Gera a ata da votação e regera os dados abertos afetados em segundo plano
+        transaction.on_commit(lambda: agendar_geracao_ata(projeto.id), using=alias)
+        transaction.on_commit(lambda: agendar_publicacao(projeto.id), using=alias)
+
+    # 5. A validação em memória do diário pode ter aceitado votos até aqui: com o
+    # fechamento gravado, a nova versão tira o projeto dos abertos e a segunda
+    # drenagem descarta esses votos (ver diario_votos._aplicar)
+    versoes.incrementar(versoes.projeto(projeto.id))
+    versoes.incrementar(versoes.PROJETOS)
+    diario_votos.drenar()
+    return True
+
+
+@faixa_prioritaria
 @login_required
 def encerrar_votacao(request, projeto_id):
     """Encerra votação de um projeto (status: ABERTO -> FECHADO)"""
@@ -259,103 +462,349 @@ def encerrar_votacao(request, projeto_id):
         return HttpResponseForbidden("Acesso negado. Apenas o Presidente da Câmara pode encerrar votações.")
         
     projeto = get_object_or_404(Projeto, pk=projeto_id)
-    
-    # 1. Calcula o resultado antes de fechar
-    resultado = projeto.calcular_resultado()
-    
-    # 2. Fecha e salva o resultado
-    projeto.status = 'FECHADO'
-    projeto.resultado_final = resultado
-    projeto.save()
-    
-    messages.success(request, f"Votação do projeto '{projeto.titulo}' encerrada. Resultado: {projeto.get_resultado_final_display()}")
-    
-    return redirect('legislativo:painel_presidente')
-    
-    # Só pode encerrar se estiver ABERTO
-    if projeto.status != 'ABERTO':
+
+    # Só pode encerrar se estiver ABERTO (o prazo esgotado em `votar` pode já ter encerrado)
+    if not fechar_votacao(projeto):
+        projeto.refresh_from_db()
         messages.error(request, f"Só é possível encerrar votação de projetos que estão abertos. Status atual: {projeto.get_status_display()}")
         return redirect('legislativo:painel_presidente')
     
-    projeto.status = 'FECHADO'
-    projeto.save()
+    messages.success(request, f"Votação do projeto '{projeto.titulo}' encerrada. Resultado: {projeto.get_resultado_final_display()}")
     
-    messages.success(request, f"Votação do projeto '{projeto.titulo}' encerrada!")
     return redirect('legislativo:painel_presidente')
 
 
+# --- 4.1. Ata da Votação (documento de resultado) ---
+def ata_votacao(request, projeto_id):
+    projeto = get_object_or_404(Projeto, pk=projeto_id, status='FECHADO')
+
+    ata = ata_em_cache(projeto)
+    if ata is None:
+        # Ainda não gerada (ou arquivo removido): agenda e pede para tentar de novo
+        agendar_geracao_ata(projeto.id)
+        resposta = HttpResponse("A ata desta votação está sendo gerada. Tente novamente em instantes.", status=202)
+        resposta['Retry-After'] = '5'
+        return resposta
+
+    etag = f'"{ata.sha256}"'
+    if request.headers.get('If-None-Match') == etag:
+        return HttpResponseNotModified()
+
+    content_type = 'application/pdf' if ata.formato == 'PDF' else 'text/html; charset=utf-8'
+    resposta = FileResponse(ata.arquivo.open('rb'), content_type=content_type)
+    resposta['ETag'] = etag
+    return resposta
+
+
+# --- 4.2. Análise do Tempo de Votação ---
+@login_required
+def analise_tempo_votacao(request):
+    """Resumos pré-calculados ao encerrar cada votação (ver analises.py)."""
+    profile = getattr(request.user, 'vereadorprofile', None)
+    if not (check_is_secretaria(request.user) or (profile and profile.is_presidente)):
+        return HttpResponseForbidden("Acesso negado. Apenas a Secretaria Geral e a Presidência podem ver as análises.")
+
+    resumos = ResumoTempoVotacao.objects.select_related('projeto').order_by('-projeto__abertura_voto')[:50]
+
+    projetos = []
+    for resumo in resumos:
+        projetos.append({
+            'projeto_id': resumo.projeto_id,
+            'titulo': resumo.projeto.titulo,
+            'abertura_voto': resumo.projeto.abertura_voto,
+            'tempo_limite_segundos': resumo.tempo_limite_segundos,
+            'total_votos': resumo.total_votos,
+            'latencia_minima_ms': resumo.latencia_minima_ms,
+            'latencia_media_ms': resumo.latencia_media_ms,
+            'latencia_p50_ms': resumo.latencia_p50_ms,
+            'latencia_p90_ms': resumo.latencia_p90_ms,
+            'latencia_maxima_ms': resumo.latencia_maxima_ms,
+            'margem_minima_ms': resumo.margem_minima_ms,
+            'votos_ultimos_10pct': resumo.votos_ultimos_10pct,
+            'distribuicao': resumo.distribuicao,
+        })
+
+    total_votos = sum(p['total_votos'] for p in projetos)
+    return JsonResponse({
+        'projetos': projetos,
+        'total_votos': total_votos,
+        'fracao_votos_ultimos_10pct': (
+            sum(p['votos_ultimos_10pct'] for p in projetos) / total_votos if total_votos else None
+        ),
+    })
+
+
+# --- 4.3. Estatísticas de Participação dos Vereadores ---
+@somente_leitura
+def estatisticas_vereador(request, user_id):
+    profile = get_object_or_404(VereadorProfile, user_id=user_id)
+    estatisticas = EstatisticaVereador.objects.filter(vereador_id=user_id).order_by('-legislatura')
+
+    return JsonResponse({
+        'vereador_id': profile.user_id,
+        'nome': profile.nome_completo,
+        'partido': profile.partido,
+        'legislaturas': [
+            {
+                'legislatura': e.legislatura,
+                'votacoes': e.votacoes,
+                'votos_sim': e.votos_sim,
+                'votos_nao': e.votos_nao,
+                'votos_abster': e.votos_abster,
+                'ausencias': e.ausencias,
+                'nao_votou': e.nao_votou,
+                'lado_vencedor': e.lado_vencedor,
+            }
+            for e in estatisticas
+        ],
+    })
+
+
 # --- 5. API de Resultados em Tempo Real ---
-def resultados_api(request, projeto_id):
-    projeto = get_object_or_404(Projeto, pk=projeto_id)
-    agora = timezone.now()
+def _montar_dados_resultados(projeto, linhas_votos):
+    """
+    Parte do placar que depende só do banco (projeto e contagem). `linhas_votos`
+    são tuplas (voto_id, vereador_id, escolha). O resultado é compartilhado
+    entre requisições simultâneas, por isso não depende da requisição nem do
+    horário; o roster vem de serializacao.roster().
+    """
+    votos = {vereador_id: escolha for _, vereador_id, escolha in linhas_votos}
+    # Maior id de voto incluído: liga o placar aos votos no rastreamento
+    ultimo_voto_id = max((voto_id for voto_id, _, _ in linhas_votos), default=None)
+    rastreamento.anotar(ultimo_voto_id=ultimo_voto_id, votos=len(votos))
+    escolhas = list(votos.values())
+
+    return {
+        'id': projeto.id,
+        'titulo': projeto.titulo,
+        'status_codigo': projeto.status,
+        'status': projeto.get_status_display(),
+        'resultado_final': projeto.get_resultado_final_display(),
+        'abertura_voto': projeto.abertura_voto,
+        'tempo_limite_segundos': projeto.tempo_limite_segundos,
+        'votos_sim': escolhas.count('SIM'),
+        'votos_nao': escolhas.count('NAO'),
+        'votos_abster': escolhas.count('ABSTER'),
+        'votos_computados': len(escolhas),
+        'votos': votos,
+        'quorum_necessario': projeto.get_quorum_minimo_display(),
+        'ultimo_voto_id': ultimo_voto_id,
+    }
+
+
+def _dados_resultados(projeto_id):
+    with rastreamento.span('resultados.montagem', projeto_id=projeto_id):
+        projeto = Projeto.objects.get(pk=projeto_id)
+        # Um único SELECT nos votos do projeto
+        linhas_votos = list(projeto.votos().values_list('id', 'vereador_id', 'escolha'))
+        return _montar_dados_resultados(projeto, linhas_votos)
+
+
+def _resposta_resultados(request, dados, campos, roster):
+    """
+    Monta o JSON do placar. `campos` vem de ?fields= (None: todos); `roster`
+    só é usado (e só precisa existir) se algum campo do roster foi pedido.
+    """
+    def pedido(campo):
+        return campos is None or campo in campos
 
     # Cálculo do tempo restante
     tempo_restante = 0
-    if projeto.status == 'ABERTO':
-        limite = projeto.abertura_voto + timedelta(seconds=projeto.tempo_limite_segundos)
+    if dados['status_codigo'] == 'ABERTO':
+        agora = timezone.now()
+        limite = dados['abertura_voto'] + timedelta(seconds=dados['tempo_limite_segundos'])
         if limite > agora:
             tempo_restante = int((limite - agora).total_seconds())
+        # Tempo esgotado, mas o gerente não fechou: fica 0 (a API notifica a expiração)
+
+    # Presença ao vivo vem do cache a cada requisição (não entra no cálculo compartilhado)
+    conectados = set()
+    if pedido('vereadores_conectados') or pedido('votos_individuais'):
+        conectados = presenca.conectados(roster.ids)
+
+    valores = {
+        'id': dados['id'],
+        'titulo': dados['titulo'],
+        'status': dados['status'],
+        'resultado_final': dados['resultado_final'],
+        'tempo_restante': tempo_restante,
+        'votos_sim': dados['votos_sim'],
+        'votos_nao': dados['votos_nao'],
+        'votos_abster': dados['votos_abster'],
+        'votos_computados': dados['votos_computados'],
+        'total_vereadores': len(roster.ids) if roster else None,
+        'vereadores_conectados': len(conectados),
+        'quorum_necessario': dados['quorum_necessario'],
+        'ultimo_voto_id': dados['ultimo_voto_id'],
+    }
+    escalares = {campo: valor for campo, valor in valores.items() if pedido(campo)}
+
+    # O roster já está codificado; só voto e presença de cada vereador são emendados
+    votos_codificados = None
+    if pedido('votos_individuais'):
+        votos_codificados = serializacao.votos_individuais(request, roster, dados['votos'], conectados)
+
+    return HttpResponse(serializacao.resultados(escalares, votos_codificados), content_type='application/json')
+
+
+@faixa_publica
+@somente_leitura
+def resultados_api(request, projeto_id):
+    try:
+        campos = serializacao.campos_pedidos(request.GET.get('fields'))
+    except serializacao.CampoInvalido as e:
+        return HttpResponseBadRequest(f"Campo(s) desconhecido(s) em fields: {e}")
+
+    # Requisições simultâneas para a mesma versão do projeto compartilham um único cálculo.
+    # Logo após votar, o navegador lê do banco principal e não entra no cálculo compartilhado.
+    try:
+        if COOKIE_LER_PRINCIPAL in request.COOKIES:
+            dados = _dados_resultados(projeto_id)
         else:
-            # Tempo esgotado, mas o gerente não fechou (a API notifica a expiração)
-            tempo_restante = 0 
-            
-    votos_computados = projeto.voto_set.count()
+            chave = 'resultados:{}:{}'.format(projeto_id, versoes.versao(versoes.projeto(projeto_id)))
+            dados = coalescer(chave, lambda: _dados_resultados(projeto_id))
+    except Projeto.DoesNotExist:
+        raise Http404("Projeto não encontrado.")
 
-    # Contagem de votos
-    votos_sim = projeto.voto_set.filter(escolha='SIM').count()
-    votos_nao = projeto.voto_set.filter(escolha='NAO').count()
-    votos_abster = projeto.voto_set.filter(escolha='ABSTER').count()
+    roster = serializacao.roster() if serializacao.precisa_roster(campos) else None
+    return _resposta_resultados(request, dados, campos, roster)
 
-    # Lista de vereadores e seus votos (para o placar público)
-    vereadores_profiles = VereadorProfile.objects.filter(ativo=True).select_related('user').order_by('nome_completo')
-    votos_individuais = []
-    
-    for profile in vereadores_profiles:
-        vereador = profile.user
-        voto = Voto.objects.filter(projeto=projeto, vereador=vereador).first()
-        
-        status_voto = 'NÃO VOTOU'
-        if voto:
-            status_voto = voto.escolha
-        elif profile.ausente_na_sessao:
-            status_voto = 'AUSENTE'
-        
-        foto_url = None
-        if profile.foto:
-            # Usar request.build_absolute_uri para URL absoluta
-            foto_url = request.build_absolute_uri(profile.foto.url)
-            
-        votos_individuais.append({
-            'vereador_id': vereador.id,
-            'nome': profile.nome_completo,
-            'partido': profile.partido,
-            'foto_url': foto_url,
-            'voto': status_voto,
-        })
-        
-    TOTAL_VEREADORES = vereadores_profiles.count()
-    
-    # Retorna o JSON
+
+# --- 6. Placar Público Assíncrono (ASGI) ---
+# Usadas no lugar de tela_principal/resultados_api quando LEGISLATIVO_VIEWS_ASSINCRONAS
+# está ativo (ver legislativo/urls.py). As demais views continuam síncronas e o
+# Django as executa em threads sob ASGI.
+
+@faixa_publica
+@somente_leitura
+async def tela_principal_async(request):
+    projeto = await Projeto.objects.filter(status__in=['ABERTO', 'FECHADO']).order_by('-abertura_voto').afirst()
+    total_vereadores = await VereadorProfile.objects.filter(user__is_active=True).acount()
+
+    context = {
+        'projeto_ativo': projeto,
+        'total_vereadores': total_vereadores,
+        'versao_projeto_ativo': await versoes.aversao(versoes.projeto(projeto.id)) if projeto else None,
+        'fragmentos_ttl': getattr(settings, 'LEGISLATIVO_FRAGMENTOS_TTL', 3600),
+        'rastreamento_ativo': rastreamento.ativo(),
+    }
+    # O base.html consulta request.user (sessão e grupos); a renderização
+    # fica numa thread para essas consultas síncronas.
+    return await sync_to_async(render)(request, 'legislativo/tela_principal.html', context)
+
+
+async def _adados_resultados(projeto_id):
+    with rastreamento.span('resultados.montagem', projeto_id=projeto_id):
+        projeto = await Projeto.objects.aget(pk=projeto_id)
+        linhas_votos = [linha async for linha in projeto.votos().values_list('id', 'vereador_id', 'escolha')]
+        return _montar_dados_resultados(projeto, linhas_votos)
+
+
+@faixa_publica
+@somente_leitura
+async def resultados_api_async(request, projeto_id):
+    try:
+        campos = serializacao.campos_pedidos(request.GET.get('fields'))
+    except serializacao.CampoInvalido as e:
+        return HttpResponseBadRequest(f"Campo(s) desconhecido(s) em fields: {e}")
+
+    try:
+        if COOKIE_LER_PRINCIPAL in request.COOKIES:
+            dados = await _adados_resultados(projeto_id)
+        else:
+            chave = 'resultados:{}:{}'.format(projeto_id, await versoes.aversao(versoes.projeto(projeto_id)))
+            dados = await acoalescer(chave, lambda: _adados_resultados(projeto_id))
+    except Projeto.DoesNotExist:
+        raise Http404("Projeto não encontrado.")
+
+    roster = await serializacao.aroster() if serializacao.precisa_roster(campos) else None
+    return _resposta_resultados(request, dados, campos, roster)
+
+
+# Beacon do placar público: o navegador informa quando exibiu um placar novo
+@csrf_exempt
+@faixa_publica
+@require_POST
+def placar_exibido(request):
+    if rastreamento.ativo():
+        try:
+            projeto_id = int(request.POST['projeto_id'])
+            ultimo_voto_id = int(request.POST['ultimo_voto_id'])
+            renderizacao_ms = min(max(float(request.POST.get('renderizacao_ms', 0)), 0.0), 60000.0)
+        except (KeyError, ValueError):
+            return HttpResponse(status=400)
+        rastreamento.registrar(
+            'placar.exibicao', renderizacao_ms, projeto_id=projeto_id, ultimo_voto_id=ultimo_voto_id,
+        )
+    return HttpResponse(status=204)
+
+
+# --- 7. Presença ao Vivo ---
+# Batida do painel do vereador: só atualiza o cache (ver presenca.py)
+@aceita_terminal
+@login_required
+@require_POST
+def presenca_batida(request):
+    if request.user.id not in {user_id for user_id, _ in presenca.roster()}:
+        return HttpResponseForbidden("Apenas vereadores em exercício registram presença.")
+    presenca.bater(request.user.id)
+    return HttpResponse(status=204)
+
+
+@faixa_publica
+@somente_leitura
+def presenca_api(request):
+    # Roster "conectado agora" para o painel do presidente e o placar
+    roster = presenca.roster()
+    conectados = presenca.conectados([user_id for user_id, _ in roster])
     return JsonResponse({
-        'id': projeto.id,
-        'titulo': projeto.titulo,
-        'status': projeto.get_status_display(),
-        'resultado_final': projeto.get_resultado_final_display(), # Novo campo
-        'tempo_restante': tempo_restante,
-        'votos_sim': votos_sim,
-        'votos_nao': votos_nao,
-        'votos_abster': votos_abster,
-        'votos_computados': votos_computados,
-        'total_vereadores': TOTAL_VEREADORES,
-        'votos_individuais': votos_individuais,
-        'quorum_necessario': projeto.get_quorum_minimo_display(),
+        'conectados': len(conectados),
+        'total': len(roster),
+        'vereadores': [
+            {'vereador_id': user_id, 'nome': nome, 'conectado': user_id in conectados}
+            for user_id, nome in roster
+        ],
     })
+
+
+# --- 8. Saúde do Processo (balanceador de carga) ---
+@never_cache
+def saude(request):
+    """
+    Prontidão deste processo: 200 só depois do aquecimento (aquecimento.py) e
+    com o banco de cada câmara respondendo; 503 enquanto isso. O endpoint é
+    público: a resposta só traz situações, e os erros vão para o log.
+    """
+    estado = aquecimento.estado()
+    if estado['situacao'] in ('frio', 'falhou'):
+        # Ninguém aqueceu este processo (ou falhou): aquece em segundo plano, sem segurar a verificação
+        aquecimento.iniciar()
+    pronto = estado['situacao'] == 'pronto'
+
+    bancos = {}
+    for _ in camaras.para_cada_camara():
+        alias = camaras.alias_principal()
+        try:
+            with camaras.conexao().cursor() as cursor:
+                cursor.execute('SELECT 1')
+            bancos[alias] = 'ok'
+        except DatabaseError:
+            logger.exception("Banco %s não respondeu à verificação de saúde", alias)
+            bancos[alias] = 'erro'
+            pronto = False
+
+    return JsonResponse(
+        {'pronto': pronto, 'situacao': estado['situacao'], 'bancos': bancos, 'admissao': admissao.estado()},
+        status=200 if pronto else 503,
+    )
+
+
 @login_required
 def painel_secretaria(request):
     if not check_is_secretaria(request.user):
         return HttpResponseForbidden("Acesso negado. Você não pertence ao grupo Secretaria Geral.")
     
-    projetos = Projeto.objects.filter(status='PREPARACAO').order_by('-id')
+    projetos = _pagina_projetos_secretaria()
     
     if request.method == 'POST':
         form = ProjetoForm(request.POST)
@@ -379,20 +828,21 @@ def gerenciar_vereadores(request):
     if not check_is_secretaria(request.user):
         return HttpResponseForbidden("Acesso negado. Você não pertence ao grupo Secretaria Geral.")
 
-    vereadores = VereadorProfile.objects.all().select_related('user', 'cargo_mesa').order_by('nome_completo')
+    vereadores = _pagina_vereadores()
     
     context = {
         'vereadores': vereadores
     }
     return render(request, 'legislativo/gerenciar_vereadores.html', context)
 
+@limitar_uploads_pdf('ata_posse')
 @login_required
 def cadastrar_vereador(request):
     if not check_is_secretaria(request.user):
         return HttpResponseForbidden("Acesso negado. Você não pertence ao grupo Secretaria Geral.")
 
     # Verifica o limite de vereadores
-    config = Configuracao.objects.first()
+    config = Configuracao.atual()
     limite = config.limite_vereadores if config else 15
     vereadores_atuais = VereadorProfile.objects.count()
     
@@ -434,6 +884,7 @@ def cadastrar_vereador(request):
     }
     return render(request, 'legislativo/cadastrar_vereador.html', context)
 
+@limitar_uploads_pdf('ata_posse')
 @login_required
 def editar_vereador(request, user_id):
     if not check_is_secretaria(request.user):
@@ -524,11 +975,74 @@ def cadastrar_secretaria(request):
     else:
         form = UserCreationForm()
         
-    is_superuser = request.user.is_superuser
-    
     context = {
         'form': form,
-        'projetos': projetos,
-        'is_superuser': is_superuser
     }
-    return render(request, 'legislativo/painel_secretaria.html', context)
\ No newline at end of file
+    return render(request, 'legislativo/cadastrar_secretaria.html', context)
+
+
+# --- 9. Terminais de Votação (ver terminais.py) ---
+@login_required
+def gerenciar_terminais(request):
+    if not check_is_secretaria(request.user):
+        return HttpResponseForbidden("Acesso negado. Você não pertence ao grupo Secretaria Geral.")
+
+    if request.method == 'POST':
+        form = TerminalVotacaoForm(request.POST)
+        if form.is_valid():
+            terminal = form.save(commit=False)
+            terminal.criado_por = request.user
+            terminal.save()
+            messages.success(request, f"Terminal '{terminal.nome}' cadastrado. Abra o link de ativação no próprio terminal em até 1 hora.")
+            return redirect('legislativo:gerenciar_terminais')
+    else:
+        form = TerminalVotacaoForm()
+
+    terminais_cadastrados = TerminalVotacao.objects.select_related('vereador__vereadorprofile').order_by('nome', '-criado_em')
+    for terminal in terminais_cadastrados:
+        if terminal.situacao == 'PENDENTE':
+            terminal.link_ativacao = request.build_absolute_uri(
+                reverse('legislativo:ativar_terminal', args=[terminal.codigo_ativacao])
+            )
+    return render(request, 'legislativo/gerenciar_terminais.html', {'form': form, 'terminais': terminais_cadastrados})
+
+
+@login_required
+@require_POST
+def revogar_terminal(request, terminal_id):
+    if not check_is_secretaria(request.user):
+        return HttpResponseForbidden("Acesso negado. Você não pertence ao grupo Secretaria Geral.")
+
+    terminal = get_object_or_404(TerminalVotacao, pk=terminal_id)
+    if terminal.revogado_em is None:
+        terminal.revogado_em = timezone.now()
+        # O sinal invalida o mapa de terminais; sem cache compartilhado, os outros
+        # processos o recarregam em até LEGISLATIVO_TERMINAIS_RECARGA_SEGUNDOS
+        terminal.save()
+        messages.success(request, f"Terminal '{terminal.nome}' revogado.")
+    return redirect('legislativo:gerenciar_terminais')
+
+
+def ativar_terminal(request, codigo):
+    # GET só mostra a confirmação: pré-visualizações de links não gastam o código
+    terminal = TerminalVotacao.objects.select_related('vereador__vereadorprofile').filter(codigo_ativacao=codigo).first()
+    if terminal is None or terminal.situacao != 'PENDENTE':
+        situacao = terminal.situacao if terminal else None
+        mensagem = {
+            'ATIVO': 'Este terminal já foi ativado.',
+            'REVOGADO': 'Este terminal foi revogado.',
+            'EXPIRADO': 'O link de ativação do terminal expirou. Peça um novo à Secretaria.',
+        }.get(situacao, 'Link de ativação de terminal inválido.')
+        return render(request, 'legislativo/ativacao_invalida.html', {'mensagem': mensagem})
+
+    if request.method != 'POST':
+        return render(request, 'legislativo/ativar_terminal.html', {'terminal': terminal})
+
+    # Uso único: só um POST concorrente consegue ativar
+    ativado = TerminalVotacao.objects.filter(pk=terminal.pk, ativado_em__isnull=True, revogado_em__isnull=True).update(
+        ativado_em=timezone.now()
+    )
+    if not ativado:
+        return render(request, 'legislativo/ativacao_invalida.html', {'mensagem': 'Este terminal já foi ativado.'})
+    versoes.incrementar(versoes.TERMINAIS)  # update() não dispara o sinal
+    return terminais.gravar_cookie(redirect('legislativo:painel_vereador'), terminal)
@@ -12,5 +12,13 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sistema_camara.settings')
+# Placar público (tela_principal e resultados_api) com views assíncronas
+os.environ.setdefault('LEGISLATIVO_VIEWS_ASSINCRONAS', '1')
 
 application = get_asgi_application()
+
+# Aquece caches e templates em segundo plano a partir do primeiro pedido de cada
+# worker (depois do fork); /api/saude/ responde 503 até terminar
+from legislativo import aquecimento  # noqa: E402 (depende do Django configurado)
+
+application = aquecimento.asgi(application)
@@ -1,4 +1,5 @@
 
+import json
 import os
 from pathlib import Path
 
@@ -29,7 +30,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'legislativo.camaras.CamaraMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'legislativo.roteamento.RoteamentoBancoMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -44,6 +47,9 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
+        # Sem 'loaders' explícitos, o Django já usa o loader com cache (os
+        # templates são compilados uma vez e mantidos em memória), inclusive
+        # com DEBUG, onde o autoreload o limpa quando um template muda
         'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
@@ -57,6 +63,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'sistema_camara.wsgi.application'
 
+# Views assíncronas do placar público; ativadas pelo sistema_camara/asgi.py
+LEGISLATIVO_VIEWS_ASSINCRONAS = os.environ.get('LEGISLATIVO_VIEWS_ASSINCRONAS') == '1'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -65,9 +74,43 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    },
+    # Réplica somente leitura usada pelo placar público (legislativo.roteamento).
+    # Sem LEGISLATIVO_DB_REPLICA aponta para o mesmo arquivo do banco principal;
+    # nos testes é um segundo banco SQLite independente.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('LEGISLATIVO_DB_REPLICA', BASE_DIR / 'db.sqlite3'),
+    },
 }
 
+DATABASE_ROUTERS = ['legislativo.roteamento.RoteadorLeituraEscrita']
+
+# Por quanto tempo (segundos) depois de uma escrita o navegador lê só do banco principal
+LEGISLATIVO_REPLICA_ATRASO_MAXIMO = 5
+
+# Várias câmaras no mesmo deployment (legislativo/camaras.py). O arquivo JSON
+# em LEGISLATIVO_CAMARAS_ARQUIVO descreve cada câmara:
+#   {"itu": {"hosts": ["camara.itu.sp.gov.br"], "banco": "/srv/camaras/itu.sqlite3",
+#            "replica": "/srv/camaras/itu-replica.sqlite3"}}
+# ("replica" é opcional). Cada câmara ganha os bancos camara_<nome> e
+# camara_<nome>_replica; crie as tabelas com `manage.py migrar_camaras`.
+# Sem o arquivo, uma câmara só nos bancos 'default' e 'replica'.
+LEGISLATIVO_CAMARAS = {}
+if os.environ.get('LEGISLATIVO_CAMARAS_ARQUIVO'):
+    with open(os.environ['LEGISLATIVO_CAMARAS_ARQUIVO'], encoding='utf-8') as _f:
+        LEGISLATIVO_CAMARAS = json.load(_f)
+    for _nome, _camara in LEGISLATIVO_CAMARAS.items():
+        DATABASES[f'camara_{_nome}'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': _camara['banco'],
+        }
+        DATABASES[f'camara_{_nome}_replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': _camara.get('replica') or _camara['banco'],
+        }
+        ALLOWED_HOSTS += _camara['hosts']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -113,10 +156,102 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# A mídia de cada câmara fica em MEDIA_ROOT/camaras/<nome>/
+STORAGES = {
+    'default': {
+        'BACKEND': 'legislativo.camaras.ArmazenamentoPorCamara',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Uploads de PDF (atas): limite só nos campos de PDF, verificado durante o
+# recebimento nas views de cadastro (armazenamento.limitar_uploads_pdf), e
+# gravação deduplicada por SHA-256
+LEGISLATIVO_PDF_TAMANHO_MAXIMO = 10 * 1024 * 1024  # 10 MB
+
+# Cache local por processo. Com vários workers, use um cache compartilhado
+# (Redis/Memcached) para que versões e coalescência valham entre processos.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'legislativo',
+        # O nome da câmara entra em todas as chaves
+        'KEY_FUNCTION': 'legislativo.camaras.chave_cache',
+    }
+}
+
+# resultados_api: requisições simultâneas compartilham o mesmo cálculo.
+# Entre processos só faz sentido com cache compartilhado.
+LEGISLATIVO_COALESCER_ENTRE_PROCESSOS = False
+LEGISLATIVO_COALESCER_ESPERA_MAXIMA = 5.0
+
+# Tempo máximo (segundos) dos fragmentos de template em cache; as chaves
+# incluem as versões dos dados, então a invalidação não depende desse prazo.
+LEGISLATIVO_FRAGMENTOS_TTL = 3600
+
+# Atas de votação: geradas em segundo plano ao encerrar cada votação
+LEGISLATIVO_ATAS_ASSINCRONO = True
+LEGISLATIVO_ATAS_WORKERS = 2
+
+# Rastreamento do ciclo do voto (votar -> placar), ver legislativo/rastreamento.py.
+# Desligado sem LEGISLATIVO_RASTREAMENTO_ARQUIVO; ex.: .../rastreamento/spans.jsonl
+LEGISLATIVO_RASTREAMENTO_ARQUIVO = os.environ.get('LEGISLATIVO_RASTREAMENTO_ARQUIVO') or None
+LEGISLATIVO_RASTREAMENTO_TAMANHO_MAXIMO = 5 * 1024 * 1024  # por arquivo, antes da rotação
+LEGISLATIVO_RASTREAMENTO_BACKUPS = 5
+
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_REDIRECT_URL = '/painel/'
 LOGOUT_REDIRECT_URL = '/'
 
-LOGIN_URL = '/contas/login/'
\ No newline at end of file
+LOGIN_URL = '/contas/login/'
+# Presença ao vivo (legislativo/presenca.py): o painel do vereador bate a cada
+# INTERVALO segundos; sem batida por TIMEOUT segundos o vereador é dado como
+# desconectado. As batidas ficam só no cache (compartilhado entre processos).
+LEGISLATIVO_PRESENCA_INTERVALO = 5
+LEGISLATIVO_PRESENCA_TIMEOUT = 15
+
+# Diário de votos (legislativo/diario_votos.py): `votar` grava o voto num
+# arquivo local com fsync e responde na hora; um drenador aplica os votos no
+# banco em lotes. Desligado sem LEGISLATIVO_DIARIO_VOTOS_ARQUIVO; ex.: .../diario/votos.jsonl
+LEGISLATIVO_DIARIO_VOTOS_ARQUIVO = os.environ.get('LEGISLATIVO_DIARIO_VOTOS_ARQUIVO') or None
+LEGISLATIVO_DIARIO_VOTOS_ASSINCRONO = True  # False: drena na própria requisição (testes)
+LEGISLATIVO_DIARIO_VOTOS_INTERVALO = 0.2  # segundos de espera para acumular o lote
+LEGISLATIVO_DIARIO_VOTOS_LOTE = 500  # votos por transação
+
+# Aquecimento (legislativo/aquecimento.py): cada worker aquece em segundo plano
+# a partir do primeiro pedido que recebe e só fica pronto em /api/saude/ depois
+# disso; aponte a verificação de prontidão do balanceador para esse endpoint.
+LEGISLATIVO_AQUECER_AO_INICIAR = True
+
+# Controle de admissão (legislativo/admissao.py): as leituras públicas (placar,
+# API de resultados, presença) nunca ocupam as últimas RESERVA vagas das
+# CAPACIDADE requisições simultâneas de cada processo (use o número de threads
+# do worker), que ficam para `votar` e as ações do presidente. Cada cliente
+# público tem TAXA requisições por segundo, com rajadas de até RAJADA
+# (TAXA = None desliga o limite por cliente). Atrás de proxy, o IP do cliente
+# vem do cabeçalho CABECALHO_CLIENTE (ex.: 'HTTP_X_FORWARDED_FOR').
+LEGISLATIVO_ADMISSAO_CAPACIDADE = 8
+LEGISLATIVO_ADMISSAO_RESERVA = 2
+LEGISLATIVO_ADMISSAO_TAXA = 10
+LEGISLATIVO_ADMISSAO_RAJADA = 50
+LEGISLATIVO_ADMISSAO_CABECALHO_CLIENTE = None
+
+# Dados abertos (legislativo/dados_abertos.py): arquivos estáticos sob
+# MEDIA_ROOT/<DIR>, regerados em segundo plano ao encerrar cada votação
+LEGISLATIVO_DADOS_ABERTOS_DIR = 'dados-abertos'
+LEGISLATIVO_DADOS_ABERTOS_ASSINCRONO = True
+
+# Placar estático (legislativo/placar_estatico.py): o comando `publicar_placar`
+# grava index.html e atual.json sob MEDIA_ROOT/<DIR> a cada mudança do placar
+LEGISLATIVO_PLACAR_ESTATICO_DIR = 'placar'
+
+# Terminais de votação (legislativo/terminais.py): dias de validade do cookie
+# gravado na ativação do terminal da bancada, e de quantos em quantos segundos
+# cada processo relê os terminais ativos (prazo máximo para uma revogação feita
+# em outro worker valer neste quando o cache não é compartilhado)
+LEGISLATIVO_TERMINAL_VALIDADE_DIAS = 365
+LEGISLATIVO_TERMINAIS_RECARGA_SEGUNDOS = 5
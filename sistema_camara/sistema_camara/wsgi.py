@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sistema_camara.settings')
 
 application = get_wsgi_application()
+
+# Aquece caches e templates em segundo plano a partir do primeiro pedido de cada
+# worker (depois do fork); /api/saude/ responde 503 até terminar
+from legislativo import aquecimento  # noqa: E402 (depende do Django configurado)
+
+application = aquecimento.wsgi(application)